@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""CMakeLists.txt generation benchmarks.
+
+Every scenario composes a synthetic project in memory, with the given number of
+packages and test suites, and measures the median time and the peak memory used
+by CMakeListsBuilder to render it. Results are compared against the baseline
+file and the script fails when any scenario exceeds its baseline by more than
+the configured ratio.
+
+    python benchmarks/cmakelists.py                    # compare against baseline
+    python benchmarks/cmakelists.py --update-baseline  # record a new baseline
+"""
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import harness
+from cpm.domain.cmake.cmakelists_builder import CMakeListsBuilder
+from cpm.domain.project.project import Project, Target, Package, Test, TestSuite
+
+BASELINE_FILE = os.path.join(harness.BENCHMARKS_DIRECTORY, 'cmakelists_baseline.json')
+DEFAULT_BUDGET = {'budget_ratio': {'time_ms': 1.5, 'peak_mb': 1.2}}
+SOURCES_PER_PACKAGE = 4
+
+SCENARIOS = {
+    'packages_1k': {'packages': 1000, 'test_suites': 10},
+    'packages_10k': {'packages': 10000, 'test_suites': 10},
+    'test_suites_1k': {'packages': 1000, 'test_suites': 1000},
+}
+
+
+def synthetic_project(packages, test_suites):
+    include_directories = frozenset(f'modules/module_{index}' for index in range(packages))
+    target = Target('default', cflags=['-Wall'], cppflags=['-Wall', '-std=c++17'])
+    for index in range(packages):
+        sources = tuple(f'modules/module_{index}/package/source_{source}.{"c" if source % 2 else "cpp"}'
+                        for source in range(SOURCES_PER_PACKAGE))
+        target.packages.append(Package(f'modules/module_{index}/package', sources, ('-Wall',), ('-Wall',), (), include_directories))
+    target.include_directories = set(include_directories)
+    test = Test(test_suites=[TestSuite(f'test_{index}', f'tests/test_{index}.cpp') for index in range(test_suites)])
+    return Project('benchmark', target=target, test=test)
+
+
+def measure(scenario, runs):
+    project = synthetic_project(**SCENARIOS[scenario])
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        contents = CMakeListsBuilder().build_contents(project)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    CMakeListsBuilder().build_contents(project)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'time_ms': round(statistics.median(times) * 1000, 1),
+        'peak_mb': round(peak / 2**20, 1),
+        'output_mb': round(len(contents) / 2**20, 2),
+    }
+
+
+def print_report(results):
+    for scenario, result in results.items():
+        print(f'{scenario:<16} time {result["time_ms"]:>8.1f}ms   peak {result["peak_mb"]:>7.1f}MB   '
+              f'output {result["output_mb"]:>6.2f}MB')
+
+
+if __name__ == '__main__':
+    sys.exit(harness.main('benchmark CMakeLists.txt generation', SCENARIOS, measure, print_report, BASELINE_FILE, DEFAULT_BUDGET))
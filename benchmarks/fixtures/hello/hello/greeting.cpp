@@ -0,0 +1,6 @@
+#include <hello/greeting.h>
+
+const char *greeting()
+{
+    return "hello";
+}
@@ -0,0 +1,6 @@
+#ifndef HELLO_GREETING_H
+#define HELLO_GREETING_H
+
+const char *greeting();
+
+#endif
@@ -0,0 +1,6 @@
+#include <hello/greeting.h>
+
+int main()
+{
+    return greeting() == nullptr;
+}
@@ -0,0 +1,70 @@
+"""Shared baseline handling and command line for the cpm benchmarks.
+
+A baseline file stores the results of every scenario together with a budget.
+A `budget_ms` budget allows each metric to exceed its baseline by a fixed
+amount, and a `budget_ratio` budget by a factor. Importing this module also
+makes the cpm sources importable when the benchmarks run from a checkout.
+"""
+import argparse
+import json
+import os
+import sys
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPOSITORY_DIRECTORY = os.path.dirname(BENCHMARKS_DIRECTORY)
+
+if REPOSITORY_DIRECTORY not in sys.path:
+    sys.path.insert(0, REPOSITORY_DIRECTORY)
+
+
+def load_baseline(baseline_file, default_budget):
+    if not os.path.exists(baseline_file):
+        return {**default_budget, 'scenarios': {}}
+    with open(baseline_file) as stream:
+        return json.load(stream)
+
+
+def save_baseline(baseline_file, baseline, results):
+    baseline['scenarios'].update(results)
+    with open(baseline_file, 'w') as stream:
+        json.dump(baseline, stream, indent=2)
+        stream.write('\n')
+
+
+def regressions(baseline, results):
+    failures = []
+    for scenario, result in results.items():
+        reference = baseline['scenarios'].get(scenario)
+        if reference is None:
+            continue
+        for metric, budget in baseline.get('budget_ms', {}).items():
+            if result[metric] > reference[metric] + budget:
+                failures.append(f'{scenario}: {metric} {result[metric]}ms exceeds baseline {reference[metric]}ms + {budget}ms')
+        for metric, ratio in baseline.get('budget_ratio', {}).items():
+            if result[metric] > reference[metric] * ratio:
+                failures.append(f'{scenario}: {metric} {result[metric]} exceeds baseline {reference[metric]} x {ratio}')
+    return failures
+
+
+def main(description, scenarios, measure, print_report, baseline_file, default_budget):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('scenarios', nargs='*', help=f'scenarios to run (default all: {", ".join(scenarios)})')
+    parser.add_argument('-n', '--runs', type=int, default=5, help='runs per scenario (default 5)')
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    args = parser.parse_args()
+    unknown = [scenario for scenario in args.scenarios if scenario not in scenarios]
+    if unknown:
+        parser.error(f'unknown scenarios: {", ".join(unknown)}')
+
+    baseline = load_baseline(baseline_file, default_budget)
+    results = {scenario: measure(scenario, args.runs) for scenario in args.scenarios or list(scenarios)}
+    print_report(results)
+
+    if args.update_baseline:
+        save_baseline(baseline_file, baseline, results)
+        return 0
+
+    failures = regressions(baseline, results)
+    for failure in failures:
+        print(f'regression: {failure}')
+    return 1 if failures else 0
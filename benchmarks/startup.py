@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Start-up and import-time benchmarks for the cpm command line.
+
+Every scenario runs cpm in a fresh interpreter against a copy of the fixture
+project, measuring the median wall time and the total `-X importtime` cost.
+Results are compared against the baseline file and the script fails when any
+scenario exceeds its baseline by more than the configured budget.
+
+    python benchmarks/startup.py                    # compare against baseline
+    python benchmarks/startup.py --update-baseline  # record a new baseline
+"""
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import harness
+
+FIXTURE_PROJECT = os.path.join(harness.BENCHMARKS_DIRECTORY, 'fixtures', 'hello')
+BASELINE_FILE = os.path.join(harness.BENCHMARKS_DIRECTORY, 'startup_baseline.json')
+DEFAULT_BUDGET = {'budget_ms': {'wall_ms': 50, 'import_ms': 30}}
+CPM_ENTRY_POINT = 'import cpm; cpm.main()'
+
+SCENARIOS = {
+    'version': ['--version'],
+    'help': ['help'],
+    'prep': ['prep'],
+    'build_noop': ['build'],
+}
+WARM_UP = {
+    'build_noop': ['build'],
+}
+
+
+def run_cpm(project_directory, args, import_time=False):
+    command = [sys.executable] + (['-X', 'importtime'] if import_time else []) + ['-c', CPM_ENTRY_POINT] + args
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=project_directory, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - start
+    return elapsed, result.stderr.decode(errors='replace')
+
+
+def parse_import_time(stderr):
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.rstrip(), int(self_us), int(cumulative_us)))
+    total_us = sum(self_us for _, self_us, _ in modules)
+    top_level = [(name.strip(), cumulative_us) for name, _, cumulative_us in modules if not name.startswith('  ')]
+    return total_us, sorted(top_level, key=lambda module: module[1], reverse=True)
+
+
+def measure(scenario, runs):
+    args = SCENARIOS[scenario]
+    with tempfile.TemporaryDirectory() as directory:
+        project_directory = os.path.join(directory, 'hello')
+        shutil.copytree(FIXTURE_PROJECT, project_directory)
+        if scenario in WARM_UP:
+            run_cpm(project_directory, WARM_UP[scenario])
+        wall_times = [run_cpm(project_directory, args)[0] for _ in range(runs)]
+        _, stderr = run_cpm(project_directory, args, import_time=True)
+    import_us, top_imports = parse_import_time(stderr)
+    return {
+        'wall_ms': round(statistics.median(wall_times) * 1000, 1),
+        'import_ms': round(import_us / 1000, 1),
+        'top_imports': [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for name, us in top_imports[:10]],
+    }
+
+
+def print_report(results):
+    for scenario, result in results.items():
+        print(f'{scenario:<12} wall {result["wall_ms"]:>8.1f}ms   imports {result["import_ms"]:>8.1f}ms')
+        for module in result['top_imports'][:5]:
+            print(f'{"":<12}   {module["module"]:<40} {module["cumulative_ms"]:>8.1f}ms')
+
+
+if __name__ == '__main__':
+    sys.exit(harness.main('benchmark cpm start-up and import time', SCENARIOS, measure, print_report, BASELINE_FILE, DEFAULT_BUDGET))
@@ -1,14 +1,13 @@
 #!/usr/bin/env python3.7
-import importlib
+import os
 import sys
-import pkgutil
-import pkg_resources
 import datetime
 import argparse
 
 from cpm.argument_parser import ArgumentParser
-from cpm.api.result import FAIL
-import cpm.api
+from cpm.api.result import Result, FAIL
+from cpm.commands import available_commands
+from cpm.infrastructure import events, profiler
 
 
 def handle_keyboard_interrupt(func):
@@ -50,27 +49,45 @@ def main():
 
     start_time = datetime.datetime.now()
 
-    result = commands[command_to_execute].execute(command_arguments)
+    if args.profile:
+        profiler.start(args.profile)
+    if args.events:
+        events.start(args.events)
+    events.emit('command_start', command=command_to_execute, argv=command_arguments, cwd=os.getcwd())
+    result = Result(FAIL, 'error: command did not finish')
+    try:
+        with profiler.span(f'cpm {command_to_execute}', 'command', argv=command_arguments):
+            result = commands[command_to_execute].execute(command_arguments)
+    except KeyboardInterrupt:
+        result = Result(FAIL, 'cancelled')
+        raise
+    except Exception as error:
+        result = Result(FAIL, f'error: {error}')
+        raise
+    finally:
+        elapsed_time = datetime.datetime.now() - start_time
+        events.emit('command_end',
+                    command=command_to_execute,
+                    status_code=result.status_code,
+                    message=result.message,
+                    duration_ms=elapsed_time.total_seconds() * 1000)
+        profiler.stop()
+        events.stop()
 
-    elapsed_time = datetime.datetime.now() - start_time
     finish(result, elapsed_time)
 
 
-def available_commands():
-    commands = {}
-    for api_action in api_commands():
-        module = importlib.import_module(api_action.name)
-        if hasattr(module, 'execute'):
-            commands[module_name(api_action)] = module
-    return commands
-
-
 def argument_parser(commands):
     top_level_parser = ArgumentParser(description='cpm: a modern project management tool for C/C++ projects')
     top_level_parser.add_argument('-v', '--version',
-                                  action='version',
-                                  help='show version and exit',
-                                  version=f'cpm version {pkg_resources.require("cpm-cli")[0].version}')
+                                  action=PrintVersion,
+                                  help='show version and exit')
+    top_level_parser.add_argument('--profile',
+                                  arg_format='<file>',
+                                  help='write a Chrome trace of the command phases to <file>')
+    top_level_parser.add_argument('--events',
+                                  arg_format='<file>',
+                                  help='append machine-readable events of the command to <file> (JSON lines)')
     top_level_parser.add_argument('command',
                                   choices=list(commands.keys()) + ['help'],
                                   nargs=argparse.REMAINDER)
@@ -78,7 +95,7 @@ def argument_parser(commands):
 
 
 def print_help(top_level_parser, commands):
-    help_text = 'Usage: cpm [-h | --help] [-v | --version] <command> [args]'
+    help_text = 'Usage: cpm [-h | --help] [-v | --version] [--profile <file>] [--events <file>] <command> [args]'
 
     help_text += '\n\nOptional Arguments:'
     for option in top_level_parser.options:
@@ -96,12 +113,22 @@ def print_help(top_level_parser, commands):
     print(help_text)
 
 
-def module_name(api_command):
-    return api_command.name.split('.')[-1]
+class PrintVersion(argparse.Action):
+    def __init__(self, option_strings, dest=argparse.SUPPRESS, default=argparse.SUPPRESS, help=None):
+        super(PrintVersion, self).__init__(option_strings=option_strings, dest=dest, default=default, nargs=0, help=help)
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        print(f'cpm version {cpm_version()}')
+        parser.exit()
 
 
-def api_commands():
-    return list(pkgutil.iter_modules(cpm.api.__path__, cpm.api.__name__+'.'))
+def cpm_version():
+    try:
+        from importlib.metadata import version
+    except ImportError:
+        from pkg_resources import get_distribution
+        return get_distribution('cpm-cli').version
+    return version('cpm-cli')
 
 
 def finish(result, elapsed_time):
@@ -1,11 +1,13 @@
 from cpm.argument_parser import ArgumentParser
 from cpm.api.result import Result, OK, FAIL
+from cpm.domain.bit_resolver import BitResolutionError
 from cpm.domain.cmake.cmakelists_builder import CMakeListsBuilder
 from cpm.domain.compilation_service import CompilationService
 from cpm.domain.project_commands import DockerImageNotFound
 from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound, ParseError
 from cpm.domain.project.project_loader import ProjectLoader, InvalidTarget
 from cpm.domain.project_commands import ProjectCommands, BuildError
+from cpm.domain.watch_service import WatchService
 from cpm.api import install
 
 
@@ -23,10 +25,28 @@ def build_project(compilation_service, target='default'):
         return Result(FAIL, f'error: docker image {e.image_name} not found for target {target}')
     except ParseError as e:
         return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
 
     return Result(OK, f'Build finished')
 
 
+def watch_project(watch_service, target='default'):
+    try:
+        print(f'cpm: building target {target} on every change')
+        watch_service.watch_build(target)
+    except ProjectDescriptorNotFound:
+        return Result(FAIL, f'error: not a cpm project')
+    except InvalidTarget:
+        return Result(FAIL, f'error: unknown target {target}')
+    except ParseError as e:
+        return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
+
+    return Result(OK, f'Stopped watching')
+
+
 def execute(argv):
     install.execute([])
 
@@ -36,6 +56,8 @@ def execute(argv):
     project_loader = ProjectLoader()
     cmakelists_builder = CMakeListsBuilder()
     project_commands = ProjectCommands()
+    if args.watch:
+        return watch_project(WatchService(project_loader, cmakelists_builder, project_commands), args.target)
     service = CompilationService(project_loader, cmakelists_builder, project_commands)
 
     result = build_project(service, args.target)
@@ -49,6 +71,11 @@ def argument_parser():
                                help='target to build',
                                nargs='?',
                                default='default')
+    create_parser.add_argument('-w', '--watch',
+                               required=False,
+                               action='store_true',
+                               help='keep watching the project and rebuild it whenever it changes',
+                               default=False)
     return create_parser
 
 
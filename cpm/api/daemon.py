@@ -0,0 +1,57 @@
+from cpm.argument_parser import ArgumentParser
+from cpm.api.result import Result
+from cpm.api.result import OK
+from cpm.api.result import FAIL
+from cpm.infrastructure.daemon import DaemonControl, DaemonStartFailure, UnsafeDaemonDirectory
+
+
+def manage_daemon(daemon_control, action):
+    running = daemon_control.is_running()
+    if action == 'status':
+        return Result(OK, f'daemon running with pid {daemon_control.pid()}' if running else 'daemon not running')
+    if action == 'stop':
+        if not running:
+            return Result(FAIL, 'error: daemon not running')
+        daemon_control.stop()
+        return Result(OK, 'daemon stopped')
+    if running:
+        return Result(FAIL, f'error: daemon already running with pid {daemon_control.pid()}')
+    try:
+        if action == 'run':
+            daemon_control.run()
+            return Result(OK, 'daemon stopped')
+        daemon_control.start()
+    except UnsafeDaemonDirectory as e:
+        return Result(FAIL, f'error: {e}')
+    except DaemonStartFailure:
+        return Result(FAIL, 'error: failed to start daemon')
+    return Result(OK, f'daemon started with pid {daemon_control.pid()}')
+
+
+def execute(argv):
+    daemon_parser = argument_parser()
+    args = daemon_parser.parse_args(argv)
+
+    daemon_control = DaemonControl()
+
+    result = manage_daemon(daemon_control, args.action)
+
+    return result
+
+
+def argument_parser():
+    daemon_parser = ArgumentParser(prog='cpm daemon', description=description())
+    daemon_parser.add_argument('action',
+                               help='start the daemon in the background, run it in the foreground, stop it or show its status',
+                               choices=['start', 'run', 'stop', 'status'],
+                               nargs='?',
+                               default='status')
+    return daemon_parser
+
+
+def print_help():
+    return argument_parser().print_help()
+
+
+def description():
+    return 'keep a cpm server running in the background to speed up commands'
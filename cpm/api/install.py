@@ -2,6 +2,7 @@ from cpm.argument_parser import ArgumentParser
 from cpm.api.result import Result
 from cpm.api.result import OK
 from cpm.api.result import FAIL
+from cpm.domain.bit_resolver import BitResolutionError
 from cpm.domain.install_service import InstallService
 from cpm.domain.bit_installer import BitInstaller
 from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound, ParseError
@@ -22,6 +23,8 @@ def install_bit(install_service, name, version='latest'):
         return Result(FAIL, f'error: failed to connect to CPM Hub at {error}')
     except ParseError as e:
         return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
 
     return Result(OK, f'installed bit {name}:{version}')
 
@@ -37,6 +40,8 @@ def install_project_bits(install_service):
         return Result(FAIL, f'error: failed to connect to CPM Hub at {error}')
     except ParseError as e:
         return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
 
     return Result(OK, f'installed bits')
 
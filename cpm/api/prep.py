@@ -2,6 +2,7 @@ from cpm.argument_parser import ArgumentParser
 from cpm.api.result import Result
 from cpm.api.result import OK
 from cpm.api.result import FAIL
+from cpm.domain.bit_resolver import BitResolutionError
 from cpm.domain.cmake.cmakelists_builder import CMakeListsBuilder
 from cpm.domain.compilation_service import CompilationService
 from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound, ParseError
@@ -16,6 +17,8 @@ def prep_project(compilation_service, target='default'):
         return Result(FAIL, f'error: not a cpm project')
     except ParseError as e:
         return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
 
     return Result(OK, f'CMakeLists.txt ready')
 
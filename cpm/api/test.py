@@ -4,14 +4,18 @@ from cpm.argument_parser import ArgumentParser
 from cpm.api.result import Result
 from cpm.api.result import OK
 from cpm.api.result import FAIL
+from cpm.domain.bit_resolver import BitResolutionError
 from cpm.domain.cmake.cmakelists_builder import CMakeListsBuilder
 from cpm.domain.project.project_loader import ProjectLoader
 from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound, ParseError
 from cpm.domain.test_service import TestService
 from cpm.domain.test_service import NoTestsFound
+from cpm.domain.test_index import TestSelection, TestNotFound
 from cpm.domain.project_commands import BuildError
 from cpm.domain.project_commands import TestsFailed
 from cpm.domain.project_commands import ProjectCommands
+from cpm.domain.project.project_loader import InvalidTarget
+from cpm.domain.watch_service import WatchService
 
 
 def run_tests(test_service, files_or_dirs=(), test_args=(), target='default'):
@@ -25,12 +29,33 @@ def run_tests(test_service, files_or_dirs=(), test_args=(), target='default'):
         return Result(FAIL, '✖ FAIL')
     except NoTestsFound:
         return Result(OK, 'no tests to run')
+    except TestNotFound as e:
+        return Result(FAIL, f'error: no tests match {e}')
     except ParseError as e:
         return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
 
     return Result(OK, '✔ PASS')
 
 
+def watch_tests(watch_service, files_or_dirs=(), test_args=(), target='default'):
+    try:
+        watch_service.watch_tests(files_or_dirs, target, test_args)
+    except ProjectDescriptorNotFound:
+        return Result(FAIL, 'error: not a cpm project')
+    except NoTestsFound:
+        return Result(OK, 'no tests to run')
+    except InvalidTarget:
+        return Result(FAIL, f'error: unknown target {target}')
+    except ParseError as e:
+        return Result(FAIL, f'error: {e.message}')
+    except BitResolutionError as e:
+        return Result(FAIL, f'error: {e}')
+
+    return Result(OK, 'Stopped watching')
+
+
 def execute(argv):
     add_target_parser = argument_parser()
     args = add_target_parser.parse_args(argv)
@@ -38,18 +63,37 @@ def execute(argv):
     project_loader = ProjectLoader()
     cmakelists_builder = CMakeListsBuilder()
     project_commands = ProjectCommands()
-    service = TestService(project_loader, cmakelists_builder, project_commands)
     files_or_dirs, test_args = __parse_rest(args.rest)
+    selection = TestSelection(files_or_dirs, args.keyword, args.tags)
+    if args.watch:
+        return watch_tests(WatchService(project_loader, cmakelists_builder, project_commands), selection, test_args)
+    service = TestService(project_loader, cmakelists_builder, project_commands)
 
-    result = run_tests(service, files_or_dirs, test_args)
+    result = run_tests(service, selection, test_args)
 
     return result
 
 
 def argument_parser():
     add_target_parser = ArgumentParser(prog='cpm test',
-                                       usage='cpm test [<files or dirs>] [-- test_args]',
+                                       usage='cpm test [-w] [-k <keyword>] [-t <tag>] [<tests>] [-- test_args]',
                                        description=description())
+    add_target_parser.add_argument('-w', '--watch',
+                                   required=False,
+                                   action='store_true',
+                                   help='keep watching the project and run the affected tests whenever it changes',
+                                   default=False)
+    add_target_parser.add_argument('-k', '--keyword',
+                                   required=False,
+                                   action='store',
+                                   help='only run tests whose name contains the keyword',
+                                   default='')
+    add_target_parser.add_argument('-t', '--tag',
+                                   required=False,
+                                   action='append',
+                                   dest='tags',
+                                   help='only run tests with the given tag (can be repeated)',
+                                   default=[])
     add_target_parser.add_argument('rest',
                                    help='rest of the arguments will be passed as command line arguments in the tests',
                                    nargs=argparse.REMAINDER)
@@ -62,8 +106,13 @@ def print_help():
     print()
     print(parser.description)
     print()
+    print('optional arguments:')
+    print('  -w, --watch\t\tkeep watching the project and run the affected tests whenever it changes')
+    print('  -k, --keyword\t\tonly run tests whose name contains the keyword')
+    print('  -t, --tag\t\tonly run tests with the given tag, as declared in project.yaml (can be repeated)')
+    print()
     print('positional arguments:')
-    print('  <files or dirs>\ta list of files or directories to test')
+    print('  <tests>\t\ttest files, test names, directories or glob patterns to test')
     print('  -- <test_args>\tanything after the -- will be passed as command line arguments to the tests')
 
 
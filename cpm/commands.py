@@ -0,0 +1,38 @@
+import importlib
+
+COMMANDS = {
+    'build': 'build the project for the given target (use \'default\' if none is given)',
+    'clean': 'clean all build files',
+    'create': 'create a new cpm project',
+    'daemon': 'keep a cpm server running in the background to speed up commands',
+    'init': 'initialize the current directory as a cpm project',
+    'install': 'install bits',
+    'prep': 'generate the CMakeLists.txt file for the given target (use \'default\' if none is given)',
+    'publish': 'publish the project',
+    'test': 'build and run the project tests',
+}
+
+
+class LazyCommand(object):
+    def __init__(self, name, description):
+        self.name = name
+        self.__description = description
+        self.__module = None
+
+    def module(self):
+        if self.__module is None:
+            self.__module = importlib.import_module(f'cpm.api.{self.name}')
+        return self.__module
+
+    def execute(self, argv):
+        return self.module().execute(argv)
+
+    def print_help(self):
+        return self.module().print_help()
+
+    def description(self):
+        return self.__description
+
+
+def available_commands():
+    return {name: LazyCommand(name, description) for name, description in COMMANDS.items()}
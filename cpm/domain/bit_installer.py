@@ -1,6 +1,7 @@
 import base64
 
 from cpm.infrastructure import filesystem
+from cpm.domain import bit_sources
 from cpm.domain.constants import bit_directory
 
 
@@ -14,3 +15,4 @@ class BitInstaller(object):
             filesystem.remove_directory(directory)
         filesystem.create_directory(directory)
         filesystem.unzips(base64.b64decode(bit_download.payload), directory)
+        bit_sources.write_manifest(directory)
@@ -0,0 +1,241 @@
+import operator
+from collections import deque
+
+from cpm.domain.constants import bit_directory
+from cpm.infrastructure import filesystem
+
+LATEST = 'latest'
+ROOT = '<project>'
+BUILD = 'build'
+TEST = 'test'
+COMPARISONS = {
+    '>=': operator.ge,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+}
+RANGE_PREFIXES = tuple(COMPARISONS) + ('^', '~')
+
+
+class BitNode(object):
+    def __init__(self, name, version, descriptor, declared_bit):
+        self.name = name
+        self.version = version
+        self.descriptor = descriptor
+        self.declared_bit = declared_bit
+        self.requirements = []
+        self.dependencies = []
+
+
+class Resolution(object):
+    def __init__(self):
+        self.nodes = {}
+        self.order = []
+        self.roots = {BUILD: [], TEST: []}
+        self.missing = []
+
+    def bits(self, scope):
+        build_bits = self.reachable_from(self.roots[BUILD])
+        if scope == BUILD:
+            selected = build_bits
+        else:
+            selected = self.reachable_from(self.roots[TEST]) - build_bits
+        return {name: self.nodes[name].descriptor for name in self.order if name in selected}
+
+    def missing_names(self):
+        return {declared_bit.name for declared_bit in self.missing}
+
+    def reachable_from(self, names):
+        reachable = set()
+        pending = [name for name in names if name in self.nodes]
+        while pending:
+            name = pending.pop()
+            if name not in reachable:
+                reachable.add(name)
+                pending.extend(dependency for dependency in self.nodes[name].dependencies if dependency in self.nodes)
+        return reachable
+
+
+class BitResolver(object):
+    def __init__(self, descriptor_repository=None, fetch_bit=None):
+        if descriptor_repository is None:
+            from cpm.domain.project.descriptor_repository import shared_repository
+            descriptor_repository = shared_repository
+        self.descriptor_repository = descriptor_repository
+        self.fetch_bit = fetch_bit
+
+    def resolve(self, project_descriptor):
+        known_requirements = {}
+        while True:
+            try:
+                return self.resolve_with(project_descriptor, known_requirements)
+            except UnsatisfiedRequirement as unsatisfied:
+                known_requirements.setdefault(unsatisfied.name, []).append(unsatisfied.requirement)
+
+    def resolve_with(self, project_descriptor, known_requirements):
+        resolution = Resolution()
+        pending = deque()
+        for scope, declared_bits in ((BUILD, project_descriptor.build.declared_bits), (TEST, project_descriptor.test.declared_bits)):
+            for declared_bit in declared_bits:
+                resolution.roots[scope].append(declared_bit.name)
+                pending.append((ROOT, declared_bit))
+        while pending:
+            required_by, declared_bit = pending.popleft()
+            node = resolution.nodes.get(declared_bit.name)
+            if node is None:
+                if declared_bit.name in resolution.missing_names():
+                    continue
+                node = self.node_for(declared_bit, [(required_by, declared_bit.version)] + known_requirements.get(declared_bit.name, []))
+                if node is None:
+                    resolution.missing.append(declared_bit)
+                    continue
+                resolution.nodes[node.name] = node
+                pending.extend((node.name, dependency) for dependency in node.descriptor.build.declared_bits)
+            elif not satisfies(node.version, declared_bit.version):
+                raise UnsatisfiedRequirement(node.name, (required_by, declared_bit.version))
+            node.requirements.append((required_by, declared_bit.version))
+            if required_by != ROOT:
+                resolution.nodes[required_by].dependencies.append(node.name)
+        resolution.order = topological_order(resolution.nodes)
+        return resolution
+
+    def node_for(self, declared_bit, requirements):
+        from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound
+        constraint = combined_constraint([version for _, version in requirements])
+        if self.fetch_bit is not None:
+            version = self.fetch_bit(declared_bit.name, constraint)
+        elif is_range(constraint):
+            version = installed_version(declared_bit.name, constraint)
+        else:
+            version = constraint
+        if version is None:
+            return None
+        if not all(satisfies(version, required_version) for _, required_version in requirements):
+            raise BitConflict(declared_bit.name, requirements + ([('the bits repository', version)] if is_range(constraint) else []))
+        try:
+            descriptor = self.descriptor_repository.descriptor(bit_directory(declared_bit.name, version))
+        except ProjectDescriptorNotFound:
+            return None
+        descriptor.declared_bit = declared_bit
+        return BitNode(declared_bit.name, version, descriptor, declared_bit)
+
+
+def installed_version(name, constraint):
+    if not is_range(constraint):
+        return constraint if filesystem.directory_exists(bit_directory(name, constraint)) else None
+    candidates = [version for version in filesystem.list_directories(f'bits/{name}') if satisfies(version, constraint)]
+    return max(candidates, key=parse_version) if candidates else None
+
+
+def combined_constraint(constraints):
+    exact_versions = [constraint for constraint in constraints if not is_range(constraint)]
+    if exact_versions:
+        return exact_versions[0]
+    return ', '.join(constraint for constraint in constraints if constraint != LATEST) or LATEST
+
+
+def topological_order(nodes):
+    order = []
+    visited = set()
+    for name in nodes:
+        if name in visited:
+            continue
+        path = [name]
+        stack = [iter(nodes[name].dependencies)]
+        visited.add(name)
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                stack.pop()
+                order.append(path.pop())
+            elif dependency in path:
+                raise BitCycle(path[path.index(dependency):] + [dependency])
+            elif dependency not in visited:
+                visited.add(dependency)
+                path.append(dependency)
+                stack.append(iter(nodes[dependency].dependencies))
+    return order
+
+
+def is_range(constraint):
+    return constraint == LATEST or constraint.startswith(RANGE_PREFIXES) or ',' in constraint
+
+
+def satisfies(version, constraint):
+    if constraint == LATEST:
+        return True
+    if not is_range(constraint):
+        return same_version(version, constraint)
+    parsed_version = parse_version(version)
+    if parsed_version is None:
+        return False
+    return all(satisfies_clause(parsed_version, clause.strip()) for clause in constraint.split(','))
+
+
+def satisfies_clause(version, clause):
+    if clause.startswith('^'):
+        lower = required_version(clause, clause[1:])
+        upper = lower.bump_major() if lower.major else lower.bump_minor() if lower.minor else lower.bump_patch()
+        return lower <= version < upper
+    if clause.startswith('~'):
+        lower = required_version(clause, clause[1:])
+        return lower <= version < lower.bump_minor()
+    comparison = clause[:2] if clause[:2] in COMPARISONS else clause[:1]
+    if comparison not in COMPARISONS:
+        raise InvalidVersionConstraint(clause)
+    return COMPARISONS[comparison](version.compare(required_version(clause, clause[len(comparison):])), 0)
+
+
+def required_version(clause, version):
+    parsed_version = parse_version(version.strip())
+    if parsed_version is None:
+        raise InvalidVersionConstraint(clause)
+    return parsed_version
+
+
+def same_version(version, other):
+    parsed_version = parse_version(version)
+    parsed_other = parse_version(other)
+    if parsed_version is None or parsed_other is None:
+        return version == other
+    return parsed_version == parsed_other
+
+
+def parse_version(version):
+    import semver
+    try:
+        return semver.Version.parse(version, optional_minor_and_patch=True)
+    except (ValueError, TypeError):
+        return None
+
+
+class BitResolutionError(RuntimeError):
+    pass
+
+
+class BitConflict(BitResolutionError):
+    def __init__(self, name, requirements):
+        self.name = name
+        self.requirements = requirements
+        super().__init__(f'conflicting versions of bit {name} required: ' +
+                         ', '.join(f'{version} by {required_by}' for required_by, version in requirements))
+
+
+class BitCycle(BitResolutionError):
+    def __init__(self, cycle):
+        self.cycle = cycle
+        super().__init__(f'bit dependency cycle {" -> ".join(cycle)}')
+
+
+class InvalidVersionConstraint(BitResolutionError):
+    def __init__(self, constraint):
+        self.constraint = constraint
+        super().__init__(f'invalid version constraint {constraint}')
+
+
+class UnsatisfiedRequirement(RuntimeError):
+    def __init__(self, name, requirement):
+        self.name = name
+        self.requirement = requirement
@@ -0,0 +1,56 @@
+import json
+import os
+
+from cpm.domain import constants
+from cpm.infrastructure import filesystem
+from cpm.infrastructure import source_index
+
+MANIFEST_FILE = '.cpm_sources.json'
+MANIFEST_VERSION = 1
+
+_manifests = {}
+
+
+def write_manifest(bit_directory):
+    files = source_index.SourceIndex().files(bit_directory)
+    sources = [os.path.relpath(file_name, bit_directory) for file_name in source_index.matching(files, constants.SOURCE_PATTERNS)]
+    filesystem.write_file(f'{bit_directory}/{MANIFEST_FILE}', json.dumps({'version': MANIFEST_VERSION, 'sources': sources}))
+
+
+def package_sources(bit_directory, package_path):
+    sources_by_directory = _manifest_sources_by_directory(bit_directory)
+    if sources_by_directory is None:
+        return None
+    relative_path = os.path.relpath(package_path, bit_directory)
+    directory = '' if relative_path == '.' else relative_path
+    return [f'{bit_directory}/{source}' for source in sources_by_directory.get(directory, [])]
+
+
+def _manifest_sources_by_directory(bit_directory):
+    manifest_file = os.path.abspath(f'{bit_directory}/{MANIFEST_FILE}')
+    try:
+        modification_time = os.stat(manifest_file).st_mtime_ns
+    except OSError:
+        return None
+    cached = _manifests.get(manifest_file)
+    if cached is None or cached[0] != modification_time:
+        try:
+            manifest = json.loads(filesystem.read_file(manifest_file))
+        except ValueError:
+            return None
+        if manifest.get('version') != MANIFEST_VERSION:
+            return None
+        cached = (modification_time, _sources_by_directory(manifest['sources']))
+        _manifests[manifest_file] = cached
+    return cached[1]
+
+
+def _sources_by_directory(sources):
+    sources_by_directory = {}
+    for source in sources:
+        directory = os.path.dirname(source)
+        while directory:
+            sources_by_directory.setdefault(directory, []).append(source)
+            directory = os.path.dirname(directory)
+        sources_by_directory.setdefault('', []).append(source)
+    return sources_by_directory
@@ -1,42 +1,78 @@
+import io
+
+from cpm.domain.constants import CMAKELISTS, OBJECTS_LINK_MODE, STATIC_LINK_MODE, SHARED_LINK_MODE
+from cpm.infrastructure import filesystem, profiler
+
+TARGET = 'TARGET'
+TEST = 'TEST'
+INCLUDE_DIRECTORIES = 'CPM_INCLUDE_DIRECTORIES'
+LINK_GROUP_START = '$<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--start-group>'
+LINK_GROUP_END = '$<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--end-group>'
+LINK_ALL_SHARED_LIBRARIES = '$<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--no-as-needed>'
+
+
 class CMakeListsBuilder(object):
     def __init__(self):
-        self.contents = ''
+        self.reset()
+
+    def reset(self):
+        self.stream = io.StringIO()
         self.object_libraries = []
         self.test_object_libraries = []
+        self.include_directory_variables = {}
+        self.linkable_variables = {}
+
+    @property
+    def contents(self):
+        return self.stream.getvalue()
+
+    def emit(self, text):
+        self.stream.write(text)
 
     def build(self, project):
-        self.build_contents(project)
-        with open('CMakeLists.txt', 'w') as cmakelists_file:
-            cmakelists_file.write(self.contents)
+        with profiler.span('generate CMakeLists.txt', 'cmake') as span:
+            self.build_contents(project)
+            span['written'] = filesystem.write_file_if_changed(CMAKELISTS, self.contents)
 
     def build_contents(self, project):
-        self.minimum_required('3.13')
+        self.reset()
+        self.minimum_required(self.minimum_version(project))
         if project.target.toolchain_prefix:
             self.set_compilers(project.target.toolchain_prefix)
         self.project(project.name)
-        for package in self.bit_packages_with_sources(project.target):
-            self.object_libraries += self.build_package_recipe(package)
-        for package in self.target_packages_with_sources(project.target):
-            self.object_libraries += self.build_package_recipe(package)
+        if project.target.compiler_cache:
+            self.set_compiler_launcher(project.target.compiler_cache)
+        if SHARED_LINK_MODE in (project.target.link_mode, project.test.link_mode):
+            self.set_position_independent_code()
+        target_packages = self.build_packages_recipes(
+            self.bit_packages_with_sources(project.target) + self.target_packages_with_sources(project.target)
+        )
+        self.object_libraries = [library for _, objects in target_packages for library in objects]
+        target_objects, target_libraries = self.linkables(TARGET, target_packages, project.target.link_mode)
         self.link_libraries(project.target.libraries)
         self.add_executable(
             project.name,
             [project.target.main],
-            self.object_libraries
+            target_objects
         )
+        self.link_package_libraries(project.name, target_libraries, project.target.link_mode, project.target.libraries)
         self.set_target_properties(project.name, 'COMPILE_FLAGS', self.main_compile_flags(project, project.target.main))
         self.target_link_options(project.name, project.target.ldflags)
         self.include_directories(project.target.include_directories)
-        for package in self.test_packages_with_sources(project.test):
-            self.test_object_libraries += self.build_package_recipe(package)
-        for package in self.bit_packages_with_sources(project.test):
-            self.test_object_libraries += self.build_package_recipe(package)
-        for test in project.test.test_suites:
+        test_packages = self.build_packages_recipes(
+            self.test_packages_with_sources(project.test) + self.bit_packages_with_sources(project.test)
+        )
+        self.test_object_libraries = [library for _, objects in test_packages for library in objects]
+        linked_target_objects, linked_target_libraries = self.linkables(TARGET, target_packages, project.test.link_mode)
+        test_objects, test_libraries = self.linkables(TEST, test_packages, project.test.link_mode)
+        precompiled_headers_target = None
+        for test in sorted(project.test.test_suites, key=lambda test_suite: test_suite.name):
             self.add_executable(
                 test.name,
                 [test.main],
-                self.object_libraries + self.test_object_libraries
+                linked_target_objects + test_objects
             )
+            self.link_package_libraries(test.name, test_libraries + linked_target_libraries, project.test.link_mode, project.target.libraries)
             self.set_target_properties(test.name, 'COMPILE_FLAGS', self.test_main_compile_flags(project, test.main))
             self.target_link_options(test.name, project.test.ldflags)
             self.target_include_directories(
@@ -45,10 +81,23 @@ class CMakeListsBuilder(object):
                     .union(test.include_directories)
             )
             self.target_link_libraries(test.name, project.test.libraries + test.libraries)
+            if project.test.precompiled_headers and test.main.endswith('.cpp'):
+                if precompiled_headers_target is None:
+                    precompiled_headers_target = test.name
+                    self.target_precompile_headers(test.name, project.test.precompiled_headers)
+                else:
+                    self.reuse_precompiled_headers(test.name, precompiled_headers_target)
         if project.test.test_suites:
-            self.add_custom_target('tests', 'echo ""', [test.name for test in project.test.test_suites])
+            self.add_custom_target('tests', 'echo ""', sorted(test.name for test in project.test.test_suites))
         return self.contents
 
+    def minimum_version(self, project):
+        packages = self.bit_packages_with_sources(project.target) + self.target_packages_with_sources(project.target) + \
+            self.test_packages_with_sources(project.test) + self.bit_packages_with_sources(project.test)
+        if project.test.precompiled_headers or any(package.unity_build or package.precompiled_headers for package in packages):
+            return '3.16'
+        return '3.13'
+
     def target_packages_with_sources(self, target):
         return [package for package in target.packages if package.sources]
 
@@ -58,6 +107,33 @@ class CMakeListsBuilder(object):
     def test_packages_with_sources(self, test):
         return [package for package in test.packages if package.sources]
 
+    def build_packages_recipes(self, packages):
+        return [(package, self.build_package_recipe(package)) for package in packages]
+
+    def linkables(self, scope, packages, link_mode):
+        if (scope, link_mode) not in self.linkable_variables:
+            if link_mode == OBJECTS_LINK_MODE:
+                objects = [library for _, package_objects in packages for library in package_objects]
+                self.linkable_variables[scope, link_mode] = (self.set_variable(f'CPM_{scope}_OBJECTS', objects), [])
+            else:
+                libraries = [self.add_package_library(package, objects, link_mode) for package, objects in packages if objects]
+                self.linkable_variables[scope, link_mode] = ([], self.set_variable(f'CPM_{scope}_{link_mode.upper()}_LIBRARIES', libraries))
+        return self.linkable_variables[scope, link_mode]
+
+    def add_package_library(self, package, objects, link_mode):
+        library_name = f'{package.path.replace("/", "_")}_{link_mode}_library'
+        self.emit(f'add_library({library_name} {link_mode.upper()} {" ".join(objects)})\n')
+        return library_name
+
+    def link_package_libraries(self, target, libraries, link_mode, system_libraries):
+        if not libraries:
+            return
+        if link_mode == STATIC_LINK_MODE:
+            libraries = [LINK_GROUP_START] + libraries + [LINK_GROUP_END]
+        elif link_mode == SHARED_LINK_MODE:
+            libraries = [LINK_ALL_SHARED_LIBRARIES] + libraries
+        self.target_link_libraries(target, libraries + system_libraries)
+
     def build_package_recipe(self, package):
         package_c_library_name = self.object_library_name(package.path + '_c')
         package_cpp_library_name = self.object_library_name(package.path + '_cpp')
@@ -65,40 +141,58 @@ class CMakeListsBuilder(object):
                self.build_package_library_recipe(package, package_cpp_library_name, package.cppflags, '.cpp')
 
     def build_package_library_recipe(self, package, package_library_name, compile_flags, extension):
-        sources = list(filter(lambda s: s.endswith(extension), package.sources))
+        sources = sorted(filter(lambda s: s.endswith(extension), package.sources))
         if not sources:
             return []
         self.add_object_library(package_library_name, sources)
         self.set_target_properties(package_library_name, 'COMPILE_FLAGS', compile_flags)
-        self.target_include_directories(package_library_name, package.include_directories)
+        self.set_unity_build(package_library_name, package.unity_build)
+        if extension == '.cpp':
+            self.target_precompile_headers(package_library_name, package.precompiled_headers)
+        self.target_include_directories(package_library_name, self.include_directories_variable(package.include_directories))
         return [f'$<TARGET_OBJECTS:{package_library_name}>']
 
+    def include_directories_variable(self, directories):
+        if not directories:
+            return []
+        directories = frozenset(directories)
+        if directories not in self.include_directory_variables:
+            name = f'{INCLUDE_DIRECTORIES}_{len(self.include_directory_variables)}'
+            self.include_directory_variables[directories] = self.set_variable(name, sorted(directories))
+        return self.include_directory_variables[directories]
+
     def object_library_name(self, package_path):
         return f'{package_path.replace("/", "_")}_object_library'
 
     def minimum_required(self, version):
-        self.contents += f'cmake_minimum_required (VERSION {version})\n'
+        self.emit(f'cmake_minimum_required (VERSION {version})\n')
 
     def project(self, name):
-        self.contents += f'project({name})\n'
+        self.emit(f'project({name})\n')
 
     def include_directories(self, directories):
-        self.contents += f'include_directories({" ".join(sorted(directories))})\n'
+        self.emit(f'include_directories({" ".join(sorted(directories))})\n')
 
     def set_source_files_properties(self, sources, property, values):
-        self.contents += f'set_source_files_properties({" ".join(sources)} PROPERTIES {property} "{" ".join(values)}")\n'
+        self.emit(f'set_source_files_properties({" ".join(sources)} PROPERTIES {property} "{" ".join(values)}")\n')
 
     def add_object_library(self, name, sources):
-        self.contents += f'add_library({name} OBJECT {" ".join(sources)})\n'
+        self.emit(f'add_library({name} OBJECT {" ".join(sources)})\n')
 
     def add_static_library(self, name, sources):
-        self.contents += f'add_library({name} STATIC {" ".join(sources)})\n'
+        self.emit(f'add_library({name} STATIC {" ".join(sources)})\n')
 
     def add_executable(self, name, sources, object_libraries=[]):
-        self.contents += f'add_executable({name} {" ".join(sources)}'
-        for library in object_libraries:
-            self.contents += f' {library}'
-        self.contents += ')\n'
+        self.emit(f'add_executable({" ".join([name] + sources + object_libraries)})\n')
+
+    def set_variable(self, name, values):
+        if not values:
+            return []
+        self.emit(f'set({name}\n')
+        for value in values:
+            self.emit(f'    {value}\n')
+        self.emit(')\n')
+        return [f'${{{name}}}']
 
     def main_compile_flags(self, project, main_filename):
         if main_filename.endswith('.c'):
@@ -116,38 +210,60 @@ class CMakeListsBuilder(object):
 
     def set_target_properties(self, target, property, values):
         if values:
-            self.contents += f'set_target_properties({target} PROPERTIES {property} "{" ".join(values)}")\n'
+            self.emit(f'set_target_properties({target} PROPERTIES {property} "{" ".join(values)}")\n')
+
+    def set_unity_build(self, target, batch_size):
+        if batch_size:
+            self.emit(f'set_target_properties({target} PROPERTIES UNITY_BUILD ON UNITY_BUILD_BATCH_SIZE {batch_size})\n')
+
+    def target_precompile_headers(self, target, headers):
+        if headers:
+            self.emit(f'target_precompile_headers({target} PRIVATE {" ".join(precompiled_header(header) for header in headers)})\n')
+
+    def reuse_precompiled_headers(self, target, other_target):
+        self.emit(f'target_precompile_headers({target} REUSE_FROM {other_target})\n')
 
     def target_link_options(self, target, values):
         if values:
-            self.contents += f'target_link_options({target} PUBLIC "{" ".join(values)}")\n'
+            self.emit(f'target_link_options({target} PUBLIC "{" ".join(values)}")\n')
 
     def target_link_libraries(self, target, libraries):
         if libraries:
-            self.contents += f'target_link_libraries({target} {" ".join(libraries)})\n'
+            self.emit(f'target_link_libraries({target} {" ".join(libraries)})\n')
 
     def link_libraries(self, libraries):
         if libraries:
-            self.contents += f'link_libraries({" ".join(libraries)})\n'
+            self.emit(f'link_libraries({" ".join(libraries)})\n')
 
     def target_include_directories(self, target, directories):
         if directories:
-            self.contents += f'target_include_directories({target} PUBLIC {" ".join(sorted(directories))})\n'
+            self.emit(f'target_include_directories({target} PUBLIC {" ".join(sorted(directories))})\n')
 
     def add_custom_target(self, target, command, depends):
-        self.contents += f'add_custom_target({target}\n' \
-                         f'    COMMAND {command}\n' \
-                         f'    DEPENDS {" ".join(depends)}\n' \
-                         f')\n'
+        self.emit(f'add_custom_target({target}\n'
+                  f'    COMMAND {command}\n'
+                  f'    DEPENDS {" ".join(depends)}\n'
+                  f')\n')
 
     def add_custom_command(self, target, when, command):
-        self.contents += f'add_custom_command(\n' \
-                         f'    TARGET {target}\n' \
-                         f'    {when}\n' \
-                         f'    COMMAND COMMAND {command}\n' \
-                         f')\n'
+        self.emit(f'add_custom_command(\n'
+                  f'    TARGET {target}\n'
+                  f'    {when}\n'
+                  f'    COMMAND COMMAND {command}\n'
+                  f')\n')
+
+    def set_position_independent_code(self):
+        self.emit('set(CMAKE_POSITION_INDEPENDENT_CODE ON)\n')
+
+    def set_compiler_launcher(self, launcher):
+        self.emit(f'set(CMAKE_C_COMPILER_LAUNCHER {launcher})\n')
+        self.emit(f'set(CMAKE_CXX_COMPILER_LAUNCHER {launcher})\n')
 
     def set_compilers(self, toolchain_prefix):
-        self.contents += f'set(CMAKE_C_COMPILER {toolchain_prefix}gcc)\n'
-        self.contents += f'set(CMAKE_CXX_COMPILER {toolchain_prefix}g++)\n'
-        self.contents += f'set(CMAKE_AR {toolchain_prefix}ar)\n'
+        self.emit(f'set(CMAKE_C_COMPILER {toolchain_prefix}gcc)\n')
+        self.emit(f'set(CMAKE_CXX_COMPILER {toolchain_prefix}g++)\n')
+        self.emit(f'set(CMAKE_AR {toolchain_prefix}ar)\n')
+
+
+def precompiled_header(header):
+    return f'"{header}"' if header.startswith('<') else header
@@ -1,10 +1,23 @@
 PROJECT_DESCRIPTOR_FILE = 'project.yaml'
 BUILD_DIRECTORY = 'build'
 CMAKELISTS = 'CMakeLists.txt'
+NINJA_FILE = 'build.ninja'
 CMAKE_COMMAND = 'cmake'
 NINJA_COMMAND = 'ninja'
 INITIAL_PROJECT_VERSION = '0.1.0'
 DEFAULT_TARGET = 'default'
+SOURCE_PATTERNS = ['*.cpp', '*.c']
+OBJECTS_LINK_MODE = 'objects'
+STATIC_LINK_MODE = 'static'
+SHARED_LINK_MODE = 'shared'
+LINK_MODES = [OBJECTS_LINK_MODE, STATIC_LINK_MODE, SHARED_LINK_MODE]
+DEFAULT_UNITY_BUILD_BATCH_SIZE = 8
+COMPILER_CACHE_DIRECTORY_VARIABLES = {'ccache': 'CCACHE_DIR', 'sccache': 'SCCACHE_DIR'}
+COMPILER_CACHES = list(COMPILER_CACHE_DIRECTORY_VARIABLES)
+CONTAINER_COMPILER_CACHE_DIRECTORY = '/cpm_compiler_cache'
+CMAKE_GENERATOR = 'cmake'
+NINJA_GENERATOR = 'ninja'
+GENERATORS = [CMAKE_GENERATOR, NINJA_GENERATOR]
 
 
 def bit_directory(name, version):
@@ -1,29 +1,44 @@
-from cpm.domain.project import project_descriptor_parser
+from cpm.domain.bit_resolver import BitResolver, LATEST, installed_version, is_range, satisfies
+from cpm.domain.project.descriptor_repository import shared_repository
 from cpm.infrastructure.cpm_hub_connector_v1 import BitNotFound
 from cpm.infrastructure.http_client import HttpConnectionError
 from cpm.domain.constants import bit_directory
+from cpm.infrastructure import events
 
 
 class InstallService(object):
-    def __init__(self, project_loader, bit_installer, cpm_hub_connector):
+    def __init__(self, project_loader, bit_installer, cpm_hub_connector, descriptor_repository=shared_repository):
         self.project_loader = project_loader
         self.cpm_hub_connector = cpm_hub_connector
         self.bit_installer = bit_installer
+        self.descriptor_repository = descriptor_repository
 
     def install(self, name, version):
         try:
-            if not self.__bit_already_installed(name, version):
-                bit_download = self.cpm_hub_connector.download_bit(name, version)
-                self.bit_installer.install(bit_download)
-                print(f'  {f"{name}:{version}": <20} {"✔": >20}')
+            installed = None if version == LATEST else installed_version(name, version)
+            if installed is not None and self.__bit_already_installed(name, installed):
+                events.emit('bit_cache', name=name, version=installed, hit=True)
+                return installed
+            events.emit('bit_cache', name=name, version=version, hit=False)
+            bit_download = self.cpm_hub_connector.download_bit(name, LATEST if is_range(version) else version)
+            if not satisfies(bit_download.version, version):
+                events.emit('bit_not_found', name=name, version=version, latest=bit_download.version)
+                print(f'  {f"{name}:{version}": <20} {f"✖ latest version {bit_download.version} in bits repository does not satisfy {version}": >20}')
+                return None
+            self.bit_installer.install(bit_download)
+            events.emit('bit_downloaded', name=name, version=bit_download.version, bytes=len(bit_download.payload))
+            print(f'  {f"{name}:{bit_download.version}": <20} {"✔": >20}')
+            return bit_download.version
         except BitNotFound:
+            events.emit('bit_not_found', name=name, version=version)
             print(f'  {f"{name}:{version}": <20} {f"✖ bit {name} not found in bits repository": >20}')
         except HttpConnectionError as error:
+            events.emit('bit_download_failed', name=name, version=version, error=str(error))
             print(f'  {f"{name}:{version}": <20} {f"✖ failed to connect to bits repository: {error}": >20}')
 
     def __bit_already_installed(self, name, version):
         try:
-            bit_description = project_descriptor_parser.parse_from(bit_directory(name, version))
+            bit_description = self.descriptor_repository.descriptor(bit_directory(name, version))
             return bit_description.version == version
         except:
             return False
@@ -35,14 +50,6 @@ class InstallService(object):
 
     def install_all(self, directory='.'):
         print(f'cpm: updating dependencies')
-        self.__install_recursively(directory)
-        project_descriptor = project_descriptor_parser.parse_from(directory)
-        for declared_bit in project_descriptor.test.declared_bits:
-            self.install(declared_bit.name, declared_bit.version)
+        project_descriptor = self.descriptor_repository.descriptor(directory)
+        BitResolver(self.descriptor_repository, fetch_bit=self.install).resolve(project_descriptor)
         print(f'cpm: everything up to date')
-
-    def __install_recursively(self, directory='.'):
-        project_descriptor = project_descriptor_parser.parse_from(directory)
-        for declared_bit in project_descriptor.build.declared_bits:
-            self.install(declared_bit.name, declared_bit.version)
-            self.__install_recursively(bit_directory(declared_bit.name, declared_bit.version))
@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+
+from cpm.domain.constants import BUILD_DIRECTORY, NINJA_FILE, STATIC_LINK_MODE, SHARED_LINK_MODE
+from cpm.infrastructure import filesystem, profiler
+
+SOURCE_DIRECTORY = '..'
+OBJECTS_DIRECTORY = 'objects'
+LIBRARIES_DIRECTORY = 'libraries'
+GNU_LINKER = sys.platform != 'darwin'
+RULES = '''rule cc
+  command = $launcher $cc -MD -MF $out.d $flags $includes -c $in -o $out
+  depfile = $out.d
+  deps = gcc
+  description = CC $out
+rule cxx
+  command = $launcher $cxx -MD -MF $out.d $flags $includes -c $in -o $out
+  depfile = $out.d
+  deps = gcc
+  description = CXX $out
+rule static
+  command = rm -f $out && $ar rcs $out $in
+  description = AR $out
+rule shared
+  command = $cxx -shared $soname -o $out $in
+  description = SHARED $out
+rule link
+  command = $cxx $ldflags -o $out $in $libs
+  description = LINK $out
+'''
+
+
+class NinjaFileBuilder(object):
+    def __init__(self):
+        self.stream = io.StringIO()
+        self.variables = {}
+        self.package_objects = {}
+        self.package_libraries = {}
+        self.include_variables = {}
+        self.project_include_directories = frozenset()
+
+    @property
+    def contents(self):
+        return self.stream.getvalue()
+
+    def emit(self, text):
+        self.stream.write(text)
+
+    def build(self, project):
+        with profiler.span('generate build.ninja', 'ninja') as span:
+            self.build_contents(project)
+            span['written'] = filesystem.write_file_if_changed(f'{BUILD_DIRECTORY}/{NINJA_FILE}', self.contents)
+
+    def build_contents(self, project):
+        self.emit('ninja_required_version = 1.5\n')
+        self.set_tools(project.target)
+        self.emit(RULES)
+        position_independent = SHARED_LINK_MODE in (project.target.link_mode, project.test.link_mode)
+        self.project_include_directories = frozenset(project.target.include_directories)
+        target_packages = self.build_packages(
+            self.bit_packages_with_sources(project.target) + self.packages_with_sources(project.target), position_independent
+        )
+        target_objects, target_libraries = self.linkables(target_packages, project.target.link_mode)
+        main_objects = self.build_main(project.target.main, self.main_compile_flags(project, project.target.main), project.target.include_directories)
+        self.link(
+            project.name,
+            main_objects + target_objects,
+            target_libraries,
+            project.target.link_mode,
+            project.target.ldflags,
+            project.target.libraries
+        )
+        test_packages = self.build_packages(
+            self.packages_with_sources(project.test) + self.bit_packages_with_sources(project.test), position_independent
+        )
+        linked_target_objects, linked_target_libraries = self.linkables(target_packages, project.test.link_mode)
+        test_objects, test_libraries = self.linkables(test_packages, project.test.link_mode)
+        for test in sorted(project.test.test_suites, key=lambda test_suite: test_suite.name):
+            suite_objects = self.build_main(
+                test.main,
+                self.test_main_compile_flags(project, test.main),
+                project.target.include_directories | project.test.include_directories | test.include_directories
+            )
+            self.link(
+                test.name,
+                suite_objects + linked_target_objects + test_objects,
+                test_libraries + linked_target_libraries,
+                project.test.link_mode,
+                project.test.ldflags,
+                project.target.libraries + project.test.libraries + test.libraries
+            )
+        if project.test.test_suites:
+            self.emit(f'build tests: phony {" ".join(sorted(test.name for test in project.test.test_suites))}\n')
+        self.emit(f'default {project.name}\n')
+        return self.contents
+
+    def set_tools(self, target):
+        prefix = target.toolchain_prefix
+        self.emit(f'cc = {prefix + "gcc" if prefix else "cc"}\n')
+        self.emit(f'cxx = {prefix + "g++" if prefix else "c++"}\n')
+        self.emit(f'ar = {prefix}ar\n')
+        self.emit(f'launcher = {target.compiler_cache}\n')
+
+    def packages_with_sources(self, target):
+        return [package for package in target.packages if package.sources]
+
+    def bit_packages_with_sources(self, target):
+        return [package for bit in target.bits for package in bit.packages if package.sources]
+
+    def build_packages(self, packages, position_independent):
+        return [(package, self.build_package(package, position_independent)) for package in packages]
+
+    def build_package(self, package, position_independent):
+        if package.path not in self.package_objects:
+            pic = ['-fPIC'] if position_independent else []
+            includes = self.package_includes(package.include_directories)
+            self.package_objects[package.path] = \
+                self.compile_sources(package.sources, '.c', 'cc', self.variable('cflags', pic + list(package.cflags)), includes) + \
+                self.compile_sources(package.sources, '.cpp', 'cxx', self.variable('cppflags', pic + list(package.cppflags)), includes)
+        return self.package_objects[package.path]
+
+    def package_includes(self, include_directories):
+        if include_directories not in self.include_variables:
+            self.include_variables[include_directories] = \
+                self.variable('includes', include_flags(self.project_include_directories | include_directories))
+        return self.include_variables[include_directories]
+
+    def compile_sources(self, sources, extension, rule, flags, includes):
+        objects = []
+        for source in sorted(filter(lambda s: s.endswith(extension), sources)):
+            objects.append(self.compile(source, rule, flags, includes))
+        return objects
+
+    def compile(self, source, rule, flags, includes):
+        object_file = f'{OBJECTS_DIRECTORY}/{source}.o'
+        self.emit(f'build {escape_path(object_file)}: {rule} {escape_path(source_path(source))}\n')
+        if flags:
+            self.emit(f'  flags = {flags}\n')
+        if includes:
+            self.emit(f'  includes = {includes}\n')
+        return object_file
+
+    def build_main(self, main, flags, include_directories):
+        if not main:
+            return []
+        rule = 'cc' if main.endswith('.c') else 'cxx'
+        return [self.compile(main, rule, escape(' '.join(flags)), self.variable('includes', include_flags(include_directories)))]
+
+    def variable(self, prefix, values):
+        if not values:
+            return ''
+        value = escape(' '.join(values))
+        if value not in self.variables:
+            name = f'{prefix}_{len(self.variables)}'
+            self.emit(f'{name} = {value}\n')
+            self.variables[value] = f'${name}'
+        return self.variables[value]
+
+    def linkables(self, packages, link_mode):
+        if link_mode not in (STATIC_LINK_MODE, SHARED_LINK_MODE):
+            return [object_file for _, objects in packages for object_file in objects], []
+        return [], [self.package_library(package, objects, link_mode) for package, objects in packages if objects]
+
+    def package_library(self, package, objects, link_mode):
+        if (package.path, link_mode) not in self.package_libraries:
+            extension = 'a' if link_mode == STATIC_LINK_MODE else 'so'
+            library = f'{LIBRARIES_DIRECTORY}/lib{package.path.replace("/", "_")}.{extension}'
+            self.emit(f'build {escape_path(library)}: {link_mode} {" ".join(map(escape_path, objects))}\n')
+            if link_mode == SHARED_LINK_MODE:
+                self.emit(f'  soname = {soname_flag(os.path.basename(library))}\n')
+            self.package_libraries[package.path, link_mode] = library
+        return self.package_libraries[package.path, link_mode]
+
+    def link(self, executable, objects, libraries, link_mode, ldflags, system_libraries):
+        implicit = f' | {" ".join(map(escape_path, libraries))}' if libraries else ''
+        self.emit(f'build {escape_path(executable)}: link {" ".join(map(escape_path, objects))}{implicit}\n')
+        if ldflags:
+            self.emit(f'  ldflags = {escape(" ".join(ldflags))}\n')
+        libs = link_package_libraries(libraries, link_mode) + [library_flag(library) for library in system_libraries]
+        if libs:
+            self.emit(f'  libs = {escape(" ".join(libs))}\n')
+
+    def main_compile_flags(self, project, main_filename):
+        if main_filename.endswith('.c'):
+            return project.target.cflags
+        elif main_filename.endswith('.cpp'):
+            return project.target.cppflags
+        return []
+
+    def test_main_compile_flags(self, project, main_filename):
+        if main_filename.endswith('.c'):
+            return project.target.cflags + project.test.cflags
+        elif main_filename.endswith('.cpp'):
+            return project.target.cppflags + project.test.cppflags
+        return []
+
+
+def link_package_libraries(libraries, link_mode):
+    if not libraries:
+        return []
+    if link_mode == STATIC_LINK_MODE and GNU_LINKER:
+        return ['-Wl,--start-group'] + libraries + ['-Wl,--end-group']
+    if link_mode == SHARED_LINK_MODE:
+        link_all = ['-Wl,--no-as-needed'] if GNU_LINKER else []
+        origin = '$ORIGIN' if GNU_LINKER else '@loader_path'
+        return link_all + libraries + [f"-Wl,-rpath,'{origin}/{LIBRARIES_DIRECTORY}'"]
+    return libraries
+
+
+def soname_flag(library):
+    return f'-Wl,-soname,{library}' if GNU_LINKER else f'-Wl,-install_name,@rpath/{library}'
+
+
+def library_flag(library):
+    if library.startswith('-') or '/' in library or library.endswith(('.a', '.so')):
+        return library
+    return f'-l{library}'
+
+
+def include_flags(directories):
+    return [f'-I{source_path(directory)}' for directory in sorted(directories)]
+
+
+def source_path(path):
+    return os.path.normpath(path if os.path.isabs(path) else os.path.join(SOURCE_DIRECTORY, path))
+
+
+def escape(value):
+    return value.replace('$', '$$')
+
+
+def escape_path(path):
+    return escape(path).replace(' ', '$ ').replace(':', '$:')
@@ -0,0 +1,45 @@
+import os
+
+from cpm.domain.project import project_descriptor_parser
+
+
+class DescriptorRepository(object):
+    def __init__(self):
+        self.entries = {}
+
+    def descriptor(self, directory):
+        descriptor_file = os.path.abspath(project_descriptor_parser.project_yaml_file(directory))
+        entry = self.entries.get(descriptor_file)
+        if entry is not None and entry.is_up_to_date():
+            return entry.project_descriptor
+        project_descriptor = project_descriptor_parser.parse_from(directory)
+        files = [descriptor_file] + [os.path.abspath(f) for f in project_descriptor.included_files()]
+        self.entries[descriptor_file] = RepositoryEntry(project_descriptor, files, _stamp(files))
+        return project_descriptor
+
+    def forget(self, directory):
+        self.entries.pop(os.path.abspath(project_descriptor_parser.project_yaml_file(directory)), None)
+
+
+class RepositoryEntry(object):
+    def __init__(self, project_descriptor, files, stamp):
+        self.project_descriptor = project_descriptor
+        self.files = files
+        self.stamp = stamp
+
+    def is_up_to_date(self):
+        return _stamp(self.files) == self.stamp
+
+
+def _stamp(files):
+    stamp = []
+    for file_name in files:
+        try:
+            stat = os.stat(file_name)
+            stamp.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            stamp.append(None)
+    return stamp
+
+
+shared_repository = DescriptorRepository()
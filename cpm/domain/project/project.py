@@ -1,19 +1,22 @@
-from dataclasses import dataclass, field
+from dataclasses import field
 
-from cpm.domain.project.project_descriptor import ProjectDescriptor
+from cpm.domain.constants import OBJECTS_LINK_MODE, CMAKE_GENERATOR
+from cpm.domain.project.project_descriptor import ProjectDescriptor, compact
 
 
-@dataclass
+@compact
 class Package:
     path: str
-    sources: list = field(default_factory=list)
-    cflags: list = field(default_factory=list)
-    cppflags: list = field(default_factory=list)
-    ldflags: list = field(default_factory=list)
-    include_directories: set = field(default_factory=set)
+    sources: tuple = ()
+    cflags: tuple = ()
+    cppflags: tuple = ()
+    ldflags: tuple = ()
+    include_directories: frozenset = frozenset()
+    unity_build: int = 0
+    precompiled_headers: tuple = ()
 
 
-@dataclass
+@compact
 class Target:
     name: str = 'default'
     executable: str = ''
@@ -21,7 +24,11 @@ class Target:
     image: str = ''
     dockerfile: str = ''
     test_image: str = ''
+    test_dockerfile: str = ''
     toolchain_prefix: str = ''
+    compiler_cache: str = ''
+    compiler_cache_directory: str = ''
+    generator: str = CMAKE_GENERATOR
     post_build: list = field(default_factory=list)
     packages: list = field(default_factory=list)
     include_directories: set = field(default_factory=set)
@@ -30,12 +37,16 @@ class Target:
     ldflags: list = field(default_factory=list)
     libraries: list = field(default_factory=list)
     bits: list = field(default_factory=list)
+    link_mode: str = OBJECTS_LINK_MODE
+    unity_build: int = 0
+    precompiled_headers: tuple = ()
 
 
-@dataclass
+@compact
 class TestSuite:
     name: str
     main: str
+    tags: frozenset = frozenset()
     packages: list = field(default_factory=list)
     include_directories: set = field(default_factory=set)
     cflags: list = field(default_factory=list)
@@ -44,7 +55,7 @@ class TestSuite:
     libraries: list = field(default_factory=list)
 
 
-@dataclass
+@compact
 class Test:
     test_suites: list = field(default_factory=list)
     packages: list = field(default_factory=list)
@@ -54,15 +65,18 @@ class Test:
     ldflags: list = field(default_factory=list)
     libraries: list = field(default_factory=list)
     bits: list = field(default_factory=list)
+    link_mode: str = OBJECTS_LINK_MODE
+    unity_build: int = 0
+    precompiled_headers: tuple = ()
 
 
-@dataclass
+@compact
 class Project:
     name: str = ''
     version: str = '0.1'
     description: str = ''
     descriptor: ProjectDescriptor = field(default_factory=ProjectDescriptor)
-    target: Target = field(default_factory=Test)
+    target: Target = field(default_factory=Target)
     test: Test = field(default_factory=Test)
     declared_bits: list = field(default_factory=list)
     actions: list = field(default_factory=list)
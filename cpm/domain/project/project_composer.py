@@ -1,25 +1,38 @@
-from cpm.domain.constants import DEFAULT_TARGET
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from cpm.domain import bit_sources, test_index
+from cpm.domain.constants import DEFAULT_TARGET, SOURCE_PATTERNS, OBJECTS_LINK_MODE, CMAKE_GENERATOR
 from cpm.domain.constants import bit_directory
-from cpm.infrastructure import filesystem
+from cpm.infrastructure import filesystem, profiler, source_index
 from cpm.domain.project.project_descriptor import TargetDescription
 from cpm.domain.project.project import Project, Target, Package, TestSuite
 
+PARALLEL_SCAN_THRESHOLD = 32
+SCAN_WORKERS = 8
+
+_interned_flags = {}
+
 
+@profiler.profiled('compose project', 'descriptor')
 def compose(project_descriptor, target_name):
     if target_name not in project_descriptor.targets:
         raise TargetNotDescribed()
+    _interned_flags.clear()
     project = Project(
         project_descriptor.name,
         version=project_descriptor.version,
         description=project_descriptor.description,
         descriptor=project_descriptor
     )
-    project.target = compose_target(target_name, project_descriptor)
-    compose_tests(target_name, project_descriptor, project)
+    sources = scan_package_sources(package_locations(project_descriptor, target_name))
+    project.target = compose_target(target_name, project_descriptor, sources=sources)
+    compose_tests(target_name, project_descriptor, project, sources)
+    source_index.save()
     return project
 
 
-def compose_target(target_name, project_descriptor):
+def compose_target(target_name, project_descriptor, base_path='', sources=None):
     target = Target(target_name)
     target_description = project_descriptor.targets.get(target_name, TargetDescription(target_name))
     target.cflags = project_descriptor.build.cflags + target_description.build.cflags
@@ -34,17 +47,21 @@ def compose_target(target_name, project_descriptor):
     target.test_image = target_description.test_image
     target.test_dockerfile = target_description.test_dockerfile
     target.toolchain_prefix = target_description.toolchain_prefix
+    target.compiler_cache = target_description.compiler_cache
+    target.compiler_cache_directory = target_description.compiler_cache_directory
+    target.generator = target_description.generator or CMAKE_GENERATOR
     target.post_build = target_description.post_build
-    compose_packages(project_descriptor.build.packages, target)
-    compose_packages(target_description.build.packages, target)
-    for bit_description in project_descriptor.build.bits.values():
-        compose_bit(bit_description, target)
-    for bit_description in target_description.build.bits.values():
-        compose_bit(bit_description, target)
+    target.link_mode = target_description.build.link_mode or project_descriptor.build.link_mode or OBJECTS_LINK_MODE
+    target.unity_build = unity_build(target_description.build, project_descriptor.build)
+    target.precompiled_headers = precompiled_headers(project_descriptor.build.precompiled_headers + target_description.build.precompiled_headers, base_path)
+    compose_packages(project_descriptor.build.packages, target, base_path, sources)
+    compose_packages(target_description.build.packages, target, base_path, sources)
+    compose_bits(list(project_descriptor.build.bits.values()) + list(target_description.build.bits.values()), target, sources)
+    share_include_directories(target)
     return target
 
 
-def compose_tests(target_name, project_descriptor, project):
+def compose_tests(target_name, project_descriptor, project, sources=None):
     target_description = project_descriptor.targets.get(target_name, TargetDescription(target_name))
     project.test.cflags = project_descriptor.test.cflags + target_description.test.cflags
     project.test.cppflags = project_descriptor.test.cppflags + target_description.test.cppflags
@@ -52,39 +69,112 @@ def compose_tests(target_name, project_descriptor, project):
     project.test.libraries = project_descriptor.test.libraries + target_description.test.libraries
     project.test.include_directories.update(project_descriptor.test.includes)
     project.test.include_directories.update(target_description.test.includes)
-    compose_packages(project_descriptor.test.packages, project.test)
-    compose_packages(target_description.test.packages, project.test)
-
-    for bit_description in project_descriptor.test.bits.values():
-        compose_bit(bit_description, project.test)
-
-    for test_file in filesystem.find('tests', 'test_*.cpp'):
+    project.test.link_mode = target_description.test.link_mode or project_descriptor.test.link_mode or OBJECTS_LINK_MODE
+    project.test.unity_build = unity_build(target_description.test, project_descriptor.test)
+    project.test.precompiled_headers = precompiled_headers(project_descriptor.test.precompiled_headers + target_description.test.precompiled_headers)
+    compose_packages(project_descriptor.test.packages, project.test, sources=sources)
+    compose_packages(target_description.test.packages, project.test, sources=sources)
+    compose_bits(list(project_descriptor.test.bits.values()), project.test, sources)
+    share_include_directories(project.test)
+
+    tags = {**project_descriptor.test.tags, **target_description.test.tags}
+    for test_file in sorted(source_index.find('tests', ['test_*.cpp'])):
         name = test_file.split('/')[-1].split('.')[0]
         test_suite = TestSuite(name, test_file)
+        test_suite.tags = frozenset(tag for tag, patterns in tags.items() if any(test_index.matches(test_suite, pattern) for pattern in patterns))
         project.test.test_suites.append(test_suite)
 
 
-def compose_packages(packages, target):
+def compose_packages(packages, target, base_path='', sources=None):
     for package_description in packages:
-        package = Package(package_description.path)
-        package.sources = filesystem.find(package.path, '*.cpp') + filesystem.find(package.path, '*.c')
-        package.cflags = package_description.cflags + target.cflags
-        package.cppflags = package_description.cppflags + target.cppflags
+        package = Package(sys.intern(package_path(package_description, base_path)))
+        package.sources = scanned_sources(sources, package.path, base_path)
+        package.cflags = interned_flags(package_description.cflags, target.cflags)
+        package.cppflags = interned_flags(package_description.cppflags, target.cppflags)
+        package.unity_build = unity_build(package_description, target)
+        package.precompiled_headers = target.precompiled_headers + precompiled_headers(package_description.precompiled_headers, base_path)
         target.packages.append(package)
-        target.include_directories.add(package_include_directory(package_description))
-        package.include_directories = target.include_directories
-
-
-def compose_bit(bit_description, target):
-    adjust_bit_packages_base_path(bit_description, bit_description.build.packages)
-    add_packages_to_target_includes(bit_description.build.packages, target)
-    bit_target_name = get_bit_target_name(bit_description)
-    adjust_bit_packages_base_path(bit_description, bit_description.targets[bit_target_name].build.packages)
-    add_packages_to_target_includes(bit_description.targets[bit_target_name].build.packages, target)
-    bit_target = compose_target(bit_target_name, bit_description)
-    target.bits.append(bit_target)
+        target.include_directories.add(package_include_directory(package_description, base_path))
+
+
+def unity_build(*descriptions):
+    for description in descriptions:
+        if description.unity_build is not None:
+            return description.unity_build
+    return 0
+
+
+def precompiled_headers(headers, base_path=''):
+    return tuple(dict.fromkeys(header if header.startswith('<') or not base_path else f'{base_path}/{header}' for header in headers))
+
+
+def share_include_directories(target):
+    include_directories = frozenset(target.include_directories)
+    for package in target.packages:
+        package.include_directories = include_directories
+
+
+def interned_flags(*flag_lists):
+    flags = tuple(flag for flag_list in flag_lists for flag in flag_list)
+    return _interned_flags.setdefault(flags, flags)
+
+
+def package_sources(path, base_path=''):
+    sources = bit_sources.package_sources(base_path, path) if base_path else None
+    if sources is None:
+        sources = source_index.find(path, SOURCE_PATTERNS)
+    return tuple(sorted(map(sys.intern, sources)))
+
+
+def scanned_sources(sources, path, base_path=''):
+    if sources and path in sources:
+        return sources[path]
+    return package_sources(path, base_path)
+
+
+def package_locations(project_descriptor, target_name, base_path=''):
+    target_description = project_descriptor.targets.get(target_name, TargetDescription(target_name))
+    plans = [project_descriptor.build, target_description.build]
+    if not base_path:
+        plans += [project_descriptor.test, target_description.test]
+    locations = [(package_path(package, base_path), base_path) for plan in plans for package in plan.packages]
+    for plan in plans:
+        for bit_description in plan.bits.values():
+            bit_base_path = bit_directory(bit_description.name, bit_description.version)
+            locations += package_locations(bit_description, get_bit_target_name(bit_description), bit_base_path)
+    return locations
+
+
+def scan_package_sources(locations):
+    if len(locations) < PARALLEL_SCAN_THRESHOLD:
+        return {}
+    unique_locations = list(dict.fromkeys(locations))
+    scanned = parallel_map(lambda location: package_sources(*location), unique_locations)
+    return {path: sources for (path, _), sources in zip(unique_locations, scanned)}
+
+
+def parallel_map(function, items):
+    if len(items) < PARALLEL_SCAN_THRESHOLD:
+        return list(map(function, items))
+    with ThreadPoolExecutor(max_workers=SCAN_WORKERS) as executor:
+        return list(executor.map(function, items))
+
+
+def compose_bits(bit_descriptions, target, sources=None):
+    bit_targets = parallel_map(lambda bit_description: compose_bit_target(bit_description, sources), bit_descriptions)
+    for bit_description, bit_target in zip(bit_descriptions, bit_targets):
+        base_path = bit_directory(bit_description.name, bit_description.version)
+        add_packages_to_target_includes(bit_description.build.packages, target, base_path)
+        add_packages_to_target_includes(bit_description.targets[bit_target.name].build.packages, target, base_path)
+        target.bits.append(bit_target)
+
+
+def compose_bit_target(bit_description, sources=None):
+    base_path = bit_directory(bit_description.name, bit_description.version)
+    bit_target = compose_target(get_bit_target_name(bit_description), bit_description, base_path, sources)
     add_cflags_to_bit_packages(bit_target, bit_description.declared_bit.cflags)
     add_cppflags_to_bit_packages(bit_target, bit_description.declared_bit.cppflags)
+    return bit_target
 
 
 def get_bit_target_name(bit_description):
@@ -94,28 +184,27 @@ def get_bit_target_name(bit_description):
         return DEFAULT_TARGET
 
 
-def adjust_bit_packages_base_path(bit_description, packages):
-    for package_description in packages:
-        package_description.path = f'{bit_directory(bit_description.name, bit_description.version)}/{package_description.path}'
+def package_path(package_description, base_path=''):
+    return f'{base_path}/{package_description.path}' if base_path else package_description.path
 
 
-def add_packages_to_target_includes(packages, target):
+def add_packages_to_target_includes(packages, target, base_path=''):
     for package_description in packages:
-        target.include_directories.add(package_include_directory(package_description))
+        target.include_directories.add(package_include_directory(package_description, base_path))
 
 
-def package_include_directory(package_description):
-    return filesystem.parent_directory(package_description.path)
+def package_include_directory(package_description, base_path=''):
+    return sys.intern(filesystem.parent_directory(package_path(package_description, base_path)))
 
 
 def add_cflags_to_bit_packages(bit_target, cflags):
     for package in bit_target.packages:
-        package.cflags.extend(cflags)
+        package.cflags = interned_flags(package.cflags, cflags)
 
 
 def add_cppflags_to_bit_packages(bit_target, cppflags):
     for package in bit_target.packages:
-        package.cppflags.extend(cppflags)
+        package.cppflags = interned_flags(package.cppflags, cppflags)
 
 
 class TargetNotDescribed(RuntimeError):
@@ -1,7 +1,23 @@
-from dataclasses import dataclass, field
+import sys
+from dataclasses import dataclass, field, fields
 
 
-@dataclass
+def compact(cls):
+    if sys.version_info >= (3, 10):
+        return dataclass(slots=True)(cls)
+    return slotted(dataclass(cls))
+
+
+def slotted(cls):
+    field_names = tuple(f.name for f in fields(cls))
+    namespace = {name: value for name, value in cls.__dict__.items() if name not in field_names + ('__dict__', '__weakref__')}
+    namespace['__slots__'] = field_names
+    slotted_cls = type(cls)(cls.__name__, cls.__bases__, namespace)
+    slotted_cls.__qualname__ = cls.__qualname__
+    return slotted_cls
+
+
+@compact
 class DeclaredBit:
     name: str
     version: str
@@ -10,15 +26,17 @@ class DeclaredBit:
     cppflags: list = field(default_factory=list)
 
 
-@dataclass
+@compact
 class PackageDescription:
     path: str
     cflags: list = field(default_factory=list)
     cppflags: list = field(default_factory=list)
     sources: list = field(default_factory=list)
+    unity_build: int = None
+    precompiled_headers: list = field(default_factory=list)
 
 
-@dataclass
+@compact
 class CompilationPlan:
     declared_bits: list = field(default_factory=list)
     bits: dict = field(default_factory=dict)
@@ -28,6 +46,10 @@ class CompilationPlan:
     ldflags: list = field(default_factory=list)
     libraries: list = field(default_factory=list)
     includes: set = field(default_factory=set)
+    tags: dict = field(default_factory=dict)
+    link_mode: str = ''
+    unity_build: int = None
+    precompiled_headers: list = field(default_factory=list)
 
 
 @dataclass
@@ -50,6 +72,9 @@ class TargetDescription:
     test_image: str = ''
     test_dockerfile: str = ''
     toolchain_prefix: str = ''
+    compiler_cache: str = ''
+    compiler_cache_directory: str = ''
+    generator: str = ''
 
 
 @dataclass
@@ -64,9 +89,10 @@ class ProjectDescriptor:
     test: CompilationPlan = field(default_factory=CompilationPlan)
     declared_bit: DeclaredBit = None
     targets: dict = field(default_factory=dict)
+    included: list = field(default_factory=list)
 
     def build_packages(self):
         return self.build.packages + [package for target, description in self.targets.items() for package in description.build.packages]
 
     def included_files(self):
-        return [] if self.parser is None else self.parser.included_files()
+        return self.included
@@ -0,0 +1,55 @@
+import dataclasses
+import hashlib
+import os
+import pickle
+
+from cpm.domain import constants
+from cpm.infrastructure import events, filesystem
+
+CACHE_VERSION = 9
+CACHE_DIRECTORY = f'{constants.BUILD_DIRECTORY}/.cpm/descriptors'
+
+
+def load(descriptor_file):
+    if not filesystem.directory_exists(constants.BUILD_DIRECTORY):
+        return None
+    try:
+        with open(cache_file(descriptor_file), 'rb') as cache_stream:
+            version, fingerprints, project_descriptor = pickle.load(cache_stream)
+    except Exception:
+        events.emit('descriptor_cache', descriptor=descriptor_file, hit=False)
+        return None
+    hit = version == CACHE_VERSION and all(fingerprint(path) == expected for path, expected in fingerprints)
+    events.emit('descriptor_cache', descriptor=descriptor_file, hit=hit)
+    return project_descriptor if hit else None
+
+
+def save(descriptor_file, project_descriptor):
+    if not filesystem.directory_exists(constants.BUILD_DIRECTORY):
+        return
+    files = [descriptor_file] + [str(included_file) for included_file in project_descriptor.included_files()]
+    fingerprints = [(os.path.abspath(path), fingerprint(path)) for path in files]
+    cacheable_descriptor = dataclasses.replace(project_descriptor, parser=None, yaml_document=None)
+    file_name = cache_file(descriptor_file)
+    try:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        with open(f'{file_name}.{os.getpid()}', 'wb') as cache_stream:
+            pickle.dump((CACHE_VERSION, fingerprints, cacheable_descriptor), cache_stream, pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{file_name}.{os.getpid()}', file_name)
+    except (OSError, pickle.PicklingError):
+        pass
+
+
+def cache_file(descriptor_file):
+    key = hashlib.sha1(os.path.abspath(descriptor_file).encode()).hexdigest()
+    return f'{CACHE_DIRECTORY}/{key}.pickle'
+
+
+def fingerprint(path):
+    try:
+        stat = os.stat(path)
+        with open(path, 'rb') as stream:
+            digest = hashlib.sha256(stream.read()).hexdigest()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size, digest
@@ -2,11 +2,13 @@ from ruamel.yaml import YAML
 from ruamel.yaml.compat import StringIO
 
 from cpm.domain.constants import PROJECT_DESCRIPTOR_FILE
-from cpm.infrastructure import filesystem
+from cpm.infrastructure import filesystem, yaml_parser
 
 
 def update(directory, project_descriptor, params):
     stream = StringIO()
+    if project_descriptor.yaml_document is None:
+        project_descriptor.yaml_document = yaml_parser.load(f'{directory}/{PROJECT_DESCRIPTOR_FILE}')
     project_descriptor.yaml_document.update(params)
     yaml = YAML()
     yaml.dump(project_descriptor.yaml_document, stream=stream)
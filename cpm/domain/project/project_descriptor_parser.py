@@ -1,34 +1,67 @@
 import glob
 from pathlib import Path
 
-import semver
+from ruamel.yaml import YAMLError
 
-from cpm.infrastructure.yaml_parser import YamlParser
+from cpm.infrastructure import profiler
+from cpm.infrastructure.yaml_parser import YamlParser, FastYamlParser, IncludeCycle
 from cpm.domain import constants
+from cpm.domain.project import project_descriptor_cache
 from cpm.domain.project.project_descriptor import ProjectDescriptor, TargetDescription, DeclaredBit, CompilationPlan, PackageDescription
 
 
 def parse_from(project_directory):
+    with profiler.span('parse descriptor', 'descriptor', directory=str(project_directory)) as span_args:
+        descriptor_file = project_yaml_file(project_directory)
+        project_descriptor = project_descriptor_cache.load(descriptor_file)
+        span_args['cached'] = project_descriptor is not None
+        if project_descriptor is None:
+            project_descriptor = parse_file(descriptor_file)
+            project_descriptor_cache.save(descriptor_file, project_descriptor)
+    return project_descriptor
+
+
+def parse_file(descriptor_file):
+    try:
+        return parse_file_fast(descriptor_file)
+    except (ParseError, YAMLError):
+        return parse_file_round_trip(descriptor_file)
+    except IncludeCycle as cycle:
+        raise ParseError(cycle.parsing_file, cycle.line, cycle.col, f'include cycle {cycle}')
+
+
+def parse_file_fast(descriptor_file):
+    try:
+        parser = FastYamlParser()
+        yaml_document = parser.load_from(Path(descriptor_file))
+    except FileNotFoundError:
+        raise ProjectDescriptorNotFound
+    project_descriptor = digest_yaml(yaml_document)
+    project_descriptor.included = parser.included_files()
+    return project_descriptor
+
+
+def parse_file_round_trip(descriptor_file):
     try:
         parser = YamlParser(pure=True)
-        yaml_document = parser.load_from(Path(project_yaml_file(project_directory)))
+        yaml_document = parser.load_from(Path(descriptor_file))
     except FileNotFoundError:
         raise ProjectDescriptorNotFound
     project_descriptor = digest_yaml(yaml_document)
     project_descriptor.yaml_document = yaml_document
     project_descriptor.parser = parser
+    project_descriptor.included = parser.included_files()
     return project_descriptor
 
 
 def digest_yaml(yaml_contents):
+    validate(yaml_contents)
     project_description = ProjectDescriptor()
-    project_description.name = required(yaml_contents, 'name', String)
-    project_description.version = optional(yaml_contents, 'version', String, '')
-    project_description.description = optional(yaml_contents, 'description', String, '')
-    build = optional(yaml_contents, 'build', Mapping, default={})
-    project_description.build = parse_compilation_plan(build)
-    test = optional(yaml_contents, 'test', Mapping, default={})
-    project_description.test = parse_compilation_plan(test)
+    project_description.name = yaml_contents['name']
+    project_description.version = get_or_default_to(yaml_contents, 'version', '')
+    project_description.description = get_or_default_to(yaml_contents, 'description', '')
+    project_description.build = parse_compilation_plan(get_or_default_to(yaml_contents, 'build', {}))
+    project_description.test = parse_compilation_plan(get_or_default_to(yaml_contents, 'test', {}))
     project_description.targets = parse_targets(get_or_default_to(yaml_contents, 'targets', {}))
     return project_description
 
@@ -38,7 +71,7 @@ def parse_targets(targets_description):
         'default': TargetDescription('default')
     }
     for target_name in targets_description:
-        targets[target_name] = parse_target(target_name, targets_description.get(target_name, {}))
+        targets[target_name] = parse_target(target_name, get_or_default_to(targets_description, target_name, {}))
     return targets
 
 
@@ -49,48 +82,67 @@ def parse_target(target_name, target_description):
     target.test_image = target_description.get('test_image', '')
     target.test_dockerfile = target_description.get('test_dockerfile', '')
     target.toolchain_prefix = target_description.get('toolchain_prefix', '')
+    target.compiler_cache = target_description.get('compiler_cache', '')
+    target.compiler_cache_directory = target_description.get('compiler_cache_directory', '')
+    target.generator = target_description.get('generator', '')
     target.format = target_description.get('format', 'binary')
     target.main = target_description.get('main', '')
     target.post_build = target_description.get('post_build', [])
-    target.build = parse_compilation_plan(target_description.get('build', {}))
-    target.test = parse_compilation_plan(target_description.get('test', {}))
+    target.build = parse_compilation_plan(get_or_default_to(target_description, 'build', {}))
+    target.test = parse_compilation_plan(get_or_default_to(target_description, 'test', {}))
     return target
 
 
 def parse_compilation_plan(plan_description):
     compilation_plan = CompilationPlan()
-    bits = optional(plan_description, 'bits', Mapping, default={})
+    bits = get_or_default_to(plan_description, 'bits', {})
     for bit_name in bits:
-        bit_description = required(bits, bit_name, BitDescription)
+        bit_description = bits[bit_name]
         if isinstance(bit_description, str):
-            declared_bit = DeclaredBit(bit_name, bits[bit_name])
+            declared_bit = DeclaredBit(bit_name, bit_description)
         else:
             declared_bit = declared_bit_with_customized_compilation(bit_name, bit_description)
         compilation_plan.declared_bits.append(declared_bit)
-    packages = optional(plan_description, 'packages', Mapping, default={})
+    packages = get_or_default_to(plan_description, 'packages', {})
     for package_path in packages:
-        package_description = optional(packages, package_path, Mapping, {})
+        package_description = get_or_default_to(packages, package_path, {})
         package = PackageDescription(
             package_path,
-            cflags=optional(package_description, 'cflags', sequence_of(String), []),
-            cppflags=optional(package_description, 'cppflags', sequence_of(String), []),
+            cflags=get_or_default_to(package_description, 'cflags', []),
+            cppflags=get_or_default_to(package_description, 'cppflags', []),
+            unity_build=unity_build_batch_size(package_description),
+            precompiled_headers=get_or_default_to(package_description, 'precompiled_headers', []),
         )
         compilation_plan.packages.append(package)
-    compilation_plan.cflags = optional(plan_description, 'cflags', sequence_of(String), [])
-    compilation_plan.cppflags = optional(plan_description, 'cppflags', sequence_of(String), [])
-    compilation_plan.ldflags = optional(plan_description, 'ldflags', sequence_of(String), [])
-    compilation_plan.libraries = optional(plan_description, 'libraries', sequence_of(String), [])
-    compilation_plan.includes.update(optional(plan_description, 'includes', sequence_of(String), []))
+    compilation_plan.cflags = get_or_default_to(plan_description, 'cflags', [])
+    compilation_plan.cppflags = get_or_default_to(plan_description, 'cppflags', [])
+    compilation_plan.ldflags = get_or_default_to(plan_description, 'ldflags', [])
+    compilation_plan.libraries = get_or_default_to(plan_description, 'libraries', [])
+    compilation_plan.includes.update(get_or_default_to(plan_description, 'includes', []))
+    tags = get_or_default_to(plan_description, 'tags', {})
+    compilation_plan.tags = {tag: list(get_or_default_to(tags, tag, [])) for tag in tags}
+    compilation_plan.link_mode = get_or_default_to(plan_description, 'link_mode', '')
+    compilation_plan.unity_build = unity_build_batch_size(plan_description)
+    compilation_plan.precompiled_headers = get_or_default_to(plan_description, 'precompiled_headers', [])
     return compilation_plan
 
 
+def unity_build_batch_size(description):
+    unity_build = description.get('unity_build') if description else None
+    if unity_build is True:
+        return constants.DEFAULT_UNITY_BUILD_BATCH_SIZE
+    if unity_build is False:
+        return 0
+    return unity_build
+
+
 def declared_bit_with_customized_compilation(bit_name, bit_description):
     return DeclaredBit(
         name=bit_name,
-        version=required(bit_description, 'version', String),
-        cflags=optional(bit_description, 'cflags', Sequence, []),
-        cppflags=optional(bit_description, 'cppflags', Sequence, []),
-        target=optional(bit_description, 'target', String, '')
+        version=bit_description['version'],
+        cflags=get_or_default_to(bit_description, 'cflags', []),
+        cppflags=get_or_default_to(bit_description, 'cppflags', []),
+        target=get_or_default_to(bit_description, 'target', '')
     )
 
 
@@ -112,97 +164,208 @@ def get_or_default_to(dictionary, key, default):
     return dictionary.get(key, default) or default
 
 
-def required(d, key, typ):
-    if key not in d:
-        raise MissingRequiredField(key)
-    typ.validate(d, key)
-    return d[key]
+def validate(yaml_contents):
+    errors = ValidationErrors()
+    PROJECT_DESCRIPTOR_SCHEMA.validate_contents(yaml_contents if isinstance(yaml_contents, dict) else {}, errors)
+    errors.raise_if_any()
 
 
-def optional(d, key, typ, default=None):
-    if key not in d or not d[key]:
-        return default
-    typ.validate(d, key)
-    return d[key]
+class ValidationErrors(object):
+    def __init__(self):
+        self.errors = []
 
+    def report(self, container, key, message):
+        self.errors.append(ParseError(*_location(container, key), message))
 
-class String:
-    name = 'string'
+    def missing(self, field):
+        self.errors.append(MissingRequiredField(field))
 
-    @staticmethod
-    def validate(d, key):
-        value = d[key]
-        if not isinstance(value, str):
-            raise ParseError(*_location(d, key), f'{key} must be a string')
+    def raise_if_any(self):
+        if len(self.errors) == 1:
+            raise self.errors[0]
+        if self.errors:
+            raise InvalidDescriptor(sorted(self.errors, key=_error_position))
 
 
-class Semver(String):
-    name = 'semver'
+class Field(object):
+    def __init__(self, typ, required=False):
+        self.typ = typ
+        self.required = required
 
-    @staticmethod
-    def validate(d, key):
-        String.validate(d, key)
-        value = d[key]
-        if not semver.VersionInfo.isvalid(value):
-            raise ParseError(*_location(d, key), f'{key} must be a valid semver string')
 
+class Type(object):
+    name = ''
 
-class BitDescription:
-    name = 'bit_description'
+    def accepts(self, value):
+        return True
 
-    @staticmethod
-    def validate(d, key):
-        value = d[key]
-        if not isinstance(value, dict) and not isinstance(value, str):
-            raise ParseError(*_location(d, key), f'{key} must be a string or a mapping')
+    def validate(self, container, key, errors):
+        if not self.accepts(container[key]):
+            errors.report(container, key, f'{key} must be a {self.name}')
 
 
-class Mapping:
-    name = 'mapping'
+class StringType(Type):
+    name = 'string'
 
-    @staticmethod
-    def validate(d, key):
-        value = d[key]
-        if not isinstance(value, dict):
-            raise ParseError(*_location(d, key), f'{key} must be a mapping')
+    def accepts(self, value):
+        return isinstance(value, str)
 
 
-class Sequence:
+class ChoiceType(StringType):
+    def __init__(self, choices):
+        self.choices = choices
+        self.name = f'one of {", ".join(choices)}'
+
+    def accepts(self, value):
+        return value in self.choices
+
+    def validate(self, container, key, errors):
+        if not self.accepts(container[key]):
+            errors.report(container, key, f'{key} must be {self.name}')
+
+
+class UnityBuildType(Type):
+    name = 'boolean or a batch size'
+
+    def accepts(self, value):
+        return isinstance(value, bool) or (isinstance(value, int) and value > 0)
+
+
+class SequenceType(Type):
     name = 'sequence'
 
-    @staticmethod
-    def validate(d, key):
-        sequence = d[key]
+    def accepts(self, value):
+        return isinstance(value, list)
+
+
+class SequenceOfType(SequenceType):
+    def __init__(self, item_type):
+        self.item_type = item_type
+        self.name = f'sequence of {item_type.name}'
+
+    def validate(self, container, key, errors):
+        sequence = container[key]
         if not isinstance(sequence, list):
-            raise ParseError(*_location(d, key), f'{key} must be a sequence')
+            errors.report(container, key, f'{key} must be a {self.name}')
+            return
+        for index, item in enumerate(sequence):
+            if not self.item_type.accepts(item):
+                errors.report(sequence, index, f'{key} must be a {self.name}')
 
 
-def sequence_of(typ):
-    class SequenceOf(Sequence):
-        name = f'sequence_of_{typ.name}'
+class MappingType(Type):
+    name = 'mapping'
+
+    def __init__(self, fields=None, values=None):
+        self.fields = fields or {}
+        self.values = values
 
-        @staticmethod
-        def validate(d, key):
-            try:
-                Sequence.validate(d, key)
-                sequence = d[key]
-                for i in range(len(sequence)):
-                    typ.validate(sequence, i)
-            except ParseError as parse_error:
-                raise ParseError(
-                    parse_error.parsing_file,
-                    parse_error.line,
-                    parse_error.col,
-                    f'{key} must be a sequence of {typ.name}')
+    def accepts(self, value):
+        return isinstance(value, dict)
 
-    return SequenceOf
+    def validate(self, container, key, errors):
+        if not self.accepts(container[key]):
+            errors.report(container, key, f'{key} must be a {self.name}')
+        else:
+            self.validate_contents(container[key], errors)
+
+    def validate_contents(self, mapping, errors):
+        for key, field in self.fields.items():
+            validate_field(mapping, key, field, errors)
+        if self.values is not None:
+            for key in mapping:
+                validate_field(mapping, key, self.values, errors)
+
+
+class BitDescriptionType(Type):
+    name = 'string or a mapping'
+
+    def __init__(self, mapping_type):
+        self.mapping_type = mapping_type
+
+    def accepts(self, value):
+        return isinstance(value, (str, dict))
+
+    def validate(self, container, key, errors):
+        super(BitDescriptionType, self).validate(container, key, errors)
+        if isinstance(container[key], dict):
+            self.mapping_type.validate_contents(container[key], errors)
+
+
+def validate_field(mapping, key, field, errors):
+    if key not in mapping:
+        if field.required:
+            errors.missing(key)
+    elif field.required or mapping[key]:
+        field.typ.validate(mapping, key, errors)
+
+
+String = StringType()
+Sequence = SequenceType()
+Strings = SequenceOfType(String)
+UnityBuild = UnityBuildType()
+
+COMPILATION_PLAN_SCHEMA = MappingType({
+    'bits': Field(MappingType(values=Field(BitDescriptionType(MappingType({
+        'version': Field(String, required=True),
+        'cflags': Field(Sequence),
+        'cppflags': Field(Sequence),
+        'target': Field(String),
+    })), required=True))),
+    'packages': Field(MappingType(values=Field(MappingType({
+        'cflags': Field(Strings),
+        'cppflags': Field(Strings),
+        'unity_build': Field(UnityBuild),
+        'precompiled_headers': Field(Strings),
+    })))),
+    'cflags': Field(Strings),
+    'cppflags': Field(Strings),
+    'ldflags': Field(Strings),
+    'libraries': Field(Strings),
+    'includes': Field(Strings),
+    'tags': Field(MappingType(values=Field(Strings))),
+    'link_mode': Field(ChoiceType(constants.LINK_MODES)),
+    'unity_build': Field(UnityBuild),
+    'precompiled_headers': Field(Strings),
+})
+
+TARGET_SCHEMA = MappingType({
+    'image': Field(String),
+    'dockerfile': Field(String),
+    'test_image': Field(String),
+    'test_dockerfile': Field(String),
+    'toolchain_prefix': Field(String),
+    'compiler_cache': Field(ChoiceType(constants.COMPILER_CACHES)),
+    'compiler_cache_directory': Field(String),
+    'generator': Field(ChoiceType(constants.GENERATORS)),
+    'format': Field(String),
+    'main': Field(String),
+    'post_build': Field(Strings),
+    'build': Field(COMPILATION_PLAN_SCHEMA),
+    'test': Field(COMPILATION_PLAN_SCHEMA),
+})
+
+PROJECT_DESCRIPTOR_SCHEMA = MappingType({
+    'name': Field(String, required=True),
+    'version': Field(String),
+    'description': Field(String),
+    'build': Field(COMPILATION_PLAN_SCHEMA),
+    'test': Field(COMPILATION_PLAN_SCHEMA),
+    'targets': Field(MappingType(values=Field(TARGET_SCHEMA))),
+})
 
 
 class ProjectDescriptorNotFound(RuntimeError):
     pass
 
 
+def _error_position(error):
+    return str(getattr(error, 'parsing_file', '')), getattr(error, 'line', -1), getattr(error, 'col', -1)
+
+
 def _location(d, key):
+    if not hasattr(d, 'lc'):
+        raise UnlocatedParseError()
     return d.parsing_file, d.lc.data[key][0], d.lc.data[key][1]
 
 
@@ -214,7 +377,18 @@ class ParseError(RuntimeError):
         self.message = f'{parsing_file}:{line+1}:{col+1}: {message}'
 
 
+class UnlocatedParseError(ParseError):
+    def __init__(self):
+        self.message = 'invalid project descriptor'
+
+
 class MissingRequiredField(ParseError):
     def __init__(self, field):
         self.field = field
         self.message = f'{field} is required'
+
+
+class InvalidDescriptor(ParseError):
+    def __init__(self, errors):
+        self.errors = errors
+        self.message = '\n'.join(error.message for error in errors)
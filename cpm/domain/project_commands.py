@@ -1,35 +1,44 @@
+import json
 import os
-
-import docker
 import subprocess
 import signal
 import sys
+import time
 
-from cpm.infrastructure import filesystem
+from cpm.infrastructure import events, filesystem, profiler
 from cpm.domain import constants
+from cpm.domain.ninja.ninja_file_builder import NinjaFileBuilder
+from cpm.domain.test_index import TestIndex
+
+CMAKE_GENERATOR = 'Ninja'
+CONFIGURE_STAMP = f'{constants.BUILD_DIRECTORY}/.cpm/configure.stamp'
+PENDING_CONFIGURE_STAMP = f'{CONFIGURE_STAMP}.pending'
+CONFIGURE_ENVIRONMENT = ['CC', 'CXX', 'CFLAGS', 'CXXFLAGS', 'CPPFLAGS', 'LDFLAGS']
+
+_client = None
 
 
 class ProjectCommands(object):
-    def build(self, project):
+    def build(self, project, configure=True):
         if not filesystem.directory_exists(constants.BUILD_DIRECTORY):
             filesystem.create_directory(constants.BUILD_DIRECTORY)
-        self.__build(project, [project.name], post_build=self.__post_build(project))
+        self.__build(project, [project.name], post_build=self.__post_build(project), configure=configure)
 
     def clean(self, project):
         if filesystem.directory_exists(constants.BUILD_DIRECTORY):
             filesystem.remove_directory(constants.BUILD_DIRECTORY)
         _ignore_exception(lambda: filesystem.delete_file(constants.CMAKELISTS))
 
-    def build_tests(self, project, files_or_dirs):
+    def build_tests(self, project, files_or_dirs, configure=True):
         if not filesystem.directory_exists(constants.BUILD_DIRECTORY):
             filesystem.create_directory(constants.BUILD_DIRECTORY)
         if not files_or_dirs:
-            self.__build_tests(project, ['tests'])
+            self.__build_tests(project, ['tests'], configure=configure)
         else:
             tests_to_run = self.tests_from_args(project, files_or_dirs)
-            self.__build_tests(project, [test.name for test in tests_to_run])
+            self.__build_tests(project, [test.name for test in tests_to_run], configure=configure)
 
-    def __build_tests(self, project, goals, post_build=''):
+    def __build_tests(self, project, goals, post_build='', configure=True):
         if project.target.test_image and project.target.test_dockerfile:
             print('cpm: warning: both "test_image" and "test_dockerfile" options are specified, will use "test_image"')
         if project.target.test_image:
@@ -37,7 +46,8 @@ class ProjectCommands(object):
                 project,
                 project.target.test_image,
                 goals,
-                post_build
+                post_build,
+                configure
             )
         elif project.target.test_dockerfile:
             self.__build_using_dockerfile(
@@ -45,12 +55,13 @@ class ProjectCommands(object):
                 project.target.test_dockerfile,
                 self.__test_image_name(project),
                 goals,
-                post_build
+                post_build,
+                configure
             )
         else:
-            self.__build_goal(goals)
+            self.__build_goal(project, goals, configure)
 
-    def __build(self, project, goals, post_build=''):
+    def __build(self, project, goals, post_build='', configure=True):
         if project.target.image and project.target.dockerfile:
             print('cpm: warning: both "image" and "dockerfile" options are specified, will use "image"')
         if project.target.image:
@@ -58,7 +69,8 @@ class ProjectCommands(object):
                 project,
                 project.target.image,
                 goals,
-                post_build
+                post_build,
+                configure
             )
         elif project.target.dockerfile:
             self.__build_using_dockerfile(
@@ -66,59 +78,92 @@ class ProjectCommands(object):
                 project.target.dockerfile,
                 self.__build_image_name(project),
                 goals,
-                post_build
+                post_build,
+                configure
             )
         else:
-            self.__build_goal(goals)
-
-    def __build_goal(self, goals):
-        if any(result.returncode != 0 for result in [
-            self.__run_command(constants.CMAKE_COMMAND, '-G', 'Ninja', '..'),
-            self.__run_command(constants.NINJA_COMMAND, *goals)
-        ]):
-            raise BuildError
-
-    def __build_using_image(self, project, image_name, goals, post_build):
+            self.__build_goal(project, goals, configure)
+
+    def __build_goal(self, project, goals, configure=True):
+        if self.__generate_ninja_file(project):
+            configure = False
+        configure_stamp = _configure_stamp(project)
+        if configure and not _is_configured(configure_stamp):
+            _ignore_exception(lambda: filesystem.delete_file(CONFIGURE_STAMP))
+            with profiler.span('cmake', 'build'):
+                if self.__run_command(constants.CMAKE_COMMAND, '-G', CMAKE_GENERATOR, '..').returncode != 0:
+                    raise BuildError
+            _save_configure_stamp(configure_stamp)
+        with profiler.span('ninja', 'build', goals=goals):
+            if self.__run_command(constants.NINJA_COMMAND, *goals, env=_compiler_cache_environment(project)).returncode != 0:
+                raise BuildError
+
+    def __build_using_image(self, project, image_name, goals, post_build, configure=True):
         print(f'cpm: using Docker image {image_name}')
-        client = docker.from_env()
+        docker = _docker()
+        client = _docker_client()
         try:
-            client.images.pull(image_name)
+            with profiler.span('docker pull', 'docker', image=image_name):
+                client.images.pull(image_name)
         except docker.errors.ImageNotFound:
             raise DockerImageNotFound(image_name)
         except docker.errors.NotFound:
             raise DockerImageNotFound(image_name)
-        self.__build_inside_container(client, project, image_name, goals, post_build)
+        self.__build_inside_container(client, project, image_name, goals, post_build, configure)
 
-    def __build_using_dockerfile(self, project, dockerfile, image_name, goals, post_build):
+    def __build_using_dockerfile(self, project, dockerfile, image_name, goals, post_build, configure=True):
         print(f'cpm: building image from {dockerfile}')
-        client = docker.from_env()
-        with open(dockerfile, 'rb') as fileobj:
+        client = _docker_client()
+        with open(dockerfile, 'rb') as fileobj, profiler.span('docker build', 'docker', dockerfile=dockerfile):
             client.images.build(path='.', fileobj=fileobj, tag=image_name)
-        self.__build_inside_container(client, project, image_name, goals, post_build)
-
-    def __build_inside_container(self, client, project, image_name, goals, post_build):
+        self.__build_inside_container(client, project, image_name, goals, post_build, configure)
+
+    def __build_inside_container(self, client, project, image_name, goals, post_build, configure=True):
+        if self.__generate_ninja_file(project):
+            configure = False
+        configure_stamp = _configure_stamp(project, image_name)
+        if configure and _is_configured(configure_stamp):
+            configure = False
+        configure_command = ''
+        if configure:
+            _save_configure_stamp(configure_stamp, PENDING_CONFIGURE_STAMP)
+            configure_command = f'{constants.CMAKE_COMMAND} -G {CMAKE_GENERATOR} /{project.name} && ' \
+                                f'mv {_build_path(PENDING_CONFIGURE_STAMP)} {_build_path(CONFIGURE_STAMP)} && '
         filesystem.create_file(
             f'{constants.BUILD_DIRECTORY}/build.sh',
-            f'{constants.CMAKE_COMMAND} -G Ninja /{project.name} && {constants.NINJA_COMMAND} {" ".join(goals)}\n'
+            f'{configure_command}{constants.NINJA_COMMAND} {" ".join(goals)}\n'
             f'{post_build}'
         )
-        container = client.containers.run(
-            image_name,
-            command=f'sh /{project.name}/build/build.sh',
-            working_dir=f'/{project.name}/build',
-            volumes={f'{os.getcwd()}': {'bind': f'/{project.name}', 'mode': 'rw'}},
-            user=f'{os.getuid()}:{os.getgid()}',
-            environment=[f'PROJECT_NAME={project.name}', f'PROJECT_VERSION={project.version}'],
-            detach=True
-        )
-        print(f'cpm: building inside {container.short_id}')
-        for log in container.logs(stream=True):
-            sys.stdout.write(log.decode())
-        exit_code = container.wait()
+        volumes = {f'{os.getcwd()}': {'bind': f'/{project.name}', 'mode': 'rw'}}
+        environment = [f'PROJECT_NAME={project.name}', f'PROJECT_VERSION={project.version}']
+        if project.target.compiler_cache:
+            volumes[_compiler_cache_host_directory(project)] = {'bind': constants.CONTAINER_COMPILER_CACHE_DIRECTORY, 'mode': 'rw'}
+            environment.append(f'{_compiler_cache_variable(project)}={constants.CONTAINER_COMPILER_CACHE_DIRECTORY}')
+        with profiler.span('docker run', 'docker', image=image_name, goals=goals):
+            container = client.containers.run(
+                image_name,
+                command=f'sh /{project.name}/build/build.sh',
+                working_dir=f'/{project.name}/build',
+                volumes=volumes,
+                user=f'{os.getuid()}:{os.getgid()}',
+                environment=environment,
+                detach=True
+            )
+            print(f'cpm: building inside {container.short_id}')
+            for log in container.logs(stream=True):
+                sys.stdout.write(log.decode())
+            exit_code = container.wait()
         if exit_code['StatusCode'] != 0:
             raise BuildError
         container.remove()
 
+    def __generate_ninja_file(self, project):
+        if project.target.generator != constants.NINJA_GENERATOR:
+            return False
+        NinjaFileBuilder().build(project)
+        _ignore_exception(lambda: filesystem.delete_file(CONFIGURE_STAMP))
+        return True
+
     def __build_image_name(self, project):
         return f'{project.name}_cpm_build'.lower()
 
@@ -147,17 +192,23 @@ class ProjectCommands(object):
             raise TestsFailed('tests failed')
 
     def run_test(self, executable, test_args):
-        result = subprocess.run(
-            [f'./{constants.BUILD_DIRECTORY}/{executable}'] + test_args
-        )
+        start_time = time.perf_counter()
+        with profiler.span(executable, 'test') as span_args:
+            result = subprocess.run(
+                [f'./{constants.BUILD_DIRECTORY}/{executable}'] + test_args
+            )
+            span_args['exit_code'] = result.returncode
+        _emit_test_result(executable, result.returncode, start_time)
         if result.returncode < 0:
             print(f'cpm: {executable} failed with {result.returncode} ({signal.Signals(-result.returncode).name})')
         return result.returncode
 
     def __run_tests_using_image(self, project, image_name, tests_to_run, test_args):
-        client = docker.from_env()
+        docker = _docker()
+        client = _docker_client()
         try:
-            client.images.pull(image_name)
+            with profiler.span('docker pull', 'docker', image=image_name):
+                client.images.pull(image_name)
         except docker.errors.ImageNotFound:
             raise DockerImageNotFound(image_name)
         except docker.errors.NotFound:
@@ -165,7 +216,7 @@ class ProjectCommands(object):
         return self.__run_tests_inside_container(project, client, image_name, tests_to_run, test_args)
 
     def __run_tests_using_dockerfile(self, project, image_name, tests_to_run, test_args):
-        client = docker.from_env()
+        client = _docker_client()
         return self.__run_tests_inside_container(project, client, image_name, tests_to_run, test_args)
 
     def __run_tests_inside_container(self, project, client, image_name, tests_to_run, test_args):
@@ -185,19 +236,23 @@ class ProjectCommands(object):
         return results
 
     def __run_test_inside_container(self, project, container, executable, test_args):
-        (exit_code, output) = container.exec_run(
-            f'./{constants.BUILD_DIRECTORY}/{executable} {" ".join(test_args)}',
-            workdir=f'/{project.name}',
-            user=f'{os.getuid()}:{os.getgid()}'
-        )
+        start_time = time.perf_counter()
+        with profiler.span(executable, 'test', container=container.short_id) as span_args:
+            (exit_code, output) = container.exec_run(
+                f'./{constants.BUILD_DIRECTORY}/{executable} {" ".join(test_args)}',
+                workdir=f'/{project.name}',
+                user=f'{os.getuid()}:{os.getgid()}'
+            )
+            span_args['exit_code'] = exit_code
+        _emit_test_result(executable, exit_code, start_time)
         sys.stdout.write(output.decode())
         result = exit_code
         if result < 0:
             print(f'cpm: {executable} failed with {result} ({signal.Signals(-result).name})')
         return result
 
-    def __run_command(self, *args, cwd=constants.BUILD_DIRECTORY):
-        return subprocess.run([*args], cwd=cwd)
+    def __run_command(self, *args, cwd=constants.BUILD_DIRECTORY, env=None):
+        return subprocess.run([*args], cwd=cwd, env=env)
 
     def __post_build(self, project):
         return '\n'.join([f'( cd .. && {post_build} )' for post_build in project.target.post_build])
@@ -205,19 +260,77 @@ class ProjectCommands(object):
     def tests_from_args(self, project, files_or_dirs):
         if not files_or_dirs:
             return 'tests'
-        tests = []
-        for arg in files_or_dirs:
-            if filesystem.is_file(arg):
-                tests.append(self.test_from_test_file(project, arg))
-            elif filesystem.is_directory(arg):
-                tests.extend(self.test_list_from_directory(project, arg))
-        return tests
-
-    def test_list_from_directory(self, project, directory):
-        return [self.test_from_test_file(project, test_file) for test_file in filesystem.find(directory, 'test_*.cpp')]
-
-    def test_from_test_file(self, project, test_file):
-        return next(test for test in project.test.test_suites if test.main == test_file)
+        return TestIndex(project.test.test_suites).select(files_or_dirs)
+
+
+def _docker():
+    import docker
+    return docker
+
+
+def _docker_client():
+    global _client
+    if _client is None:
+        _client = _docker().from_env()
+    return _client
+
+
+def _configure_stamp(project, image_name=''):
+    return json.dumps({
+        'generator': CMAKE_GENERATOR,
+        'image': image_name,
+        'toolchain_prefix': project.target.toolchain_prefix,
+        'compiler_cache': project.target.compiler_cache,
+        'environment': {name: os.environ.get(name, '') for name in CONFIGURE_ENVIRONMENT},
+    }, sort_keys=True)
+
+
+def _is_configured(configure_stamp):
+    if not filesystem.file_exists(f'{constants.BUILD_DIRECTORY}/CMakeCache.txt') or \
+            not filesystem.file_exists(f'{constants.BUILD_DIRECTORY}/{constants.NINJA_FILE}'):
+        return False
+    try:
+        return filesystem.read_file(CONFIGURE_STAMP) == configure_stamp
+    except OSError:
+        return False
+
+
+def _save_configure_stamp(configure_stamp, stamp_file=CONFIGURE_STAMP):
+    stamp_directory = os.path.dirname(stamp_file)
+    if not filesystem.directory_exists(stamp_directory):
+        filesystem.create_directory(stamp_directory)
+    filesystem.write_file_if_changed(stamp_file, configure_stamp)
+
+
+def _build_path(path):
+    return os.path.relpath(path, constants.BUILD_DIRECTORY)
+
+
+def _compiler_cache_variable(project):
+    return constants.COMPILER_CACHE_DIRECTORY_VARIABLES[project.target.compiler_cache]
+
+
+def _compiler_cache_environment(project):
+    if not project.target.compiler_cache or not project.target.compiler_cache_directory:
+        return None
+    return {**os.environ, _compiler_cache_variable(project): os.path.abspath(os.path.expanduser(project.target.compiler_cache_directory))}
+
+
+def _compiler_cache_host_directory(project):
+    directory = project.target.compiler_cache_directory or \
+        os.environ.get(_compiler_cache_variable(project), f'~/.cache/{project.target.compiler_cache}')
+    directory = os.path.abspath(os.path.expanduser(directory))
+    if not filesystem.directory_exists(directory):
+        filesystem.create_directory(directory)
+    return directory
+
+
+def _emit_test_result(executable, exit_code, start_time):
+    events.emit('test_suite',
+                name=executable,
+                status='passed' if exit_code == 0 else 'failed',
+                exit_code=exit_code,
+                duration_ms=(time.perf_counter() - start_time) * 1000)
 
 
 def _ignore_exception(call):
@@ -1,20 +1,21 @@
 from cpm.domain.project_packager import ProjectPackager
 from cpm.domain.template_packager import TemplatePackager
-from cpm.domain.project import project_descriptor_parser
+from cpm.domain.project.descriptor_repository import shared_repository
 
 
 class PublishService(object):
-    def __init__(self, cpm_hub_connector, project_packager=ProjectPackager(), template_packager=TemplatePackager()):
+    def __init__(self, cpm_hub_connector, project_packager=ProjectPackager(), template_packager=TemplatePackager(), descriptor_repository=shared_repository):
         self.template_packager = template_packager
         self.project_packager = project_packager
         self.cpm_hub_connector = cpm_hub_connector
+        self.descriptor_repository = descriptor_repository
 
     def publish(self):
-        project_descriptor = project_descriptor_parser.parse_from('.')
+        project_descriptor = self.descriptor_repository.descriptor('.')
         package_name = self.project_packager.pack(project_descriptor, 'dist')
         self.cpm_hub_connector.publish_bit(project_descriptor, package_name)
 
     def publish_template(self):
-        project_descriptor = project_descriptor_parser.parse_from('.')
+        project_descriptor = self.descriptor_repository.descriptor('.')
         package_name = self.template_packager.pack(project_descriptor, 'dist')
         self.cpm_hub_connector.publish_template(project_descriptor, package_name)
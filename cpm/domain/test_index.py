@@ -0,0 +1,103 @@
+import os
+from fnmatch import fnmatchcase
+
+GLOB_CHARACTERS = ('*', '?', '[')
+
+
+class TestSelection(object):
+    def __init__(self, patterns=(), keyword='', tags=()):
+        self.patterns = list(patterns)
+        self.keyword = keyword
+        self.tags = list(tags)
+
+    def __bool__(self):
+        return bool(self.patterns or self.keyword or self.tags)
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+
+class TestIndex(object):
+    def __init__(self, test_suites):
+        self.test_suites = test_suites
+        self.by_main = {}
+        self.by_name = {}
+        self.by_directory = {}
+        self.by_tag = {}
+        for position, test_suite in enumerate(test_suites):
+            self.by_main.setdefault(os.path.normpath(test_suite.main), []).append(position)
+            self.by_name.setdefault(test_suite.name, []).append(position)
+            for directory in parent_directories(test_suite.main):
+                self.by_directory.setdefault(directory, []).append(position)
+            for tag in test_suite.tags:
+                self.by_tag.setdefault(tag, []).append(position)
+
+    def select(self, selection):
+        selection = as_selection(selection)
+        positions = None
+        if selection.patterns:
+            positions = set()
+            for pattern in selection.patterns:
+                matches = self.matching(pattern)
+                if not matches:
+                    raise TestNotFound(pattern)
+                positions.update(matches)
+        if selection.tags:
+            tagged = {position for tag in selection.tags for position in self.by_tag.get(tag, [])}
+            positions = tagged if positions is None else positions & tagged
+        if positions is None:
+            positions = range(len(self.test_suites))
+        selected = [self.test_suites[position] for position in sorted(positions)]
+        selected = [test_suite for test_suite in selected if selection.keyword in test_suite.name]
+        if not selected:
+            raise TestNotFound(describe(selection))
+        return selected
+
+    def matching(self, pattern):
+        path = os.path.normpath(pattern)
+        if path in self.by_main:
+            return self.by_main[path]
+        if pattern in self.by_name:
+            return self.by_name[pattern]
+        if path in self.by_directory:
+            return self.by_directory[path]
+        if is_glob(pattern):
+            return [position for position, test_suite in enumerate(self.test_suites) if matches(test_suite, pattern)]
+        return []
+
+
+def as_selection(selection):
+    return selection if isinstance(selection, TestSelection) else TestSelection(selection)
+
+
+def describe(selection):
+    criteria = list(selection.patterns)
+    if selection.keyword:
+        criteria.append(f'-k {selection.keyword}')
+    criteria.extend(f'-t {tag}' for tag in selection.tags)
+    return ' '.join(criteria)
+
+
+def matches(test_suite, pattern):
+    if not is_glob(pattern):
+        path = os.path.normpath(pattern)
+        return path == os.path.normpath(test_suite.main) or pattern == test_suite.name or path in parent_directories(test_suite.main)
+    return fnmatchcase(test_suite.main, pattern) or fnmatchcase(test_suite.name, pattern) or \
+        any(fnmatchcase(directory, pattern) for directory in parent_directories(test_suite.main))
+
+
+def is_glob(pattern):
+    return any(character in pattern for character in GLOB_CHARACTERS)
+
+
+def parent_directories(path):
+    directories = []
+    directory = os.path.dirname(os.path.normpath(path))
+    while directory:
+        directories.append(directory)
+        directory = os.path.dirname(directory)
+    return directories
+
+
+class TestNotFound(RuntimeError):
+    pass
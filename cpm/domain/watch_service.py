@@ -0,0 +1,148 @@
+import os
+
+from cpm.domain.bit_resolver import BitResolutionError
+from cpm.domain.constants import PROJECT_DESCRIPTOR_FILE
+from cpm.domain.project.project_descriptor_parser import ParseError
+from cpm.domain.project.project_loader import InvalidTarget
+from cpm.domain.project_commands import BuildError, TestsFailed, DockerImageNotFound
+from cpm.domain.test_service import NoTestsFound
+from cpm.domain.test_index import TestNotFound
+from cpm.infrastructure.file_watcher import file_watcher
+
+RELOAD = 'reload'
+BUILD = 'build'
+SOURCE_EXTENSIONS = ('.c', '.cpp')
+
+
+class WatchService(object):
+    def __init__(self, project_loader, cmakelists_builder, project_commands, watcher_factory=file_watcher):
+        self.project_loader = project_loader
+        self.cmakelists_builder = cmakelists_builder
+        self.project_commands = project_commands
+        self.watcher_factory = watcher_factory
+
+    def watch_build(self, target_name='default'):
+        project = self.project_loader.load('.', target_name)
+        stop_on_interrupt(lambda: self.__watch_build(project, target_name))
+
+    def __watch_build(self, project, target_name):
+        self.__report(lambda: self.__build(project, configure=True))
+        watcher = self.__watch(project)
+        while True:
+            changes = self.__wait_for_changes(watcher)
+            if affected_stage(project, changes) == RELOAD:
+                watcher.close()
+                project = self.__report(lambda: self.project_loader.load('.', target_name)) or project
+                self.__report(lambda: self.__build(project, configure=True))
+                watcher = self.__watch(project)
+            else:
+                self.__report(lambda: self.project_commands.build(project, configure=False))
+
+    def watch_tests(self, files_or_dirs, target_name='default', test_args=()):
+        project = self.project_loader.load('.', target_name)
+        if not project.test.test_suites:
+            raise NoTestsFound()
+        stop_on_interrupt(lambda: self.__watch_tests(project, files_or_dirs, target_name, test_args))
+
+    def __watch_tests(self, project, files_or_dirs, target_name, test_args):
+        self.__report(lambda: self.__test(project, files_or_dirs, test_args, configure=True))
+        watcher = self.__watch(project)
+        while True:
+            changes = self.__wait_for_changes(watcher)
+            if affected_stage(project, changes) == RELOAD:
+                watcher.close()
+                project = self.__report(lambda: self.project_loader.load('.', target_name)) or project
+                self.__report(lambda: self.__test(project, files_or_dirs, test_args, configure=True))
+                watcher = self.__watch(project)
+                continue
+            changed_suites = changed_test_suites(project, changes)
+            if changed_suites and len(changed_suites) == len(changes.paths()):
+                selected = set(self.__report(lambda: self.__selected_test_mains(project, files_or_dirs)) or [])
+                changed_tests = [main for main in changed_suites if main in selected]
+                if changed_tests:
+                    self.__report(lambda: self.__run_tests(project, changed_tests, test_args, configure=False))
+            else:
+                self.__report(lambda: self.__run_tests(project, files_or_dirs, test_args, configure=False))
+
+    def __build(self, project, configure):
+        self.cmakelists_builder.build(project)
+        self.project_commands.build(project, configure=configure)
+        print('cpm: Build finished')
+
+    def __test(self, project, files_or_dirs, test_args, configure):
+        self.cmakelists_builder.build(project)
+        self.__run_tests(project, files_or_dirs, test_args, configure)
+
+    def __run_tests(self, project, files_or_dirs, test_args, configure):
+        self.project_commands.build_tests(project, files_or_dirs, configure=configure)
+        self.project_commands.run_tests(project, files_or_dirs, test_args)
+        print('cpm: ✔ PASS')
+
+    def __selected_test_mains(self, project, files_or_dirs):
+        if not files_or_dirs:
+            return [test.main for test in project.test.test_suites]
+        return [test.main for test in self.project_commands.tests_from_args(project, files_or_dirs)]
+
+    def __watch(self, project):
+        files, directories = watched_paths(project)
+        return self.watcher_factory(files, directories)
+
+    def __wait_for_changes(self, watcher):
+        print('cpm: watching for changes (press Ctrl+C to stop)')
+        return watcher.wait_for_changes()
+
+    def __report(self, step):
+        try:
+            return step()
+        except BuildError:
+            print('cpm: error: compilation failed')
+        except TestsFailed:
+            print('cpm: ✖ FAIL')
+        except (InvalidTarget, NoTestsFound):
+            print('cpm: error: nothing to build for the current project description')
+        except DockerImageNotFound as e:
+            print(f'cpm: error: docker image {e.image_name} not found')
+        except TestNotFound as e:
+            print(f'cpm: error: no tests match {e}')
+        except ParseError as e:
+            print(f'cpm: error: {e.message}')
+        except BitResolutionError as e:
+            print(f'cpm: error: {e}')
+        return None
+
+
+def stop_on_interrupt(watch):
+    try:
+        watch()
+    except KeyboardInterrupt:
+        print('\rcpm: stopped watching')
+
+
+def watched_paths(project):
+    files = [PROJECT_DESCRIPTOR_FILE, project.target.main] + [str(f) for f in project.descriptor.included_files()]
+    directories = [package.path for package in project.target.packages + project.test.packages] + ['tests']
+    return files, directories
+
+
+def affected_stage(project, changes):
+    descriptor_files = {os.path.normpath(f) for f in [PROJECT_DESCRIPTOR_FILE] + project.descriptor.included_files()}
+    if changes.paths() & descriptor_files:
+        return RELOAD
+    known_sources = project_sources(project)
+    if any(path.endswith(SOURCE_EXTENSIONS) and path not in known_sources for path in changes.added):
+        return RELOAD
+    if any(path in known_sources for path in changes.removed):
+        return RELOAD
+    return BUILD
+
+
+def project_sources(project):
+    packages = project.target.packages + project.test.packages
+    sources = [source for package in packages for source in package.sources]
+    sources += [test.main for test in project.test.test_suites] + [project.target.main]
+    return {os.path.normpath(source) for source in sources}
+
+
+def changed_test_suites(project, changes):
+    test_mains = {os.path.normpath(test.main): test.main for test in project.test.test_suites}
+    return [test_mains[path] for path in sorted(changes.modified) if path in test_mains]
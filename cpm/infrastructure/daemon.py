@@ -0,0 +1,418 @@
+import json
+import os
+import queue
+import signal
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+import cpm
+
+NOT_FORWARDED_COMMANDS = ('daemon', 'publish')
+NOT_FORWARDED_OPTIONS = ('-w', '--watch')
+OUTPUT_FRAME = b'o'
+EXIT_FRAME = b'x'
+STARTED_FRAME = b's'
+BUSY_FRAME = b'b'
+INPUT_FRAME = b'i'
+INTERRUPT_FRAME = b'c'
+OUTDATED_FRAME = b'v'
+INTERRUPTED_EXIT_CODE = 130
+FRAME_HEADER = struct.Struct('>cI')
+STARTUP_TIMEOUT = 5.0
+
+
+def socket_path():
+    runtime_directory = os.environ.get('XDG_RUNTIME_DIR', tempfile.gettempdir())
+    return f'{runtime_directory}/cpm-{os.getuid()}/daemon.sock'
+
+
+def forward(argv, path=None):
+    path = path or socket_path()
+    if os.environ.get('CPM_NO_DAEMON') or not os.path.exists(path):
+        return None
+    if argv and argv[0] in NOT_FORWARDED_COMMANDS or any(option in NOT_FORWARDED_OPTIONS for option in argv):
+        return None
+    if not _is_private_directory(os.path.dirname(path)):
+        return None
+    try:
+        connection = _connect(path)
+    except OSError:
+        return None
+    with connection:
+        _send_request(connection, {'argv': argv, 'cwd': os.getcwd(), 'env': dict(os.environ), 'version': code_version()})
+        return _receive_output(_FrameSender(connection), connection.makefile('rb'))
+
+
+def code_version():
+    stamps = (os.stat(module_file) for module_file in (cpm.__file__, __file__))
+    return ','.join(f'{module_stat.st_mtime_ns}:{module_stat.st_size}' for module_stat in stamps)
+
+
+def _receive_output(sender, stream):
+    interrupted = False
+    while True:
+        try:
+            for kind, payload in _receive_frames(stream):
+                if kind == OUTPUT_FRAME:
+                    sys.stdout.buffer.write(payload)
+                    sys.stdout.buffer.flush()
+                elif kind == STARTED_FRAME:
+                    threading.Thread(target=_forward_input, args=(sender,), daemon=True).start()
+                elif kind == BUSY_FRAME:
+                    return None
+                elif kind == OUTDATED_FRAME:
+                    print('cpm: warning: stopped a daemon running an older cpm, start it again with \'cpm daemon start\'', file=sys.stderr)
+                    return None
+                elif kind == EXIT_FRAME:
+                    return int(payload)
+            return 1
+        except KeyboardInterrupt:
+            if interrupted:
+                return INTERRUPTED_EXIT_CODE
+            interrupted = True
+            _ignore_disconnection(lambda: sender.send(INTERRUPT_FRAME))
+
+
+def _forward_input(sender):
+    try:
+        for chunk in iter(_read_input, b''):
+            sender.send(INPUT_FRAME, chunk)
+    except (OSError, ValueError):
+        pass
+    _ignore_disconnection(lambda: sender.send(INPUT_FRAME))
+
+
+def _read_input():
+    return os.read(sys.stdin.fileno(), 65536)
+
+
+class DaemonControl(object):
+    def __init__(self, path=None):
+        self.path = path or socket_path()
+
+    def is_running(self):
+        return self.pid() is not None
+
+    def pid(self):
+        try:
+            with _connect(self.path) as connection:
+                _send_request(connection, {'control': 'status'})
+                return int(dict(_receive_frames(connection.makefile('rb')))[EXIT_FRAME])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def start(self):
+        _create_private_directory(os.path.dirname(self.path))
+        subprocess.Popen(
+            [sys.executable, '-c', f'from cpm.infrastructure import daemon; daemon.CpmDaemon({self.path!r}).serve()'],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not self.is_running():
+            if time.monotonic() > deadline:
+                raise DaemonStartFailure()
+            time.sleep(0.05)
+
+    def stop(self):
+        with _connect(self.path) as connection:
+            _send_request(connection, {'control': 'stop'})
+            list(_receive_frames(connection.makefile('rb')))
+
+    def run(self):
+        CpmDaemon(self.path).serve()
+
+
+class CpmDaemon(object):
+    def __init__(self, path):
+        self.path = path
+        self.running = False
+        self.busy = False
+        self.lock = threading.Lock()
+        self.commands = queue.Queue()
+        self.command_thread = None
+        self.forwarded_input = None
+        self.version = code_version()
+
+    def serve(self):
+        _create_private_directory(os.path.dirname(self.path))
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen()
+        if hasattr(sys.stdout, 'reconfigure'):
+            sys.stdout.reconfigure(line_buffering=True)
+        self.running = True
+        self.command_thread = threading.get_ident()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.on_interrupt)
+        threading.Thread(target=self.accept, args=(server,), daemon=True).start()
+        try:
+            while self.running:
+                try:
+                    self.run_next_command()
+                except KeyboardInterrupt:
+                    pass
+        finally:
+            server.close()
+            os.remove(self.path)
+
+    def accept(self, server):
+        while self.running:
+            connection, _ = server.accept()
+            try:
+                self.handle(connection)
+            except (OSError, ValueError):
+                connection.close()
+
+    def handle(self, connection):
+        stream = connection.makefile('rb')
+        request = json.loads(stream.readline())
+        if request.get('control') == 'status':
+            with connection:
+                _send_frame(connection, EXIT_FRAME, str(os.getpid()).encode())
+        elif request.get('control') == 'stop':
+            with connection:
+                self.stop()
+                _send_frame(connection, EXIT_FRAME, b'0')
+        elif request.get('version') != self.version:
+            with connection:
+                self.stop()
+                _send_frame(connection, OUTDATED_FRAME, b'')
+        else:
+            with self.lock:
+                accepted = not self.busy
+                self.busy = True
+            if not accepted:
+                with connection:
+                    _send_frame(connection, BUSY_FRAME, b'')
+                return
+            self.commands.put((connection, stream, request))
+
+    def stop(self):
+        self.running = False
+        self.commands.put(None)
+
+    def run_next_command(self):
+        command = self.commands.get()
+        if command is None:
+            return
+        connection, stream, request = command
+        try:
+            with connection:
+                _ignore_disconnection(lambda: self.run(connection, stream, request))
+        finally:
+            with self.lock:
+                self.busy = False
+
+    def run(self, connection, stream, request):
+        _send_frame(connection, STARTED_FRAME, b'')
+        with _ForwardedInput(stream, self) as forwarded_input:
+            exit_code = self.run_forwarded_command(connection, request, forwarded_input)
+        _send_frame(connection, EXIT_FRAME, str(exit_code).encode())
+
+    def run_forwarded_command(self, connection, request, forwarded_input=None):
+        cwd = os.getcwd()
+        environment = dict(os.environ)
+        with _RedirectedOutput(connection):
+            try:
+                os.chdir(request['cwd'])
+                os.environ.clear()
+                os.environ.update(request['env'])
+                with self.lock:
+                    self.forwarded_input = forwarded_input
+                try:
+                    return run_command(request['argv'])
+                finally:
+                    with self.lock:
+                        self.forwarded_input = None
+            finally:
+                os.chdir(cwd)
+                os.environ.clear()
+                os.environ.update(environment)
+
+    def interrupt(self, forwarded_input):
+        with self.lock:
+            if forwarded_input is self.forwarded_input:
+                signal.pthread_kill(self.command_thread, signal.SIGINT)
+
+    def on_interrupt(self, signum, frame):
+        if self.forwarded_input is not None:
+            raise KeyboardInterrupt
+
+
+def run_command(argv):
+    sys.argv = ['cpm'] + argv
+    try:
+        cpm.main()
+    except SystemExit as exit_request:
+        if exit_request.code is None or isinstance(exit_request.code, int):
+            return exit_request.code or 0
+        print(exit_request.code, file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print('\rcpm: cancelled')
+        return INTERRUPTED_EXIT_CODE
+    except Exception:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+class _ForwardedInput(object):
+    def __init__(self, stream, daemon):
+        self.stream = stream
+        self.daemon = daemon
+        self.finished = False
+        self.chunks = queue.Queue()
+
+    def __enter__(self):
+        read_end, self.write_end = os.pipe()
+        self.saved_descriptor = os.dup(0)
+        os.dup2(read_end, 0)
+        os.close(read_end)
+        threading.Thread(target=self.__receive, daemon=True).start()
+        threading.Thread(target=self.__write, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.finished = True
+        os.dup2(self.saved_descriptor, 0)
+        os.close(self.saved_descriptor)
+        self.chunks.put(None)
+
+    def __receive(self):
+        try:
+            for kind, payload in _receive_frames(self.stream):
+                if kind == INPUT_FRAME:
+                    self.chunks.put(payload)
+                elif kind == INTERRUPT_FRAME:
+                    self.daemon.interrupt(self)
+        except (OSError, ValueError):
+            pass
+        if not self.finished:
+            self.daemon.interrupt(self)
+
+    def __write(self):
+        for chunk in iter(self.chunks.get, None):
+            try:
+                if not chunk:
+                    break
+                os.write(self.write_end, chunk)
+            except OSError:
+                break
+        os.close(self.write_end)
+
+
+class _FrameSender(object):
+    def __init__(self, connection):
+        self.connection = connection
+        self.lock = threading.Lock()
+
+    def send(self, kind, payload=b''):
+        with self.lock:
+            _send_frame(self.connection, kind, payload)
+
+
+class _RedirectedOutput(object):
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        read_end, write_end = os.pipe()
+        self.saved_descriptors = os.dup(1), os.dup(2)
+        os.dup2(write_end, 1)
+        os.dup2(write_end, 2)
+        os.close(write_end)
+        self.forwarder = threading.Thread(target=self.__forward, args=(read_end,))
+        self.forwarder.start()
+        return self
+
+    def __exit__(self, *args):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for descriptor, saved_descriptor in zip((1, 2), self.saved_descriptors):
+            os.dup2(saved_descriptor, descriptor)
+            os.close(saved_descriptor)
+        self.forwarder.join()
+
+    def __forward(self, read_end):
+        with os.fdopen(read_end, 'rb', buffering=0) as output:
+            for chunk in iter(lambda: output.read(65536), b''):
+                try:
+                    _send_frame(self.connection, OUTPUT_FRAME, chunk)
+                except OSError:
+                    pass
+
+
+def _ignore_disconnection(call):
+    try:
+        call()
+    except OSError:
+        pass
+
+
+def _create_private_directory(directory):
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not _is_private_directory(directory):
+        raise UnsafeDaemonDirectory(directory)
+
+
+def _is_private_directory(directory):
+    try:
+        directory_stat = os.lstat(directory)
+    except OSError:
+        return False
+    return stat.S_ISDIR(directory_stat.st_mode) and \
+        directory_stat.st_uid == os.getuid() and \
+        stat.S_IMODE(directory_stat.st_mode) == 0o700
+
+
+def _connect(path):
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        raise
+    return connection
+
+
+def _send_request(connection, request):
+    connection.sendall(json.dumps(request).encode() + b'\n')
+
+
+def _send_frame(connection, kind, payload):
+    connection.sendall(FRAME_HEADER.pack(kind, len(payload)) + payload)
+
+
+def _receive_frames(stream):
+    while True:
+        header = stream.read(FRAME_HEADER.size)
+        if len(header) < FRAME_HEADER.size:
+            return
+        kind, length = FRAME_HEADER.unpack(header)
+        yield kind, stream.read(length)
+
+
+class DaemonStartFailure(RuntimeError):
+    pass
+
+
+class UnsafeDaemonDirectory(DaemonStartFailure):
+    def __init__(self, directory):
+        self.directory = directory
+        super().__init__(f'{directory} must be a directory only accessible by the current user')
@@ -0,0 +1,32 @@
+import json
+import os
+import threading
+import time
+
+_stream = None
+_lock = threading.Lock()
+
+
+def start(file_name):
+    global _stream
+    _stream = open(file_name, 'a', buffering=1)
+
+
+def stop():
+    global _stream
+    stream, _stream = _stream, None
+    if stream is not None:
+        stream.close()
+
+
+def is_enabled():
+    return _stream is not None
+
+
+def emit(event, **fields):
+    stream = _stream
+    if stream is None:
+        return
+    line = json.dumps({'event': event, 'time': time.time(), 'pid': os.getpid(), **fields}, default=str)
+    with _lock:
+        stream.write(line + '\n')
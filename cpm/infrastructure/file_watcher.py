@@ -0,0 +1,182 @@
+import ctypes
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+
+from cpm.infrastructure.source_index import IGNORED_DIRECTORIES
+
+SETTLE_TIME = 0.1
+POLL_INTERVAL = 0.5
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+@dataclass
+class Changes:
+    added: set = field(default_factory=set)
+    removed: set = field(default_factory=set)
+    modified: set = field(default_factory=set)
+
+    def paths(self):
+        return self.added | self.removed | self.modified
+
+    def normalized(self):
+        replaced = self.added & self.removed
+        added = self.added - replaced
+        removed = self.removed - replaced
+        return Changes(added, removed, (self.modified | replaced) - added - removed)
+
+
+def file_watcher(files, directories):
+    if _libc() is not None:
+        return InotifyWatcher(files, directories)
+    return PollingWatcher(files, directories)
+
+
+class PollingWatcher(object):
+    def __init__(self, files, directories, interval=POLL_INTERVAL):
+        self.files = [os.path.normpath(f) for f in files]
+        self.directories = [os.path.normpath(d) for d in directories]
+        self.interval = interval
+        self.snapshot = self.take_snapshot()
+
+    def wait_for_changes(self):
+        while True:
+            time.sleep(self.interval)
+            snapshot = self.take_snapshot()
+            changes = Changes(
+                added=set(snapshot) - set(self.snapshot),
+                removed=set(self.snapshot) - set(snapshot),
+                modified={path for path in snapshot.keys() & self.snapshot.keys() if snapshot[path] != self.snapshot[path]}
+            )
+            self.snapshot = snapshot
+            if changes.paths():
+                return changes
+
+    def close(self):
+        pass
+
+    def take_snapshot(self):
+        snapshot = {}
+        for file_name in self.files:
+            _add_file_stat(snapshot, file_name)
+        for directory in self.directories:
+            for file_name in _walk_files(directory):
+                _add_file_stat(snapshot, file_name)
+        return snapshot
+
+
+class InotifyWatcher(object):
+    def __init__(self, files, directories):
+        self.files = {os.path.normpath(f) for f in files}
+        self.descriptor = _libc().inotify_init1(os.O_CLOEXEC)
+        if self.descriptor < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watched_directories = {}
+        self.watched_paths = set()
+        self.recursive_directories = set()
+        for file_name in self.files:
+            self.watch(os.path.dirname(file_name) or '.')
+        for directory in directories:
+            self.watch_recursively(os.path.normpath(directory))
+
+    def watch(self, directory):
+        if directory in self.watched_paths:
+            return
+        self.watched_paths.add(directory)
+        watch_descriptor = _libc().inotify_add_watch(self.descriptor, os.fsencode(directory), WATCH_MASK)
+        if watch_descriptor >= 0:
+            self.watched_directories[watch_descriptor] = directory
+
+    def watch_recursively(self, directory):
+        if not os.path.isdir(directory):
+            return
+        self.recursive_directories.add(directory)
+        self.watch(directory)
+        for entry in os.scandir(directory):
+            if entry.is_dir(follow_symlinks=False) and entry.name not in IGNORED_DIRECTORIES:
+                self.watch_recursively(entry.path)
+
+    def wait_for_changes(self):
+        changes = Changes()
+        while not changes.paths():
+            select.select([self.descriptor], [], [])
+            while select.select([self.descriptor], [], [], SETTLE_TIME)[0]:
+                self.read_events(changes)
+        return changes.normalized()
+
+    def close(self):
+        os.close(self.descriptor)
+
+    def read_events(self, changes):
+        buffer = os.read(self.descriptor, 65536)
+        offset = 0
+        while offset < len(buffer):
+            watch_descriptor, mask, _, length = EVENT_HEADER.unpack_from(buffer, offset)
+            name = os.fsdecode(buffer[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0'))
+            offset += EVENT_HEADER.size + length
+            directory = self.watched_directories.get(watch_descriptor)
+            if mask & IN_Q_OVERFLOW:
+                changes.modified.update(self.files)
+            elif directory is not None:
+                self.record_event(changes, os.path.normpath(os.path.join(directory, name)), directory, mask)
+
+    def record_event(self, changes, path, directory, mask):
+        is_recursive = directory in self.recursive_directories
+        if mask & IN_ISDIR:
+            if is_recursive and mask & (IN_CREATE | IN_MOVED_TO) and os.path.basename(path) not in IGNORED_DIRECTORIES:
+                self.watch_recursively(path)
+                changes.added.update(_walk_files(path))
+            return
+        if not is_recursive and path not in self.files:
+            return
+        if mask & (IN_CREATE | IN_MOVED_TO):
+            changes.added.add(path)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            changes.removed.add(path)
+        else:
+            changes.modified.add(path)
+
+
+def _walk_files(directory):
+    try:
+        entries = list(os.scandir(directory))
+    except (FileNotFoundError, NotADirectoryError):
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in IGNORED_DIRECTORIES:
+                yield from _walk_files(entry.path)
+        else:
+            yield os.path.normpath(entry.path)
+
+
+def _add_file_stat(snapshot, file_name):
+    try:
+        stat = os.stat(file_name)
+        snapshot[file_name] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        pass
+
+
+_libc_handle = None
+
+
+def _libc():
+    global _libc_handle
+    if _libc_handle is None:
+        handle = ctypes.CDLL(None, use_errno=True) if sys.platform.startswith('linux') else None
+        _libc_handle = handle if handle is not None and hasattr(handle, 'inotify_init1') else False
+    return _libc_handle or None
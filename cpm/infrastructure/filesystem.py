@@ -1,8 +1,8 @@
+import hashlib
 import os
 import shutil
 import zipfile
 import io
-from distutils.dir_util import copy_tree
 from pathlib import Path
 
 
@@ -16,6 +16,21 @@ def write_file(file_name, contents=''):
         f.write(contents)
 
 
+def write_file_if_changed(file_name, contents=''):
+    data = contents.encode()
+    try:
+        with open(file_name, 'rb') as file_stream:
+            if hashlib.sha256(file_stream.read()).digest() == hashlib.sha256(data).digest():
+                return False
+    except OSError:
+        pass
+    temporary_file = f'{file_name}.{os.getpid()}.tmp'
+    with open(temporary_file, 'wb') as file_stream:
+        file_stream.write(data)
+    os.replace(temporary_file, file_name)
+    return True
+
+
 def read_file(file_name, mode='r'):
     with open(file_name, mode) as file_stream:
         return file_stream.read()
@@ -38,6 +53,7 @@ def create_directory(path):
 
 
 def copy_directory(origin, destination):
+    from distutils.dir_util import copy_tree
     copy_tree(origin, destination)
 
 
@@ -1,9 +1,10 @@
 from dataclasses import dataclass
-from urllib3.exceptions import InsecureRequestWarning
-import requests
 
+from cpm.infrastructure import profiler
+
+_requests = None
+_session = None
 
-requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
 @dataclass
 class HttpResponse:
@@ -12,24 +13,48 @@ class HttpResponse:
 
 
 def post(url, data=None, headers=None, files=None):
+    requests = _requests_module()
     try:
-        response = requests.post(url, files=files, data=data, headers=headers, verify=False)
+        with profiler.span('POST', 'http', url=url) as span_args:
+            response = _http_session().post(url, files=files, data=data, headers=headers, verify=False)
+            span_args.update(status_code=response.status_code, bytes=len(response.content))
         return HttpResponse(response.status_code, response.text)
     except requests.exceptions.ConnectionError as e:
         raise HttpConnectionError()
 
 
 def put(url, data=None, headers=None, files=None):
-    requests.put(url, files=files, data=data, headers=headers, verify=False)
+    with profiler.span('PUT', 'http', url=url):
+        _http_session().put(url, files=files, data=data, headers=headers, verify=False)
 
 
 def get(url, data=None, headers=None, files=None):
+    requests = _requests_module()
     try:
-        response = requests.get(url, files=files, data=data, headers=headers, verify=False)
+        with profiler.span('GET', 'http', url=url) as span_args:
+            response = _http_session().get(url, files=files, data=data, headers=headers, verify=False)
+            span_args.update(status_code=response.status_code, bytes=len(response.content))
         return HttpResponse(response.status_code, response.text)
     except requests.exceptions.ConnectionError:
         raise HttpConnectionError(url)
 
 
+def _requests_module():
+    global _requests
+    if _requests is None:
+        import requests
+        from urllib3.exceptions import InsecureRequestWarning
+        requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
+        _requests = requests
+    return _requests
+
+
+def _http_session():
+    global _session
+    if _session is None:
+        _session = _requests_module().Session()
+    return _session
+
+
 class HttpConnectionError(RuntimeError):
     pass
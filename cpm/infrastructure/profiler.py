@@ -0,0 +1,81 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from cpm.infrastructure import events
+
+NOT_STAGE_CATEGORIES = ('command', 'test')
+
+_trace = None
+
+
+class Trace(object):
+    def __init__(self, file_name):
+        self.file_name = file_name
+        self.origin = time.perf_counter_ns()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def add_span(self, name, category, start, end, args):
+        event = {
+            'name': name,
+            'cat': category,
+            'ph': 'X',
+            'ts': (start - self.origin) / 1000,
+            'dur': (end - start) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def save(self):
+        with open(self.file_name, 'w') as trace_file:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, trace_file)
+
+
+def start(file_name):
+    global _trace
+    _trace = Trace(file_name)
+
+
+def stop():
+    global _trace
+    trace, _trace = _trace, None
+    if trace is not None:
+        trace.save()
+
+
+def is_enabled():
+    return _trace is not None
+
+
+@contextmanager
+def span(name, category='cpm', **args):
+    trace = _trace
+    if trace is None and not events.is_enabled():
+        yield args
+        return
+    start_time = time.perf_counter_ns()
+    try:
+        yield args
+    finally:
+        end_time = time.perf_counter_ns()
+        if trace is not None:
+            trace.add_span(name, category, start_time, end_time, args)
+        if category not in NOT_STAGE_CATEGORIES:
+            events.emit('stage', name=name, category=category, duration_ms=(end_time - start_time) / 1e6, **args)
+
+
+def profiled(name, category='cpm'):
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name, category):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
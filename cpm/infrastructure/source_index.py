@@ -0,0 +1,103 @@
+import os
+import pickle
+import time
+from fnmatch import fnmatchcase
+from pathlib import Path
+
+IGNORED_DIRECTORIES = ('build', '.git', '.hg', '.svn', '__pycache__')
+BUILD_DIRECTORY = 'build'
+INDEX_FILE = f'{BUILD_DIRECTORY}/.cpm/source_index.pickle'
+INDEX_VERSION = 1
+RACY_INTERVAL_NS = 2 * 10**9
+
+_indexes = {}
+
+
+class SourceIndex(object):
+    def __init__(self, directories=None):
+        self.directories = directories or {}
+        self.changed = False
+
+    def files(self, root):
+        found = []
+        pending = [str(Path(root))]
+        while pending:
+            directory = pending.pop()
+            files, subdirectories = self.entries(directory)
+            prefix = '' if directory == '.' else f'{directory}/'
+            found.extend(prefix + name for name in files)
+            pending.extend(prefix + name for name in reversed(subdirectories))
+        return found
+
+    def entries(self, directory):
+        key = os.path.abspath(directory)
+        try:
+            modification_time = os.stat(directory).st_mtime_ns
+        except OSError:
+            self.forget(key)
+            return [], []
+        cached = self.directories.get(key)
+        if cached is not None and cached[0] == modification_time:
+            return cached[1], cached[2]
+        files, subdirectories = _scan(directory)
+        if time.time_ns() - modification_time > RACY_INTERVAL_NS:
+            self.directories[key] = (modification_time, files, subdirectories)
+            self.changed = True
+        else:
+            self.forget(key)
+        return files, subdirectories
+
+    def forget(self, key):
+        if self.directories.pop(key, None) is not None:
+            self.changed = True
+
+
+def find(root, patterns):
+    return matching(index().files(root), patterns)
+
+
+def matching(files, patterns):
+    return [file_name for pattern in patterns for file_name in files if fnmatchcase(os.path.basename(file_name), pattern)]
+
+
+def index():
+    index_file = os.path.abspath(INDEX_FILE)
+    if index_file not in _indexes:
+        _indexes[index_file] = SourceIndex(_load_directories(index_file))
+    return _indexes[index_file]
+
+
+def save():
+    index_file = os.path.abspath(INDEX_FILE)
+    source_index = _indexes.get(index_file)
+    if source_index is None or not source_index.changed or not os.path.isdir(BUILD_DIRECTORY):
+        return
+    try:
+        os.makedirs(os.path.dirname(index_file), exist_ok=True)
+        with open(f'{index_file}.{os.getpid()}', 'wb') as index_stream:
+            pickle.dump((INDEX_VERSION, source_index.directories), index_stream, pickle.HIGHEST_PROTOCOL)
+        os.replace(f'{index_file}.{os.getpid()}', index_file)
+        source_index.changed = False
+    except OSError:
+        pass
+
+
+def _load_directories(index_file):
+    try:
+        with open(index_file, 'rb') as index_stream:
+            version, directories = pickle.load(index_stream)
+    except Exception:
+        return {}
+    return directories if version == INDEX_VERSION else {}
+
+
+def _scan(directory):
+    files = []
+    subdirectories = []
+    for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+        if entry.is_dir(follow_symlinks=False):
+            if entry.name not in IGNORED_DIRECTORIES:
+                subdirectories.append(entry.name)
+        elif entry.is_file():
+            files.append(entry.name)
+    return files, subdirectories
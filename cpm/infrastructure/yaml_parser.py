@@ -1,24 +1,45 @@
 from pathlib import Path
 
-from ruamel.yaml import YAML, RoundTripConstructor
+from ruamel.yaml import YAML, RoundTripConstructor, SafeConstructor
 from ruamel.yaml.nodes import SequenceNode, MappingNode
 
 
+class IncludeCache(object):
+    def __init__(self):
+        self.documents = {}
+        self.files = []
+        self.loading = []
+
+    def load(self, path, load_document, node=None):
+        key = path.resolve()
+        if key in [loading_key for loading_key, _ in self.loading]:
+            raise IncludeCycle(self.loading[-1][1], node, [name for _, name in self.loading] + [path.name])
+        if key not in self.documents:
+            if node is not None:
+                self.files.append(path)
+            self.loading.append((key, path.name))
+            try:
+                self.documents[key] = load_document()
+            finally:
+                self.loading.pop()
+        return self.documents[key]
+
+
 class CpmConstructor(RoundTripConstructor):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.add_constructor(u'!include', self.include)
-        self.files = []
-        self.child_parsers = []
+        self.includes = IncludeCache()
 
-    def include(self, loader, node):
-        y = loader.loader
-        yaml = YamlParser(typ=y.typ, pure=y.pure)
-        self.child_parsers.append(yaml)
-        yaml.composer.anchors = loader.composer.anchors
+    def include(self, node):
         path = Path(node.value)
-        self.files.append(path)
-        return yaml.load_from(path)
+        y = self.loader
+
+        def load_document():
+            yaml = YamlParser(typ=y.typ, pure=y.pure, includes=self.includes)
+            yaml.composer.anchors = y.composer.anchors
+            return yaml.load_document(path)
+
+        return self.includes.load(path, load_document, node)
 
     def construct_object(self, node, deep=False):
         data = super().construct_object(node, deep)
@@ -29,22 +50,74 @@ class CpmConstructor(RoundTripConstructor):
     def set_parsing_file(self, parsing_file):
         setattr(self, 'parsing_file', parsing_file)
 
-    def included_files(self):
-        return self.files + [f for p in self.child_parsers for f in p.included_files()]
+
+CpmConstructor.add_constructor(u'!include', CpmConstructor.include)
 
 
 class YamlParser(YAML):
-    def __init__(self, *args, **kwargs):
+    def __init__(self, *args, includes=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.Constructor = CpmConstructor
+        self.includes = includes or IncludeCache()
+
+    def get_constructor_parser(self, stream):
+        constructor, parser = super().get_constructor_parser(stream)
+        constructor.includes = self.includes
+        return constructor, parser
 
     def load_from(self, stream):
+        return self.includes.load(stream, lambda: self.load_document(stream))
+
+    def load_document(self, stream):
         setattr(self, 'parsing_file', stream)
         self.constructor.set_parsing_file(stream.name)
         return self.load(stream)
 
     def included_files(self):
-        return self.constructor.included_files()
+        return list(self.includes.files)
+
+
+class FastCpmConstructor(SafeConstructor):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.includes = IncludeCache()
+
+    def include(self, node):
+        path = Path(node.value)
+        return self.includes.load(path, lambda: FastYamlParser(includes=self.includes).load_document(path), node)
+
+
+FastCpmConstructor.add_constructor(u'!include', FastCpmConstructor.include)
+
+
+class FastYamlParser(YAML):
+    def __init__(self, includes=None):
+        super().__init__(typ='safe', pure=False)
+        self.Constructor = FastCpmConstructor
+        self.includes = includes or IncludeCache()
+
+    def get_constructor_parser(self, stream):
+        constructor, parser = super().get_constructor_parser(stream)
+        constructor.includes = self.includes
+        return constructor, parser
+
+    def load_from(self, stream):
+        return self.includes.load(stream, lambda: self.load_document(stream))
+
+    def load_document(self, stream):
+        return self.load(stream)
+
+    def included_files(self):
+        return list(self.includes.files)
+
+
+class IncludeCycle(RuntimeError):
+    def __init__(self, parsing_file, node, cycle):
+        super(IncludeCycle, self).__init__(' -> '.join(cycle))
+        self.parsing_file = parsing_file
+        self.line = node.start_mark.line
+        self.col = node.start_mark.column
+        self.cycle = cycle
 
 
 def load(path):
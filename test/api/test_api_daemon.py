@@ -0,0 +1,62 @@
+import unittest
+import mock
+
+from cpm.api.daemon import manage_daemon
+from cpm.api.result import OK, FAIL
+from cpm.infrastructure.daemon import DaemonStartFailure, UnsafeDaemonDirectory
+
+
+class TestApiDaemon(unittest.TestCase):
+    def test_start_daemon_when_it_is_not_running(self):
+        daemon_control = mock.MagicMock()
+        daemon_control.is_running.return_value = False
+
+        result = manage_daemon(daemon_control, 'start')
+
+        assert result.status_code == OK
+        daemon_control.start.assert_called_once()
+
+    def test_start_fails_when_daemon_is_already_running(self):
+        daemon_control = mock.MagicMock()
+        daemon_control.is_running.return_value = True
+
+        result = manage_daemon(daemon_control, 'start')
+
+        assert result.status_code == FAIL
+        daemon_control.start.assert_not_called()
+
+    def test_start_fails_when_daemon_does_not_come_up(self):
+        daemon_control = mock.MagicMock()
+        daemon_control.is_running.return_value = False
+        daemon_control.start.side_effect = DaemonStartFailure
+
+        result = manage_daemon(daemon_control, 'start')
+
+        assert result.status_code == FAIL
+
+    def test_start_fails_when_the_socket_directory_is_not_private(self):
+        daemon_control = mock.MagicMock()
+        daemon_control.is_running.return_value = False
+        daemon_control.start.side_effect = UnsafeDaemonDirectory('/tmp/cpm-1000')
+
+        result = manage_daemon(daemon_control, 'start')
+
+        assert result == (FAIL, 'error: /tmp/cpm-1000 must be a directory only accessible by the current user')
+
+    def test_stop_fails_when_daemon_is_not_running(self):
+        daemon_control = mock.MagicMock()
+        daemon_control.is_running.return_value = False
+
+        result = manage_daemon(daemon_control, 'stop')
+
+        assert result.status_code == FAIL
+        daemon_control.stop.assert_not_called()
+
+    def test_stop_running_daemon(self):
+        daemon_control = mock.MagicMock()
+        daemon_control.is_running.return_value = True
+
+        result = manage_daemon(daemon_control, 'stop')
+
+        assert result.status_code == OK
+        daemon_control.stop.assert_called_once()
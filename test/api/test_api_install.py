@@ -5,6 +5,7 @@ from cpm.api.install import install_bit
 from cpm.api.install import install_project_bits
 from cpm.api.result import OK
 from cpm.api.result import FAIL
+from cpm.domain.bit_resolver import BitConflict
 from cpm.infrastructure.cpm_hub_connector_v1 import BitNotFound
 from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound, ParseError
 from cpm.infrastructure.http_client import HttpConnectionError
@@ -95,4 +96,11 @@ class TestApiInstall(unittest.TestCase):
 
         assert result.status_code == FAIL
 
+    def test_bit_install_of_all_bits_in_project_fails_when_bit_versions_conflict(self):
+        install_service = mock.MagicMock()
+        install_service.install_all.side_effect = BitConflict('log', [('<project>', '1.0'), ('app', '2.0')])
+
+        result = install_project_bits(install_service)
 
+        assert result.status_code == FAIL
+        assert result.message == 'error: conflicting versions of bit log required: 1.0 by <project>, 2.0 by app'
@@ -1,11 +1,13 @@
 import unittest
 import mock
 
+from cpm.api.result import FAIL
 from cpm.api.test import run_tests
 from cpm.domain.project_commands import BuildError
 from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound, ParseError
 from cpm.domain.project_commands import TestsFailed
 from cpm.domain.test_service import NoTestsFound
+from cpm.domain.test_index import TestSelection, TestNotFound
 
 
 class TestApiTest(unittest.TestCase):
@@ -85,3 +87,12 @@ class TestApiTest(unittest.TestCase):
 
         assert result.status_code == 0
         test_service.run_tests.assert_called_once_with((), 'default', ['arg1'])
+
+    def test_run_tests_fails_when_no_tests_match_the_selection(self):
+        test_service = mock.MagicMock()
+        test_service.run_tests.side_effect = TestNotFound('-k parser')
+
+        result = run_tests(test_service, files_or_dirs=TestSelection(keyword='parser'))
+
+        assert result.status_code == FAIL
+        assert result.message == 'error: no tests match -k parser'
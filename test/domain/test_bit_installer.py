@@ -7,8 +7,9 @@ from cpm.domain.bit_installer import BitInstaller
 
 
 class TestBitInstaller(unittest.TestCase):
+    @mock.patch('cpm.domain.bit_installer.bit_sources')
     @mock.patch('cpm.domain.bit_installer.filesystem')
-    def test_bit_installation_when_bit_was_not_installed_before(self, filesystem):
+    def test_bit_installation_when_bit_was_not_installed_before(self, filesystem, bit_sources):
         project_loader = mock.MagicMock()
         installer = BitInstaller(project_loader)
         bit_download = BitDownload("cest", "1.0", "Yml0IHBheWxvYWQ=")
@@ -19,9 +20,11 @@ class TestBitInstaller(unittest.TestCase):
 
         filesystem.create_directory.assert_called_once_with('bits/cest/1.0')
         filesystem.unzips.assert_called_once_with(b'bit payload', 'bits/cest/1.0')
+        bit_sources.write_manifest.assert_called_once_with('bits/cest/1.0')
 
+    @mock.patch('cpm.domain.bit_installer.bit_sources')
     @mock.patch('cpm.domain.bit_installer.filesystem')
-    def test_bit_installation_when_bit_was_installed_before(self, filesystem):
+    def test_bit_installation_when_bit_was_installed_before(self, filesystem, bit_sources):
         project_loader = mock.MagicMock()
         installer = BitInstaller(project_loader)
         bit_download = BitDownload("cest", "1.0", "Yml0IHBheWxvYWQ=")
@@ -33,3 +36,4 @@ class TestBitInstaller(unittest.TestCase):
         filesystem.remove_directory.assert_called_once_with('bits/cest/1.0')
         filesystem.create_directory.assert_called_once_with('bits/cest/1.0')
         filesystem.unzips.assert_called_once_with(b'bit payload', 'bits/cest/1.0')
+        bit_sources.write_manifest.assert_called_once_with('bits/cest/1.0')
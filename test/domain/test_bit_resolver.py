@@ -0,0 +1,138 @@
+import unittest
+import mock
+
+from cpm.domain import bit_resolver
+from cpm.domain.bit_resolver import BitResolver, BitConflict, BitCycle, InvalidVersionConstraint, BUILD, TEST
+from cpm.domain.project.project_descriptor import ProjectDescriptor, DeclaredBit
+from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound
+
+
+def bit(name, version, *dependencies):
+    descriptor = ProjectDescriptor(name=name, version=version)
+    descriptor.build.declared_bits = [DeclaredBit(*dependency) for dependency in dependencies]
+    return descriptor
+
+
+class TestBitResolver(unittest.TestCase):
+    def setUp(self):
+        self.bits = {}
+        self.descriptor_repository = mock.MagicMock()
+        self.descriptor_repository.descriptor.side_effect = self.descriptor
+
+    def descriptor(self, directory):
+        if directory not in self.bits:
+            raise ProjectDescriptorNotFound()
+        return self.bits[directory]
+
+    def install(self, *descriptors):
+        for descriptor in descriptors:
+            self.bits[f'bits/{descriptor.name}/{descriptor.version}'] = descriptor
+
+    def project(self, build=(), test=()):
+        project_descriptor = ProjectDescriptor(name='project')
+        project_descriptor.build.declared_bits = [DeclaredBit(*declared_bit) for declared_bit in build]
+        project_descriptor.test.declared_bits = [DeclaredBit(*declared_bit) for declared_bit in test]
+        return project_descriptor
+
+    def test_shared_dependencies_are_resolved_once_and_ordered_before_their_dependents(self):
+        self.install(bit('app', '1.0', ('net', '2.0'), ('log', '1.0')), bit('net', '2.0', ('log', '1.0')), bit('log', '1.0'))
+        resolver = BitResolver(self.descriptor_repository)
+
+        resolution = resolver.resolve(self.project(build=[('app', '1.0')]))
+
+        assert resolution.order == ['log', 'net', 'app']
+        assert list(resolution.bits(BUILD)) == ['log', 'net', 'app']
+        assert self.descriptor_repository.descriptor.call_count == 3
+
+    def test_test_bits_exclude_the_ones_already_built_for_the_target(self):
+        self.install(bit('app', '1.0', ('log', '1.0')), bit('cest', '1.0', ('log', '1.0')), bit('log', '1.0'))
+        resolver = BitResolver(self.descriptor_repository)
+
+        resolution = resolver.resolve(self.project(build=[('app', '1.0')], test=[('cest', '1.0')]))
+
+        assert list(resolution.bits(BUILD)) == ['log', 'app']
+        assert list(resolution.bits(TEST)) == ['cest']
+
+    def test_conflicting_exact_versions_are_reported(self):
+        self.install(bit('app', '1.0', ('log', '2.0')), bit('log', '1.0'), bit('log', '2.0'))
+        resolver = BitResolver(self.descriptor_repository)
+
+        with self.assertRaises(BitConflict) as conflict:
+            resolver.resolve(self.project(build=[('log', '1.0'), ('app', '1.0')]))
+
+        assert conflict.exception.requirements == [('<project>', '1.0'), ('app', '2.0')]
+
+    def test_equivalent_versions_do_not_conflict(self):
+        self.install(bit('app', '1.0', ('log', '1.0.0')), bit('log', '1.0'))
+        resolver = BitResolver(self.descriptor_repository)
+
+        resolution = resolver.resolve(self.project(build=[('log', '1.0'), ('app', '1.0')]))
+
+        assert resolution.nodes['log'].version == '1.0'
+
+    def test_dependency_cycles_are_reported(self):
+        self.install(bit('a', '1.0', ('b', '1.0')), bit('b', '1.0', ('a', '1.0')))
+        resolver = BitResolver(self.descriptor_repository)
+
+        with self.assertRaises(BitCycle) as cycle:
+            resolver.resolve(self.project(build=[('a', '1.0')]))
+
+        assert cycle.exception.cycle == ['a', 'b', 'a']
+
+    @mock.patch('cpm.domain.bit_resolver.filesystem')
+    def test_ranges_select_the_highest_installed_version_satisfying_them(self, filesystem):
+        filesystem.list_directories.return_value = ['1.2.0', '1.9.3', '2.0.0']
+        self.install(bit('log', '1.9.3'))
+        resolver = BitResolver(self.descriptor_repository)
+
+        resolution = resolver.resolve(self.project(build=[('log', '^1.2')]))
+
+        assert resolution.nodes['log'].version == '1.9.3'
+        filesystem.list_directories.assert_called_once_with('bits/log')
+
+    @mock.patch('cpm.domain.bit_resolver.filesystem')
+    def test_ranges_are_resolved_against_every_requirement_of_the_bit(self, filesystem):
+        filesystem.list_directories.return_value = ['1.2.0', '1.5.0']
+        self.install(bit('app', '1.0', ('log', '1.2.0')), bit('log', '1.2.0'), bit('log', '1.5.0'))
+        resolver = BitResolver(self.descriptor_repository)
+
+        resolution = resolver.resolve(self.project(build=[('log', '^1.0'), ('app', '1.0')]))
+
+        assert resolution.nodes['log'].version == '1.2.0'
+        assert resolution.nodes['log'].requirements == [('<project>', '^1.0'), ('app', '1.2.0')]
+        assert resolution.order == ['log', 'app']
+
+    def test_missing_bits_are_reported_without_failing(self):
+        resolver = BitResolver(self.descriptor_repository)
+
+        resolution = resolver.resolve(self.project(build=[('log', '1.0')]))
+
+        assert [declared_bit.name for declared_bit in resolution.missing] == ['log']
+        assert resolution.bits(BUILD) == {}
+
+    def test_missing_bits_are_fetched_when_a_fetcher_is_given(self):
+        def fetch_bit(name, version):
+            self.install(bit(name, '1.4.0'))
+            return '1.4.0'
+        resolver = BitResolver(self.descriptor_repository, fetch_bit=fetch_bit)
+
+        resolution = resolver.resolve(self.project(build=[('log', '>=1.0, <2')]))
+
+        assert resolution.nodes['log'].version == '1.4.0'
+
+    def test_satisfies_version_constraints(self):
+        assert bit_resolver.satisfies('1.2.3', '1.2.3')
+        assert bit_resolver.satisfies('1.0.0', '1.0')
+        assert bit_resolver.satisfies('1.5.0', '^1.2')
+        assert not bit_resolver.satisfies('2.0.0', '^1.2')
+        assert bit_resolver.satisfies('0.2.9', '^0.2.1')
+        assert not bit_resolver.satisfies('0.3.0', '^0.2.1')
+        assert bit_resolver.satisfies('1.2.9', '~1.2')
+        assert not bit_resolver.satisfies('1.3.0', '~1.2')
+        assert bit_resolver.satisfies('1.5.0', '>=1.0, <2.0')
+        assert not bit_resolver.satisfies('2.0.0', '>=1.0, <2.0')
+        assert bit_resolver.satisfies('3.0.0', 'latest')
+
+    def test_invalid_version_constraints_are_reported(self):
+        with self.assertRaises(InvalidVersionConstraint):
+            bit_resolver.satisfies('1.0.0', '>=one')
@@ -0,0 +1,57 @@
+import unittest
+import mock
+
+from cpm.domain import bit_sources
+from test.temporary_directory import InTemporaryDirectory
+
+
+class TestBitSources(InTemporaryDirectory, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.create('bits/cest/1.0/cest/cest.cpp', 'bits/cest/1.0/cest/runner.c', 'bits/cest/1.0/cest/cest.h',
+                    'bits/cest/1.0/extra/extra.cpp', 'bits/cest/1.0/main.cpp')
+
+    def create(self, *file_names):
+        for file_name in file_names:
+            self.write(file_name)
+
+    def test_package_sources_are_read_from_the_manifest_without_walking_the_bit(self):
+        bit_sources.write_manifest('bits/cest/1.0')
+
+        with mock.patch('os.scandir') as scandir:
+            sources = bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/cest')
+
+        assert sources == ['bits/cest/1.0/cest/cest.cpp', 'bits/cest/1.0/cest/runner.c']
+        scandir.assert_not_called()
+
+    def test_package_at_the_root_of_the_bit_gets_every_source(self):
+        bit_sources.write_manifest('bits/cest/1.0')
+
+        sources = bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/.')
+
+        assert sources == [
+            'bits/cest/1.0/main.cpp',
+            'bits/cest/1.0/cest/cest.cpp',
+            'bits/cest/1.0/extra/extra.cpp',
+            'bits/cest/1.0/cest/runner.c'
+        ]
+
+    def test_nested_packages_get_the_sources_below_their_directory(self):
+        self.create('bits/cest/1.0/extra/nested/nested.cpp')
+        bit_sources.write_manifest('bits/cest/1.0')
+
+        assert bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/extra') == ['bits/cest/1.0/extra/extra.cpp', 'bits/cest/1.0/extra/nested/nested.cpp']
+        assert bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/extra/nested') == ['bits/cest/1.0/extra/nested/nested.cpp']
+        assert bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/ext') == []
+
+    def test_manifest_is_grouped_by_directory_once_for_every_package_of_the_bit(self):
+        bit_sources.write_manifest('bits/cest/1.0')
+
+        with mock.patch('cpm.domain.bit_sources._sources_by_directory', wraps=bit_sources._sources_by_directory) as sources_by_directory:
+            bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/cest')
+            bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/extra')
+
+        sources_by_directory.assert_called_once()
+
+    def test_bits_installed_without_manifest_have_no_known_sources(self):
+        assert bit_sources.package_sources('bits/cest/1.0', 'bits/cest/1.0/cest') is None
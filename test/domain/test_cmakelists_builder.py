@@ -1,5 +1,10 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+from cpm.domain.constants import CMAKELISTS
+from cpm.infrastructure import filesystem
 from cpm.domain.cmake.cmakelists_builder import CMakeListsBuilder
 from cpm.domain.project.project import Project, Target, Package, Test, TestSuite
 
@@ -51,7 +56,13 @@ class TestCmakelistsBuilder(unittest.TestCase):
         assert 'set_target_properties(package_c_object_library PROPERTIES COMPILE_FLAGS "-DHOLA")' in cmakelists_content
         assert 'add_library(package_cpp_object_library OBJECT file.cpp)' in cmakelists_content
         assert 'link_libraries(pthread)' in cmakelists_content
-        assert 'add_executable(Project main.cpp $<TARGET_OBJECTS:bit_package_c_object_library> $<TARGET_OBJECTS:bit_package_cpp_object_library> $<TARGET_OBJECTS:package_c_object_library> $<TARGET_OBJECTS:package_cpp_object_library>)' in cmakelists_content
+        assert ('set(CPM_TARGET_OBJECTS\n'
+                '    $<TARGET_OBJECTS:bit_package_c_object_library>\n'
+                '    $<TARGET_OBJECTS:bit_package_cpp_object_library>\n'
+                '    $<TARGET_OBJECTS:package_c_object_library>\n'
+                '    $<TARGET_OBJECTS:package_cpp_object_library>\n'
+                ')\n') in cmakelists_content
+        assert 'add_executable(Project main.cpp ${CPM_TARGET_OBJECTS})' in cmakelists_content
         assert 'set_target_properties(Project PROPERTIES COMPILE_FLAGS "-std=c++11")' in cmakelists_content
         assert 'target_link_options(Project PUBLIC "-Wl,--wrap=malloc")' in cmakelists_content
         assert 'include_directories(package spdlog)' in cmakelists_content
@@ -59,7 +70,12 @@ class TestCmakelistsBuilder(unittest.TestCase):
         assert 'add_library(test_bit_package_c_object_library OBJECT test_bit.c)' in cmakelists_content
         assert 'set_target_properties(test_bit_package_c_object_library PROPERTIES COMPILE_FLAGS "-DTEST_BIT_HELLO")' in cmakelists_content
         assert 'add_library(test_bit_package_cpp_object_library OBJECT test_bit.cpp)' in cmakelists_content
-        assert 'add_executable(test_case test_case.cpp $<TARGET_OBJECTS:bit_package_c_object_library> $<TARGET_OBJECTS:bit_package_cpp_object_library> $<TARGET_OBJECTS:package_c_object_library> $<TARGET_OBJECTS:package_cpp_object_library> $<TARGET_OBJECTS:bits_mock_cpp_object_library> $<TARGET_OBJECTS:test_bit_package_c_object_library> $<TARGET_OBJECTS:test_bit_package_cpp_object_library>)' in cmakelists_content
+        assert ('set(CPM_TEST_OBJECTS\n'
+                '    $<TARGET_OBJECTS:bits_mock_cpp_object_library>\n'
+                '    $<TARGET_OBJECTS:test_bit_package_c_object_library>\n'
+                '    $<TARGET_OBJECTS:test_bit_package_cpp_object_library>\n'
+                ')\n') in cmakelists_content
+        assert 'add_executable(test_case test_case.cpp ${CPM_TARGET_OBJECTS} ${CPM_TEST_OBJECTS})' in cmakelists_content
         assert 'target_link_options(test_case PUBLIC "-Wl,--allow-multiple-definition")' in cmakelists_content
         assert 'target_include_directories(test_case PUBLIC bits/cest bits/mock)' in cmakelists_content
         assert ('add_custom_target(tests\n'
@@ -68,6 +84,160 @@ class TestCmakelistsBuilder(unittest.TestCase):
                 ')\n') in cmakelists_content
 
 
+    def test_cmakelists_contents_do_not_depend_on_source_and_test_order(self):
+        def project_with(sources, tests):
+            builder = a_project('Project').with_target('default').with_package('package', sources, [])
+            for test in tests:
+                builder.with_test(test)
+            return builder.project
+
+        contents = CMakeListsBuilder().build_contents(project_with(['b.cpp', 'a.c', 'a.cpp'], ['test_b', 'test_a']))
+        shuffled_contents = CMakeListsBuilder().build_contents(project_with(['a.cpp', 'a.c', 'b.cpp'], ['test_a', 'test_b']))
+
+        assert 'add_library(package_cpp_object_library OBJECT a.cpp b.cpp)' in contents
+        assert contents == shuffled_contents
+        assert 'DEPENDS test_a test_b' in contents
+
+    def test_packages_sharing_include_directories_reference_a_single_variable(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine.cpp'], []) \
+            .with_package('render', ['render.cpp'], []) \
+            .project
+        include_directories = frozenset({'render', 'engine'})
+        for package in project.target.packages:
+            package.include_directories = include_directories
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert cmakelists_content.count('set(CPM_INCLUDE_DIRECTORIES_0\n    engine\n    render\n)\n') == 1
+        assert 'target_include_directories(engine_cpp_object_library PUBLIC ${CPM_INCLUDE_DIRECTORIES_0})' in cmakelists_content
+        assert 'target_include_directories(render_cpp_object_library PUBLIC ${CPM_INCLUDE_DIRECTORIES_0})' in cmakelists_content
+
+    def test_tests_link_one_static_library_per_package_in_static_link_mode(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine.cpp', 'engine.c'], []) \
+            .with_test_package('mocks', ['mocks/clock.cpp'], []) \
+            .with_test('test_engine') \
+            .project
+        project.test.link_mode = 'static'
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert 'add_executable(Project main.cpp ${CPM_TARGET_OBJECTS})' in cmakelists_content
+        assert 'add_library(engine_static_library STATIC $<TARGET_OBJECTS:engine_c_object_library> $<TARGET_OBJECTS:engine_cpp_object_library>)' in cmakelists_content
+        assert 'add_library(mocks_static_library STATIC $<TARGET_OBJECTS:mocks_cpp_object_library>)' in cmakelists_content
+        assert 'add_executable(test_engine test_engine.cpp)' in cmakelists_content
+        assert 'target_link_libraries(test_engine $<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--start-group> ${CPM_TEST_STATIC_LIBRARIES} ' \
+               '${CPM_TARGET_STATIC_LIBRARIES} $<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--end-group>)' in cmakelists_content
+        assert 'CMAKE_POSITION_INDEPENDENT_CODE' not in cmakelists_content
+
+    def test_executables_link_shared_libraries_in_shared_link_mode(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_libraries(['pthread']) \
+            .with_package('engine', ['engine.cpp'], []) \
+            .with_test('test_engine') \
+            .project
+        project.target.link_mode = 'shared'
+        project.test.link_mode = 'shared'
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert 'set(CMAKE_POSITION_INDEPENDENT_CODE ON)' in cmakelists_content
+        assert cmakelists_content.count('add_library(engine_shared_library SHARED $<TARGET_OBJECTS:engine_cpp_object_library>)') == 1
+        assert 'add_executable(Project main.cpp)' in cmakelists_content
+        assert 'target_link_libraries(Project $<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--no-as-needed> ${CPM_TARGET_SHARED_LIBRARIES} pthread)' in cmakelists_content
+        assert 'target_link_libraries(test_engine $<$<NOT:$<PLATFORM_ID:Darwin>>:-Wl,--no-as-needed> ${CPM_TARGET_SHARED_LIBRARIES} pthread)' in cmakelists_content
+
+    def test_unity_build_packages_set_the_unity_build_properties_on_their_object_libraries(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine.cpp', 'engine.c'], []) \
+            .with_package('render', ['render.cpp'], []) \
+            .project
+        project.target.packages[0].unity_build = 16
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert 'set_target_properties(engine_cpp_object_library PROPERTIES UNITY_BUILD ON UNITY_BUILD_BATCH_SIZE 16)' in cmakelists_content
+        assert 'set_target_properties(engine_c_object_library PROPERTIES UNITY_BUILD ON UNITY_BUILD_BATCH_SIZE 16)' in cmakelists_content
+        assert 'render_cpp_object_library PROPERTIES UNITY_BUILD' not in cmakelists_content
+        assert cmakelists_content.startswith('cmake_minimum_required (VERSION 3.16)\n')
+
+    def test_precompiled_headers_are_added_to_cpp_object_libraries_and_shared_across_tests(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine.cpp', 'engine.c'], []) \
+            .with_test('test_b') \
+            .with_test('test_a') \
+            .project
+        project.target.packages[0].precompiled_headers = ('<vector>', 'engine/engine.h')
+        project.test.precompiled_headers = ('<gtest/gtest.h>',)
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert 'target_precompile_headers(engine_cpp_object_library PRIVATE "<vector>" engine/engine.h)' in cmakelists_content
+        assert 'engine_c_object_library PRIVATE' not in cmakelists_content
+        assert 'target_precompile_headers(test_a PRIVATE "<gtest/gtest.h>")' in cmakelists_content
+        assert 'target_precompile_headers(test_b REUSE_FROM test_a)' in cmakelists_content
+        assert cmakelists_content.startswith('cmake_minimum_required (VERSION 3.16)\n')
+
+    def test_cmake_3_13_is_enough_without_unity_builds_or_precompiled_headers(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine.cpp'], []) \
+            .with_test('test_engine') \
+            .project
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert cmakelists_content.startswith('cmake_minimum_required (VERSION 3.13)\n')
+
+    def test_test_precompiled_headers_require_cmake_3_16(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_test('test_engine') \
+            .project
+        project.test.precompiled_headers = ('<gtest/gtest.h>',)
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert cmakelists_content.startswith('cmake_minimum_required (VERSION 3.16)\n')
+
+    def test_compiler_cache_is_set_as_compiler_launcher(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .project
+        project.target.compiler_cache = 'ccache'
+
+        cmakelists_content = CMakeListsBuilder().build_contents(project)
+
+        assert 'project(Project)\nset(CMAKE_C_COMPILER_LAUNCHER ccache)\nset(CMAKE_CXX_COMPILER_LAUNCHER ccache)\n' in cmakelists_content
+
+    def test_cmakelists_is_only_written_when_its_contents_change(self):
+        directory = tempfile.mkdtemp()
+        current_directory = os.getcwd()
+        os.chdir(directory)
+        try:
+            project = a_project('Project').with_target('default').with_package('package', ['a.cpp'], []).project
+            CMakeListsBuilder().build(project)
+            os.utime(CMAKELISTS, ns=(0, 0))
+
+            CMakeListsBuilder().build(project)
+            assert os.stat(CMAKELISTS).st_mtime_ns == 0
+
+            project.target.packages[0].sources = ['a.cpp', 'b.cpp']
+            CMakeListsBuilder().build(project)
+            assert os.stat(CMAKELISTS).st_mtime_ns != 0
+            assert 'OBJECT a.cpp b.cpp' in filesystem.read_file(CMAKELISTS)
+            assert os.listdir('.') == [CMAKELISTS]
+        finally:
+            os.chdir(current_directory)
+            shutil.rmtree(directory)
+
+
 class TestProjectBuilder:
     def __init__(self, name):
         self.target_name = ''
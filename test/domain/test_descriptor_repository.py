@@ -0,0 +1,50 @@
+import unittest
+import mock
+
+from cpm.domain.project.descriptor_repository import DescriptorRepository
+from cpm.domain.project.project_descriptor import ProjectDescriptor
+from cpm.domain.project.project_descriptor_parser import ProjectDescriptorNotFound
+from test.temporary_directory import InTemporaryDirectory
+
+
+class TestDescriptorRepository(InTemporaryDirectory, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('project.yaml', 'name: project\n')
+
+    @mock.patch('cpm.domain.project.descriptor_repository.project_descriptor_parser.parse_from')
+    def test_descriptors_are_parsed_once_while_unchanged(self, parse_from):
+        parse_from.return_value = ProjectDescriptor('project')
+        repository = DescriptorRepository()
+
+        first = repository.descriptor('.')
+        second = repository.descriptor(self.directory)
+
+        parse_from.assert_called_once_with('.')
+        assert first is second
+
+    def test_descriptors_are_parsed_again_when_the_descriptor_changes(self):
+        repository = DescriptorRepository()
+        repository.descriptor('.')
+
+        self.write('project.yaml', 'name: renamed_project\n')
+
+        assert repository.descriptor('.').name == 'renamed_project'
+
+    def test_descriptors_are_parsed_again_when_an_included_file_changes(self):
+        self.write('project.yaml', 'name: project\nbuild:\n  cflags: !include cflags.yaml\n')
+        self.write('cflags.yaml', '[-DONE]\n')
+        repository = DescriptorRepository()
+        repository.descriptor('.')
+
+        self.write('cflags.yaml', '[-DONE, -DTWO]\n')
+
+        assert repository.descriptor('.').build.cflags == ['-DONE', '-DTWO']
+
+    def test_missing_descriptors_are_not_remembered(self):
+        repository = DescriptorRepository()
+
+        self.assertRaises(ProjectDescriptorNotFound, repository.descriptor, 'bits/bit/1.0')
+        self.write('bits/bit/1.0/project.yaml', 'name: bit\n')
+
+        assert repository.descriptor('bits/bit/1.0').name == 'bit'
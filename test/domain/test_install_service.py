@@ -0,0 +1,29 @@
+import unittest
+import mock
+
+from cpm.domain.bit_download import BitDownload
+from cpm.domain.install_service import InstallService
+
+
+class TestInstallService(unittest.TestCase):
+    def setUp(self):
+        self.bit_installer = mock.MagicMock()
+        self.cpm_hub_connector = mock.MagicMock()
+        self.install_service = InstallService(mock.MagicMock(), self.bit_installer, self.cpm_hub_connector, mock.MagicMock())
+
+    @mock.patch('cpm.domain.install_service.installed_version', return_value=None)
+    def test_ranges_that_are_not_installed_install_the_latest_version_satisfying_them(self, installed_version):
+        self.cpm_hub_connector.download_bit.return_value = BitDownload('log', '1.4.0', '')
+
+        assert self.install_service.install('log', '^1.2') == '1.4.0'
+
+        self.cpm_hub_connector.download_bit.assert_called_once_with('log', 'latest')
+        self.bit_installer.install.assert_called_once_with(self.cpm_hub_connector.download_bit.return_value)
+
+    @mock.patch('cpm.domain.install_service.installed_version', return_value=None)
+    def test_ranges_the_latest_version_does_not_satisfy_are_not_installed(self, installed_version):
+        self.cpm_hub_connector.download_bit.return_value = BitDownload('log', '2.0.0', '')
+
+        assert self.install_service.install('log', '^1.2') is None
+
+        self.bit_installer.install.assert_not_called()
@@ -0,0 +1,108 @@
+import unittest
+
+from cpm.domain.ninja.ninja_file_builder import NinjaFileBuilder
+from cpm.domain.project.project import Target, Package
+from test.domain.test_cmakelists_builder import a_project
+
+
+class TestNinjaFileBuilder(unittest.TestCase):
+    def test_compiles_every_package_source_with_header_dependencies(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_cppflags(['-std=c++17']) \
+            .with_package('engine', ['engine/engine.cpp', 'engine/clock.c'], ['-Wall']) \
+            .project
+        project.target.packages[0].cppflags = ('-std=c++17',)
+        project.target.packages[0].include_directories = frozenset({'engine'})
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert 'rule cxx\n  command = $launcher $cxx -MD -MF $out.d $flags $includes -c $in -o $out\n  depfile = $out.d\n  deps = gcc\n' in contents
+        assert 'build objects/engine/clock.c.o: cc ../engine/clock.c\n  flags = $cflags_1\n  includes = $includes_0\n' in contents
+        assert 'build objects/engine/engine.cpp.o: cxx ../engine/engine.cpp\n  flags = $cppflags_2\n  includes = $includes_0\n' in contents
+        assert 'includes_0 = -I../engine\n' in contents
+        assert 'build objects/main.cpp.o: cxx ../main.cpp\n  flags = -std=c++17\n' in contents
+        assert 'build Project: link objects/main.cpp.o objects/engine/clock.c.o objects/engine/engine.cpp.o\n' in contents
+        assert contents.endswith('default Project\n')
+
+    def test_tests_link_the_target_and_test_objects_with_their_libraries(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_libraries(['pthread']) \
+            .with_package('engine', ['engine/engine.cpp'], []) \
+            .with_test_package('mocks', ['mocks/clock.cpp'], []) \
+            .with_test('test_b') \
+            .with_test('test_a') \
+            .project
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert 'build test_a: link objects/test_a.cpp.o objects/engine/engine.cpp.o objects/mocks/clock.cpp.o\n  libs = -lpthread\n' in contents
+        assert 'build tests: phony test_a test_b\n' in contents
+
+    def test_packages_are_archived_in_static_link_mode(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine/engine.cpp'], []) \
+            .with_test('test_engine') \
+            .project
+        project.target.link_mode = 'static'
+        project.test.link_mode = 'static'
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert contents.count('build libraries/libengine.a: static objects/engine/engine.cpp.o\n') == 1
+        assert 'build test_engine: link objects/test_engine.cpp.o | libraries/libengine.a\n' in contents
+
+    def test_packages_are_compiled_position_independent_in_shared_link_mode(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('engine', ['engine/engine.cpp'], []) \
+            .project
+        project.target.link_mode = 'shared'
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert '-fPIC' in contents
+        assert 'build libraries/libengine.so: shared objects/engine/engine.cpp.o\n' in contents
+        assert "$$ORIGIN/libraries" in contents or "@loader_path/libraries" in contents
+
+    def test_toolchain_prefix_and_compiler_cache_select_the_tools(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_toolchain_prefix('arm-linux-gnueabi-') \
+            .project
+        project.target.compiler_cache = 'ccache'
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert 'cc = arm-linux-gnueabi-gcc\ncxx = arm-linux-gnueabi-g++\nar = arm-linux-gnueabi-ar\nlauncher = ccache\n' in contents
+
+    def test_paths_are_escaped(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_package('my engine', ['my engine/engine.cpp'], []) \
+            .project
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert 'build objects/my$ engine/engine.cpp.o: cxx ../my$ engine/engine.cpp\n' in contents
+
+    def test_bit_and_test_packages_see_the_project_include_directories(self):
+        project = a_project('Project') \
+            .with_target('default') \
+            .with_test_package('mocks', ['mocks/clock.cpp'], []) \
+            .project
+        bit_a = Target('default', packages=[Package('bits/a/1.0/a', ('bits/a/1.0/a/a.cpp',), include_directories=frozenset({'bits/a/1.0'}))])
+        bit_b = Target('default', packages=[Package('bits/b/1.0/b', ('bits/b/1.0/b/b.cpp',), include_directories=frozenset({'bits/b/1.0'}))])
+        project.target.bits = [bit_b, bit_a]
+        project.target.include_directories = {'bits/a/1.0', 'bits/b/1.0'}
+        project.test.packages[0].include_directories = frozenset({'.'})
+
+        contents = NinjaFileBuilder().build_contents(project)
+
+        assert 'includes_0 = -I../bits/a/1.0 -I../bits/b/1.0\n' in contents
+        assert 'build objects/bits/a/1.0/a/a.cpp.o: cxx ../bits/a/1.0/a/a.cpp\n  includes = $includes_0\n' in contents
+        assert 'build objects/bits/b/1.0/b/b.cpp.o: cxx ../bits/b/1.0/b/b.cpp\n  includes = $includes_0\n' in contents
+        assert 'includes_1 = -I.. -I../bits/a/1.0 -I../bits/b/1.0\n' in contents
+        assert 'build objects/mocks/clock.cpp.o: cxx ../mocks/clock.cpp\n  includes = $includes_1\n' in contents
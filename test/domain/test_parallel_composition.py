@@ -0,0 +1,87 @@
+import unittest
+import mock
+
+from cpm.domain.project import project_composer
+from cpm.domain.project import project_descriptor_parser
+from cpm.domain.project.project_descriptor import ProjectDescriptor, TargetDescription, CompilationPlan, PackageDescription, DeclaredBit
+from test.temporary_directory import InTemporaryDirectory
+
+PACKAGES = 40
+
+
+class TestParallelComposition(InTemporaryDirectory, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        packages = '\n'.join(f'    package_{index}:\n      cflags: [-DPACKAGE_{index}]' for index in range(PACKAGES))
+        self.write('project.yaml', f'name: big\nbuild:\n  packages:\n{packages}\ntest:\n  packages:\n    mocks:\n')
+        for index in range(PACKAGES):
+            self.write(f'package_{index}/source_{index}.cpp')
+            self.write(f'package_{index}/nested/source_{index}.c')
+        self.write('mocks/mock.cpp')
+        self.write('tests/test_big.cpp')
+        self.write('bits/cest/1.0/cest/cest.cpp')
+
+    def project_descriptor(self):
+        project_descriptor = project_descriptor_parser.parse_from('.')
+        project_descriptor.test.bits['cest'] = ProjectDescriptor(
+            name='cest',
+            version='1.0',
+            build=CompilationPlan(packages=[PackageDescription('cest')]),
+            targets={'default': TargetDescription('default')},
+            declared_bit=DeclaredBit('cest', '1.0')
+        )
+        return project_descriptor
+
+    def test_parallel_composition_produces_the_same_project_as_the_serial_one(self):
+        with mock.patch.object(project_composer, 'PARALLEL_SCAN_THRESHOLD', 10**6):
+            serial_project = project_composer.compose(self.project_descriptor(), 'default')
+
+        with mock.patch.object(project_composer, 'PARALLEL_SCAN_THRESHOLD', 0):
+            with mock.patch.object(project_composer, 'package_sources', wraps=project_composer.package_sources) as package_sources:
+                parallel_project = project_composer.compose(self.project_descriptor(), 'default')
+
+        assert parallel_project == serial_project
+        assert len(parallel_project.target.packages) == PACKAGES
+        assert parallel_project.test.bits[0].packages[0].sources == ('bits/cest/1.0/cest/cest.cpp',)
+        assert package_sources.call_count == PACKAGES + 2
+
+    def test_package_locations_cover_target_test_and_bit_packages(self):
+        locations = project_composer.package_locations(self.project_descriptor(), 'default')
+
+        assert ('package_0', '') in locations
+        assert ('mocks', '') in locations
+        assert ('bits/cest/1.0/cest', 'bits/cest/1.0') in locations
+
+    def bits_descriptor(self):
+        project_descriptor = self.project_descriptor()
+        for name in ['zeta', 'alpha', 'mid']:
+            self.write(f'bits/{name}/1.0/{name}/{name}.cpp')
+            project_descriptor.build.bits[name] = ProjectDescriptor(
+                name=name,
+                version='1.0',
+                build=CompilationPlan(packages=[PackageDescription(name)]),
+                targets={'default': TargetDescription('default')},
+                declared_bit=DeclaredBit(name, '1.0', cflags=[f'-D{name.upper()}'])
+            )
+        return project_descriptor
+
+    def test_bits_are_composed_in_parallel_and_kept_in_declaration_order(self):
+        project_descriptor = self.bits_descriptor()
+
+        with mock.patch.object(project_composer, 'PARALLEL_SCAN_THRESHOLD', 3), \
+                mock.patch.object(project_composer, 'ThreadPoolExecutor', wraps=project_composer.ThreadPoolExecutor) as executor:
+            project = project_composer.compose(project_descriptor, 'default')
+
+        assert [bit.packages[0].path for bit in project.target.bits] == ['bits/zeta/1.0/zeta', 'bits/alpha/1.0/alpha', 'bits/mid/1.0/mid']
+        assert project.target.bits[1].packages[0].cflags == ('-DALPHA',)
+        assert {'bits/zeta/1.0', 'bits/alpha/1.0', 'bits/mid/1.0'} <= project.target.packages[0].include_directories
+        assert executor.call_count == 2
+
+    def test_bits_below_the_parallel_threshold_are_composed_serially(self):
+        project_descriptor = self.bits_descriptor()
+
+        with mock.patch.object(project_composer, 'ThreadPoolExecutor', wraps=project_composer.ThreadPoolExecutor) as executor:
+            project = project_composer.compose(project_descriptor, 'default')
+
+        assert len(project.target.bits) == 3
+        assert executor.call_count == 1
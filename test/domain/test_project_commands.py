@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+
+from cpm.domain import constants
+from cpm.domain.project.project import Project
+from cpm.domain.project_commands import ProjectCommands, BuildError
+from cpm.infrastructure import filesystem as real_filesystem
+
+
+class TestProjectCommands(unittest.TestCase):
+    @mock.patch('cpm.domain.project_commands.subprocess')
+    @mock.patch('cpm.domain.project_commands.filesystem')
+    def test_native_builds_use_the_configured_compiler_cache_directory(self, filesystem, subprocess):
+        subprocess.run.return_value.returncode = 0
+        project = Project('ProjectName')
+        project.target.compiler_cache = 'ccache'
+        project.target.compiler_cache_directory = '/var/cache/ccache'
+
+        ProjectCommands().build(project, configure=False)
+
+        subprocess.run.assert_called_once_with([constants.NINJA_COMMAND, 'ProjectName'], cwd=constants.BUILD_DIRECTORY, env=mock.ANY)
+        assert subprocess.run.call_args[1]['env']['CCACHE_DIR'] == '/var/cache/ccache'
+
+    @mock.patch('cpm.domain.project_commands.subprocess')
+    @mock.patch('cpm.domain.project_commands.filesystem')
+    def test_native_builds_keep_the_environment_without_compiler_cache_directory(self, filesystem, subprocess):
+        subprocess.run.return_value.returncode = 0
+        project = Project('ProjectName')
+        project.target.compiler_cache = 'sccache'
+
+        ProjectCommands().build(project, configure=False)
+
+        subprocess.run.assert_called_once_with([constants.NINJA_COMMAND, 'ProjectName'], cwd=constants.BUILD_DIRECTORY, env=None)
+
+    @mock.patch('cpm.domain.project_commands.subprocess')
+    def test_cmake_configure_only_runs_when_the_build_system_is_missing_or_its_inputs_change(self, subprocess):
+        subprocess.run.return_value.returncode = 0
+        current_directory = os.getcwd()
+        directory = tempfile.mkdtemp()
+        os.chdir(directory)
+        try:
+            project = Project('ProjectName')
+            cmake_call = mock.call([constants.CMAKE_COMMAND, '-G', 'Ninja', '..'], cwd=constants.BUILD_DIRECTORY, env=None)
+
+            ProjectCommands().build(project)
+            real_filesystem.create_file(f'{constants.BUILD_DIRECTORY}/CMakeCache.txt')
+            real_filesystem.create_file(f'{constants.BUILD_DIRECTORY}/build.ninja')
+            ProjectCommands().build(project)
+            assert subprocess.run.call_args_list.count(cmake_call) == 1
+
+            project.target.toolchain_prefix = 'arm-linux-gnueabi-'
+            ProjectCommands().build(project)
+            ProjectCommands().build(project)
+            assert subprocess.run.call_args_list.count(cmake_call) == 2
+
+            with mock.patch.dict(os.environ, {'CXX': 'clang++'}):
+                ProjectCommands().build(project)
+            assert subprocess.run.call_args_list.count(cmake_call) == 3
+        finally:
+            os.chdir(current_directory)
+            shutil.rmtree(directory)
+
+    @mock.patch('cpm.domain.project_commands.subprocess')
+    @mock.patch('cpm.domain.project_commands.filesystem')
+    def test_configure_stamp_is_removed_before_running_cmake_so_a_failed_configure_runs_again(self, filesystem, subprocess):
+        calls = mock.Mock()
+        calls.attach_mock(filesystem.delete_file, 'delete_file')
+        calls.attach_mock(subprocess.run, 'run')
+        subprocess.run.return_value.returncode = 1
+        filesystem.file_exists.return_value = True
+        filesystem.read_file.return_value = 'previous configuration'
+
+        self.assertRaises(BuildError, ProjectCommands().build, Project('ProjectName'))
+
+        assert calls.mock_calls[:2] == [
+            mock.call.delete_file(f'{constants.BUILD_DIRECTORY}/.cpm/configure.stamp'),
+            mock.call.run([constants.CMAKE_COMMAND, '-G', 'Ninja', '..'], cwd=constants.BUILD_DIRECTORY, env=None),
+        ]
+        filesystem.write_file_if_changed.assert_not_called()
+
+    @mock.patch('cpm.domain.project_commands.NinjaFileBuilder')
+    @mock.patch('cpm.domain.project_commands.subprocess')
+    @mock.patch('cpm.domain.project_commands.filesystem')
+    def test_ninja_generator_writes_the_ninja_file_instead_of_running_cmake(self, filesystem, subprocess, ninja_file_builder):
+        subprocess.run.return_value.returncode = 0
+        project = Project('ProjectName')
+        project.target.generator = 'ninja'
+
+        ProjectCommands().build(project)
+
+        ninja_file_builder.return_value.build.assert_called_once_with(project)
+        filesystem.delete_file.assert_called_once_with(f'{constants.BUILD_DIRECTORY}/.cpm/configure.stamp')
+        subprocess.run.assert_called_once_with([constants.NINJA_COMMAND, 'ProjectName'], cwd=constants.BUILD_DIRECTORY, env=None)
+
+    @mock.patch('cpm.domain.project_commands._docker_client')
+    @mock.patch('cpm.domain.project_commands.filesystem')
+    def test_container_builds_mount_the_compiler_cache_directory(self, filesystem, docker_client):
+        filesystem.directory_exists.return_value = False
+        client = docker_client.return_value
+        client.containers.run.return_value.logs.return_value = []
+        client.containers.run.return_value.wait.return_value = {'StatusCode': 0}
+        project = Project('ProjectName')
+        project.target.image = 'cpmbits/ubuntu:20.04'
+        project.target.compiler_cache = 'sccache'
+        project.target.compiler_cache_directory = '/var/cache/sccache'
+
+        ProjectCommands().build(project)
+
+        volumes = client.containers.run.call_args[1]['volumes']
+        environment = client.containers.run.call_args[1]['environment']
+        assert volumes[os.getcwd()] == {'bind': '/ProjectName', 'mode': 'rw'}
+        assert volumes['/var/cache/sccache'] == {'bind': constants.CONTAINER_COMPILER_CACHE_DIRECTORY, 'mode': 'rw'}
+        assert f'SCCACHE_DIR={constants.CONTAINER_COMPILER_CACHE_DIRECTORY}' in environment
+        filesystem.create_directory.assert_any_call('/var/cache/sccache')
+
+    @mock.patch('cpm.domain.project_commands._docker_client')
+    @mock.patch('cpm.domain.project_commands.filesystem')
+    def test_container_builds_save_the_configure_stamp_right_after_configuring(self, filesystem, docker_client):
+        filesystem.file_exists.return_value = False
+        client = docker_client.return_value
+        client.containers.run.return_value.logs.return_value = []
+        client.containers.run.return_value.wait.return_value = {'StatusCode': 0}
+        project = Project('ProjectName')
+        project.target.image = 'cpmbits/ubuntu:20.04'
+
+        ProjectCommands().build(project)
+
+        filesystem.write_file_if_changed.assert_called_once_with(f'{constants.BUILD_DIRECTORY}/.cpm/configure.stamp.pending', mock.ANY)
+        filesystem.create_file.assert_called_once_with(
+            f'{constants.BUILD_DIRECTORY}/build.sh',
+            f'{constants.CMAKE_COMMAND} -G Ninja /ProjectName && mv .cpm/configure.stamp.pending .cpm/configure.stamp && '
+            f'{constants.NINJA_COMMAND} ProjectName\n'
+        )
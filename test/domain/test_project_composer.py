@@ -33,8 +33,9 @@ class TestProjectComposer(unittest.TestCase):
         assert project.target.name == 'default'
         assert project.target.main == 'main.cpp'
 
+    @mock.patch('cpm.domain.project.project_composer.source_index')
     @mock.patch('cpm.domain.project.project_composer.filesystem')
-    def test_should_compose_project_from_project_description_with_one_build_package(self, filesystem):
+    def test_should_compose_project_from_project_description_with_one_build_package(self, filesystem, source_index):
         self.write_descriptor({
             'name': 'HalfLife3',
             'build': {
@@ -49,7 +50,7 @@ class TestProjectComposer(unittest.TestCase):
                 'includes': ['./include']
             }
         })
-        filesystem.find.side_effect = [['shaders/shader.cpp'], ['shaders/water.c'], []]
+        source_index.find.side_effect = [['shaders/shader.cpp', 'shaders/water.c'], []]
         filesystem.parent_directory.return_value = '.'
 
         project_description = project_descriptor_parser.parse_from('.')
@@ -57,15 +58,16 @@ class TestProjectComposer(unittest.TestCase):
 
         assert len(project.target.packages) == 1
         assert project.target.packages[0].path == 'shaders'
-        assert project.target.packages[0].sources == ['shaders/shader.cpp', 'shaders/water.c']
-        assert project.target.packages[0].cflags == ['-DUSE_PORTAL_GUN', '-Wall']
+        assert project.target.packages[0].sources == ('shaders/shader.cpp', 'shaders/water.c')
+        assert project.target.packages[0].cflags == ('-DUSE_PORTAL_GUN', '-Wall')
         assert project.target.cflags == ['-Wall']
         assert project.target.ldflags == ['-pg']
         assert project.target.libraries == ['pthread']
         assert project.target.include_directories == {'.', './include'}
 
+    @mock.patch('cpm.domain.project.project_composer.source_index')
     @mock.patch('cpm.domain.project.project_composer.filesystem')
-    def test_should_raise_an_error_when_target_is_not_described(self, filesystem):
+    def test_should_raise_an_error_when_target_is_not_described(self, filesystem, source_index):
         self.write_descriptor({
             'name': 'HalfLife3',
             'build': {
@@ -80,8 +82,9 @@ class TestProjectComposer(unittest.TestCase):
         project_description = project_descriptor_parser.parse_from('.')
         self.assertRaises(project_composer.TargetNotDescribed, project_composer.compose, project_description, 'non-described-target')
 
+    @mock.patch('cpm.domain.project.project_composer.source_index')
     @mock.patch('cpm.domain.project.project_composer.filesystem')
-    def test_should_compose_project_from_project_description_with_one_target_build_package(self, filesystem):
+    def test_should_compose_project_from_project_description_with_one_target_build_package(self, filesystem, source_index):
         self.write_descriptor({
             'name': 'HalfLife3',
             'targets': {
@@ -102,11 +105,13 @@ class TestProjectComposer(unittest.TestCase):
                     'image': 'cpmbits/docker',
                     'test_image': 'cpmbits/docker_test',
                     'test_dockerfile': 'test.Dockerfile',
-                    'toolchain_prefix': 'arm-linux-gnueabi-'
+                    'toolchain_prefix': 'arm-linux-gnueabi-',
+                    'compiler_cache': 'ccache',
+                    'compiler_cache_directory': '~/.ccache'
                 }
             }
         })
-        filesystem.find.side_effect = [['shaders/shader.cpp'], ['shaders/water.c'], []]
+        source_index.find.side_effect = [['shaders/shader.cpp', 'shaders/water.c'], []]
         filesystem.parent_directory.return_value = '.'
 
         project_description = project_descriptor_parser.parse_from('.')
@@ -114,8 +119,8 @@ class TestProjectComposer(unittest.TestCase):
 
         assert len(project.target.packages) == 1
         assert project.target.packages[0].path == 'shaders'
-        assert project.target.packages[0].sources == ['shaders/shader.cpp', 'shaders/water.c']
-        assert project.target.packages[0].cflags == ['-DUSE_PORTAL_GUN', '-Wall']
+        assert project.target.packages[0].sources == ('shaders/shader.cpp', 'shaders/water.c')
+        assert project.target.packages[0].cflags == ('-DUSE_PORTAL_GUN', '-Wall')
         assert project.target.cflags == ['-Wall']
         assert project.target.ldflags == ['-pg']
         assert project.target.libraries == ['pthread']
@@ -126,9 +131,11 @@ class TestProjectComposer(unittest.TestCase):
         assert project.target.test_image == 'cpmbits/docker_test'
         assert project.target.test_dockerfile == 'test.Dockerfile'
         assert project.target.toolchain_prefix == 'arm-linux-gnueabi-'
+        assert (project.target.compiler_cache, project.target.compiler_cache_directory) == ('ccache', '~/.ccache')
 
+    @mock.patch('cpm.domain.project.project_composer.source_index')
     @mock.patch('cpm.domain.project.project_composer.filesystem')
-    def test_should_compose_project_from_project_description_with_one_target_test_package(self, filesystem):
+    def test_should_compose_project_from_project_description_with_one_target_test_package(self, filesystem, source_index):
         self.write_descriptor({
             'name': 'HalfLife3',
             'test': {
@@ -149,7 +156,7 @@ class TestProjectComposer(unittest.TestCase):
                 }
             }
         })
-        filesystem.find.side_effect = [['shaders/shader.cpp'], ['shaders/water.c'], []]
+        source_index.find.side_effect = [['shaders/shader.cpp', 'shaders/water.c'], []]
         filesystem.parent_directory.return_value = '.'
 
         project_description = project_descriptor_parser.parse_from('.')
@@ -157,19 +164,20 @@ class TestProjectComposer(unittest.TestCase):
 
         assert len(project.test.packages) == 1
         assert project.test.packages[0].path == 'shaders'
-        assert project.test.packages[0].sources == ['shaders/shader.cpp', 'shaders/water.c']
-        assert project.test.packages[0].cflags == ['-DUSE_PORTAL_GUN', '-Wall']
+        assert project.test.packages[0].sources == ('shaders/shader.cpp', 'shaders/water.c')
+        assert project.test.packages[0].cflags == ('-DUSE_PORTAL_GUN', '-Wall')
         assert project.test.cflags == ['-Wall']
         assert project.test.ldflags == ['-pg']
         assert project.test.libraries == ['pthread']
         assert project.test.include_directories == {'.', './test/include'}
 
+    @mock.patch('cpm.domain.project.project_composer.source_index')
     @mock.patch('cpm.domain.project.project_composer.filesystem')
-    def test_should_compose_project_from_project_description_with_one_test(self, filesystem):
+    def test_should_compose_project_from_project_description_with_one_test(self, filesystem, source_index):
         self.write_descriptor({
             'name': 'HalfLife3',
         })
-        filesystem.find.side_effect = [['tests/test_one.cpp']]
+        source_index.find.side_effect = [['tests/test_one.cpp']]
         filesystem.parent_directory.return_value = '.'
 
         project_description = project_descriptor_parser.parse_from('.')
@@ -179,8 +187,93 @@ class TestProjectComposer(unittest.TestCase):
         assert project.test.test_suites[0].name == 'test_one'
         assert project.test.test_suites[0].main == 'tests/test_one.cpp'
 
+    def test_link_mode_defaults_to_objects_and_can_be_overridden_per_target(self):
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'build': {'link_mode': 'static'},
+            'targets': {
+                'rpi4': {
+                    'test': {'link_mode': 'shared'}
+                }
+            }
+        })
+
+        project_description = project_descriptor_parser.parse_from('.')
+        default_project = project_composer.compose(project_description, 'default')
+        rpi4_project = project_composer.compose(project_description, 'rpi4')
+
+        assert (default_project.target.link_mode, default_project.test.link_mode) == ('static', 'objects')
+        assert (rpi4_project.target.link_mode, rpi4_project.test.link_mode) == ('static', 'shared')
+
+    @mock.patch('cpm.domain.project.project_composer.source_index')
+    def test_packages_inherit_the_unity_build_batch_size_unless_they_override_it(self, source_index):
+        source_index.find.return_value = []
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'build': {
+                'unity_build': True,
+                'packages': {'engine': None, 'legacy': {'unity_build': False}},
+            },
+            'targets': {
+                'rpi4': {
+                    'build': {
+                        'unity_build': 32,
+                        'packages': {'drivers': {'unity_build': 4}},
+                    }
+                }
+            }
+        })
+
+        project_description = project_descriptor_parser.parse_from('.')
+        default_project = project_composer.compose(project_description, 'default')
+        rpi4_project = project_composer.compose(project_description, 'rpi4')
+
+        assert [package.unity_build for package in default_project.target.packages] == [8, 0]
+        assert [package.unity_build for package in rpi4_project.target.packages] == [32, 0, 4]
+        assert rpi4_project.test.unity_build == 0
+
+    @mock.patch('cpm.domain.project.project_composer.source_index')
+    def test_packages_precompile_the_headers_of_their_plan_and_their_own(self, source_index):
+        source_index.find.return_value = []
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'build': {
+                'precompiled_headers': ['<vector>'],
+                'packages': {'engine': {'precompiled_headers': ['engine/engine.h']}, 'render': None},
+            },
+            'test': {'precompiled_headers': ['<cest/cest.h>']},
+        })
+
+        project_description = project_descriptor_parser.parse_from('.')
+        project = project_composer.compose(project_description, 'default')
+
+        assert [package.precompiled_headers for package in project.target.packages] == [('<vector>', 'engine/engine.h'), ('<vector>',)]
+        assert project.test.precompiled_headers == ('<cest/cest.h>',)
+
+    def test_bit_precompiled_headers_are_relative_to_the_bit_directory(self):
+        assert project_composer.precompiled_headers(['<map>', 'json/json.h'], 'bits/json/1.0') == ('<map>', 'bits/json/1.0/json/json.h')
+
+    @mock.patch('cpm.domain.project.project_composer.source_index')
+    def test_test_suites_are_tagged_as_declared_in_the_descriptor(self, source_index):
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'test': {
+                'tags': {
+                    'fast': ['tests/unit', 'test_parser'],
+                    'network': ['*socket*']
+                }
+            }
+        })
+        source_index.find.side_effect = [['tests/unit/test_math.cpp', 'tests/test_parser.cpp', 'tests/test_socket.cpp']]
+
+        project_description = project_descriptor_parser.parse_from('.')
+        project = project_composer.compose(project_description, 'default')
+
+        assert [test_suite.tags for test_suite in project.test.test_suites] == [{'fast'}, {'network'}, {'fast'}]
+
+    @mock.patch('cpm.domain.project.project_composer.source_index')
     @mock.patch('cpm.domain.project.project_composer.filesystem')
-    def test_compose_from_description_with_customized_bit_compilation(self, filesystem):
+    def test_compose_from_description_with_customized_bit_compilation(self, filesystem, source_index):
         self.write_descriptor({
             'name': 'HalfLife3',
             'build': {
@@ -193,7 +286,7 @@ class TestProjectComposer(unittest.TestCase):
                 }
             }
         })
-        filesystem.find.side_effect = [['tests/test_one.cpp'], ['nano33/nano33.cpp'], []]
+        source_index.find.side_effect = [['nano33/nano33.cpp'], ['tests/test_one.cpp']]
         filesystem.parent_directory.return_value = '.'
 
         project_description = project_descriptor_parser.parse_from('.')
@@ -215,7 +308,99 @@ class TestProjectComposer(unittest.TestCase):
         project = project_composer.compose(project_description, 'default')
 
         assert project.target.bits[0].packages[0].path == 'bits/arduino/1.0.0/nano33'
-        assert project.target.bits[0].packages[0].cflags == ['-mcpu=atmel', '-DBIT_FLAG']
+        assert project.target.bits[0].packages[0].cflags == ('-mcpu=atmel', '-DBIT_FLAG')
+
+    @mock.patch('cpm.domain.project.project_composer.source_index')
+    @mock.patch('cpm.domain.project.project_composer.filesystem')
+    def test_composing_does_not_modify_the_bit_descriptors(self, filesystem, source_index):
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'build': {
+                'bits': {
+                    'arduino': '1.0.0'
+                }
+            }
+        })
+        source_index.find.return_value = []
+        filesystem.parent_directory.return_value = '.'
+        project_description = project_descriptor_parser.parse_from('.')
+        arduino_bit = ProjectDescriptor(
+            name='arduino',
+            version='1.0.0',
+            build=CompilationPlan(packages=[PackageDescription(path='arduino')]),
+            targets={'default': TargetDescription('default')},
+            declared_bit=project_description.build.declared_bits[0]
+        )
+        project_description.build.bits['arduino'] = arduino_bit
+
+        project_composer.compose(project_description, 'default')
+        project = project_composer.compose(project_description, 'default')
+
+        assert project.target.bits[0].packages[0].path == 'bits/arduino/1.0.0/arduino'
+        assert arduino_bit.build.packages[0].path == 'arduino'
+
+    @mock.patch('cpm.domain.project.project_composer.bit_sources')
+    @mock.patch('cpm.domain.project.project_composer.source_index')
+    @mock.patch('cpm.domain.project.project_composer.filesystem')
+    def test_bit_sources_are_taken_from_the_bit_manifest(self, filesystem, source_index, bit_sources):
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'build': {
+                'bits': {
+                    'arduino': '1.0.0'
+                }
+            }
+        })
+        source_index.find.return_value = []
+        bit_sources.package_sources.return_value = ['bits/arduino/1.0.0/arduino/arduino.cpp']
+        filesystem.parent_directory.return_value = '.'
+        project_description = project_descriptor_parser.parse_from('.')
+        project_description.build.bits['arduino'] = ProjectDescriptor(
+            name='arduino',
+            version='1.0.0',
+            build=CompilationPlan(packages=[PackageDescription(path='arduino')]),
+            targets={'default': TargetDescription('default')},
+            declared_bit=project_description.build.declared_bits[0]
+        )
+
+        project = project_composer.compose(project_description, 'default')
+
+        assert project.target.bits[0].packages[0].sources == ('bits/arduino/1.0.0/arduino/arduino.cpp',)
+        bit_sources.package_sources.assert_called_once_with('bits/arduino/1.0.0', 'bits/arduino/1.0.0/arduino')
+
+    @mock.patch('cpm.domain.project.project_composer.source_index')
+    def test_packages_share_frozen_include_directories_and_interned_flags(self, source_index):
+        self.write_descriptor({
+            'name': 'HalfLife3',
+            'build': {
+                'packages': {
+                    'engine/physics': None,
+                    'engine/render': None
+                },
+                'cflags': ['-Wall'],
+                'bits': {
+                    'arduino': '1.0.0'
+                }
+            }
+        })
+        source_index.find.return_value = []
+        project_description = project_descriptor_parser.parse_from('.')
+        project_description.build.bits['arduino'] = ProjectDescriptor(
+            name='arduino',
+            version='1.0.0',
+            build=CompilationPlan(packages=[PackageDescription(path='arduino')]),
+            targets={'default': TargetDescription('default')},
+            declared_bit=project_description.build.declared_bits[0]
+        )
+
+        project = project_composer.compose(project_description, 'default')
+
+        physics, render = project.target.packages
+        assert physics.include_directories == {'engine', 'bits/arduino/1.0.0'}
+        assert physics.include_directories is render.include_directories
+        assert physics.include_directories is not project.target.include_directories
+        assert isinstance(physics.include_directories, frozenset)
+        assert physics.cflags is render.cflags
 
     def write_descriptor(self, data):
         with open(PROJECT_DESCRIPTOR_FILE, 'w') as stream:
@@ -0,0 +1,79 @@
+import os
+import pickle
+import unittest
+import mock
+from dataclasses import dataclass
+
+from cpm.domain.project import project_descriptor_cache
+from cpm.domain.project import project_descriptor_parser
+from cpm.domain.project.project_descriptor import slotted
+from test.temporary_directory import InTemporaryDirectory
+
+PROJECT_YAML = '''name: cached
+version: 0.1.0
+build:
+  packages: !include packages.yaml
+'''
+
+
+class Record:
+    name: str
+    flags: tuple = ()
+
+
+Record = slotted(dataclass(Record))
+
+
+class TestProjectDescriptorCache(InTemporaryDirectory, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.write('project.yaml', PROJECT_YAML)
+        self.write('packages.yaml', 'cached: {}\n')
+        os.mkdir('build')
+
+    def test_nothing_is_cached_without_a_build_directory(self):
+        os.rmdir('build')
+
+        project_descriptor_parser.parse_from('.')
+
+        assert project_descriptor_cache.load('./project.yaml') is None
+        assert not os.path.exists('build')
+
+    def test_parsed_descriptor_is_loaded_from_the_cache(self):
+        parsed = project_descriptor_parser.parse_from('.')
+
+        cached = project_descriptor_cache.load('./project.yaml')
+
+        assert cached.name == 'cached'
+        assert [package.path for package in cached.build.packages] == ['cached']
+        assert cached.included_files() == parsed.included_files()
+        assert cached.yaml_document is None
+
+    def test_cache_is_invalidated_when_the_descriptor_changes(self):
+        project_descriptor_parser.parse_from('.')
+
+        self.write('project.yaml', PROJECT_YAML.replace('0.1.0', '0.2.0'))
+
+        assert project_descriptor_cache.load('./project.yaml') is None
+        assert project_descriptor_parser.parse_from('.').version == '0.2.0'
+
+    def test_cache_is_invalidated_when_an_included_file_changes(self):
+        project_descriptor_parser.parse_from('.')
+
+        self.write('packages.yaml', 'other: {}\n')
+
+        assert project_descriptor_cache.load('./project.yaml') is None
+        assert [package.path for package in project_descriptor_parser.parse_from('.').build.packages] == ['other']
+
+    def test_cache_from_another_version_is_ignored(self):
+        project_descriptor_parser.parse_from('.')
+
+        with mock.patch.object(project_descriptor_cache, 'CACHE_VERSION', 0):
+            assert project_descriptor_cache.load('./project.yaml') is None
+
+    def test_records_are_slotted_before_python_3_10(self):
+        record = Record('engine')
+
+        assert not hasattr(record, '__dict__')
+        assert record.flags == ()
+        assert pickle.loads(pickle.dumps(record)) == record
@@ -183,3 +183,13 @@ class TestProjectDescriptorParser(unittest.TestCase):
         assert project.build.declared_bits[0] == project_descriptor.DeclaredBit(
             name='sqlite3', version='3.32.3', cflags=['-DCUSTOM_BIT_DEFINE'], target='arduinoNano33'
         )
+
+    def test_validation_errors_without_location_information_are_reported_as_unlocated(self):
+        yaml_contents = {
+            'name': 'bender bender rodriguez',
+            'build': {
+                'cflags': ['-DHOLA', 123]
+            }
+        }
+        with self.assertRaises(project_descriptor_parser.UnlocatedParseError):
+            project_descriptor_parser.digest_yaml(yaml_contents)
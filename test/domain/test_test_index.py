@@ -0,0 +1,65 @@
+import unittest
+
+from cpm.domain.project.project import TestSuite
+from cpm.domain import test_index
+from cpm.domain.test_index import TestIndex, TestSelection, TestNotFound
+
+
+class TestTestIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_suites = [
+            TestSuite('test_parser', 'tests/test_parser.cpp', tags=frozenset({'fast'})),
+            TestSuite('test_socket', 'tests/network/test_socket.cpp'),
+            TestSuite('test_http_parser', 'tests/network/http/test_http_parser.cpp', tags=frozenset({'fast'})),
+        ]
+        self.index = TestIndex(self.test_suites)
+
+    def names(self, selection):
+        return [test_suite.name for test_suite in self.index.select(selection)]
+
+    def test_selects_test_suites_by_file(self):
+        assert self.names(['tests/network/test_socket.cpp']) == ['test_socket']
+        assert self.names(['./tests/test_parser.cpp']) == ['test_parser']
+
+    def test_selects_test_suites_by_name(self):
+        assert self.names(['test_http_parser']) == ['test_http_parser']
+
+    def test_selects_every_test_suite_below_a_directory(self):
+        assert self.names(['tests/network/']) == ['test_socket', 'test_http_parser']
+
+    def test_selects_test_suites_matching_a_glob_pattern(self):
+        assert self.names(['*parser*']) == ['test_parser', 'test_http_parser']
+        assert self.names(['tests/network/*/test_*.cpp']) == ['test_http_parser']
+
+    def test_selected_test_suites_keep_the_project_order_without_duplicates(self):
+        assert self.names(['test_http_parser', 'tests/network', 'tests/test_parser.cpp']) == ['test_parser', 'test_socket', 'test_http_parser']
+
+    def test_filters_test_suites_by_keyword(self):
+        assert self.names(TestSelection(keyword='parser')) == ['test_parser', 'test_http_parser']
+        assert self.names(TestSelection(['tests/network'], keyword='parser')) == ['test_http_parser']
+
+    def test_selects_tagged_test_suites(self):
+        assert self.names(TestSelection(tags=['fast'])) == ['test_parser', 'test_http_parser']
+        assert self.names(TestSelection(['tests/network'], tags=['fast'])) == ['test_http_parser']
+
+    def test_tag_patterns_match_test_suites_by_file_name_or_directory(self):
+        test_http_parser = self.test_suites[2]
+
+        assert test_index.matches(test_http_parser, './tests/network/http/test_http_parser.cpp')
+        assert test_index.matches(test_http_parser, 'test_http_parser')
+        assert test_index.matches(test_http_parser, 'tests/network/')
+        assert test_index.matches(test_http_parser, 'tests/*/http')
+        assert not test_index.matches(test_http_parser, 'tests/net')
+        assert not test_index.matches(test_http_parser, 'test_parser')
+
+    def test_fails_when_a_pattern_does_not_match_any_test_suite(self):
+        with self.assertRaises(TestNotFound) as error:
+            self.index.select(['tests/test_missing.cpp'])
+
+        assert str(error.exception) == 'tests/test_missing.cpp'
+
+    def test_fails_when_the_selection_filters_out_every_test_suite(self):
+        with self.assertRaises(TestNotFound) as error:
+            self.index.select(TestSelection(keyword='socket', tags=['fast']))
+
+        assert str(error.exception) == '-k socket -t fast'
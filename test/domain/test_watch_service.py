@@ -0,0 +1,125 @@
+import unittest
+import mock
+
+from cpm.domain.cmake.cmakelists_builder import CMakeListsBuilder
+from cpm.domain.project.project import Project, Package, TestSuite
+from cpm.domain.project_commands import BuildError
+from cpm.domain.watch_service import WatchService
+from cpm.infrastructure.file_watcher import Changes
+
+
+class ScriptedWatcher(object):
+    def __init__(self, changes):
+        self.changes = changes
+
+    def __call__(self, files, directories):
+        return self
+
+    def wait_for_changes(self):
+        if not self.changes:
+            raise KeyboardInterrupt
+        return self.changes.pop(0)
+
+    def close(self):
+        pass
+
+
+def a_project():
+    project = Project('ProjectName')
+    project.target.main = 'main.cpp'
+    project.target.packages = [Package('package', sources=['package/source.cpp'])]
+    project.test.test_suites = [TestSuite('test_one', 'tests/test_one.cpp'), TestSuite('test_two', 'tests/test_two.cpp')]
+    return project
+
+
+class TestWatchService(unittest.TestCase):
+    def setUp(self):
+        self.project_loader = mock.MagicMock()
+        self.cmakelists_builder = mock.MagicMock()
+        self.project_commands = mock.MagicMock()
+        self.project = a_project()
+        self.project_loader.load.return_value = self.project
+
+    def watch_service(self, *changes):
+        return WatchService(self.project_loader, self.cmakelists_builder, self.project_commands, ScriptedWatcher(list(changes)))
+
+    def test_modified_source_only_runs_the_build(self):
+        service = self.watch_service(Changes(modified={'package/source.cpp'}))
+
+        service.watch_build('default')
+
+        self.project_loader.load.assert_called_once_with('.', 'default')
+        self.cmakelists_builder.build.assert_called_once_with(self.project)
+        self.project_commands.build.assert_has_calls([
+            mock.call(self.project, configure=True),
+            mock.call(self.project, configure=False)
+        ])
+
+    def test_modified_descriptor_reloads_the_project(self):
+        service = self.watch_service(Changes(modified={'project.yaml'}))
+
+        service.watch_build('default')
+
+        assert self.project_loader.load.call_count == 2
+        assert self.cmakelists_builder.build.call_count == 2
+        self.project_commands.build.assert_has_calls([
+            mock.call(self.project, configure=True),
+            mock.call(self.project, configure=True)
+        ])
+
+    @mock.patch('cpm.domain.cmake.cmakelists_builder.filesystem')
+    def test_reloads_regenerate_the_whole_cmakelists(self, filesystem):
+        self.cmakelists_builder = CMakeListsBuilder()
+        service = self.watch_service(Changes(added={'package/new_source.c'}))
+
+        service.watch_build('default')
+
+        first_contents, second_contents = [call[0][1] for call in filesystem.write_file_if_changed.call_args_list]
+        assert second_contents == first_contents
+        assert second_contents.count('add_executable(ProjectName ') == 1
+
+    def test_added_source_reloads_the_project(self):
+        service = self.watch_service(Changes(added={'package/new_source.c'}))
+
+        service.watch_build('default')
+
+        assert self.project_loader.load.call_count == 2
+
+    def test_added_header_only_runs_the_build(self):
+        service = self.watch_service(Changes(added={'package/header.h'}))
+
+        service.watch_build('default')
+
+        self.project_loader.load.assert_called_once()
+
+    def test_build_errors_do_not_stop_watching(self):
+        self.project_commands.build.side_effect = [BuildError, None]
+        service = self.watch_service(Changes(modified={'package/source.cpp'}))
+
+        service.watch_build('default')
+
+        assert self.project_commands.build.call_count == 2
+
+    def test_modified_test_suite_only_runs_that_suite(self):
+        service = self.watch_service(Changes(modified={'tests/test_two.cpp'}))
+
+        service.watch_tests([], 'default')
+
+        self.project_commands.build_tests.assert_has_calls([
+            mock.call(self.project, [], configure=True),
+            mock.call(self.project, ['tests/test_two.cpp'], configure=False)
+        ])
+        self.project_commands.run_tests.assert_has_calls([
+            mock.call(self.project, [], ()),
+            mock.call(self.project, ['tests/test_two.cpp'], ())
+        ])
+
+    def test_modified_source_runs_the_selected_suites(self):
+        service = self.watch_service(Changes(modified={'package/source.cpp'}))
+
+        service.watch_tests(['tests'], 'default')
+
+        self.project_commands.build_tests.assert_has_calls([
+            mock.call(self.project, ['tests'], configure=True),
+            mock.call(self.project, ['tests'], configure=False)
+        ])
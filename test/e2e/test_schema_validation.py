@@ -123,6 +123,45 @@ build:
 
         assert str(context.exception.message) == 'project.yaml:4:3: packages must be a mapping'
 
+    def test_link_mode_in_compilation_plan_must_be_a_known_mode(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        descriptor_contents = """name: test_project
+test:
+  link_mode: dynamic
+"""
+        filesystem.create_file(f'{self.PROJECT_DIRECTORY}/project.yaml', descriptor_contents)
+        with self.assertRaises(project_descriptor_parser.ParseError) as context:
+            project_descriptor_parser.parse_from(self.PROJECT_DIRECTORY)
+
+        assert str(context.exception.message) == 'project.yaml:3:3: link_mode must be one of objects, static, shared'
+
+    def test_unity_build_in_package_description_must_be_a_boolean_or_a_batch_size(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        descriptor_contents = """name: test_project
+build:
+  packages:
+    engine:
+      unity_build: many
+"""
+        filesystem.create_file(f'{self.PROJECT_DIRECTORY}/project.yaml', descriptor_contents)
+        with self.assertRaises(project_descriptor_parser.ParseError) as context:
+            project_descriptor_parser.parse_from(self.PROJECT_DIRECTORY)
+
+        assert str(context.exception.message) == 'project.yaml:5:7: unity_build must be a boolean or a batch size'
+
+    def test_compiler_cache_must_be_a_known_launcher(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        descriptor_contents = """name: test_project
+targets:
+  default:
+    compiler_cache: distcc
+"""
+        filesystem.create_file(f'{self.PROJECT_DIRECTORY}/project.yaml', descriptor_contents)
+        with self.assertRaises(project_descriptor_parser.ParseError) as context:
+            project_descriptor_parser.parse_from(self.PROJECT_DIRECTORY)
+
+        assert str(context.exception.message) == 'project.yaml:4:5: compiler_cache must be one of ccache, sccache'
+
     def test_package_description_in_compilation_plan_must_be_a_mapping(self):
         os.mkdir(self.PROJECT_DIRECTORY)
         descriptor_contents = """name: test_project
@@ -243,3 +282,61 @@ test: 123
             project_descriptor_parser.parse_from(self.PROJECT_DIRECTORY)
 
         assert str(context.exception.message) == 'project.yaml:3:1: test must be a mapping'
+
+    def test_valid_descriptor_with_included_files_is_parsed_without_round_trip_document(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        os.chdir(self.PROJECT_DIRECTORY)
+        filesystem.create_file('project.yaml', 'name: test_project\nbuild:\n  packages: !include packages.yaml\n')
+        filesystem.create_file('packages.yaml', 'api:\n  cflags: [-DAPI]\n')
+
+        project_descriptor = project_descriptor_parser.parse_from('.')
+
+        assert project_descriptor.yaml_document is None
+        assert [str(f) for f in project_descriptor.included_files()] == ['packages.yaml']
+        assert project_descriptor.build.packages[0].cflags == ['-DAPI']
+
+    def test_errors_in_included_files_are_located_in_the_included_file(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        os.chdir(self.PROJECT_DIRECTORY)
+        filesystem.create_file('project.yaml', 'name: test_project\nbuild:\n  packages: !include packages.yaml\n')
+        filesystem.create_file('packages.yaml', 'api:\n  cflags: [-DAPI]\nhttp: 123\n')
+
+        with self.assertRaises(project_descriptor_parser.ParseError) as context:
+            project_descriptor_parser.parse_from('.')
+
+        assert str(context.exception.message) == 'packages.yaml:3:1: http must be a mapping'
+
+    def test_include_cycles_are_reported_at_the_include(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        os.chdir(self.PROJECT_DIRECTORY)
+        filesystem.create_file('project.yaml', 'name: test_project\nbuild:\n  packages: !include packages.yaml\n')
+        filesystem.create_file('packages.yaml', 'api: !include project.yaml\n')
+
+        with self.assertRaises(project_descriptor_parser.ParseError) as context:
+            project_descriptor_parser.parse_from('.')
+
+        assert str(context.exception.message) == 'packages.yaml:1:6: include cycle project.yaml -> packages.yaml -> project.yaml'
+
+    def test_all_errors_are_reported_at_once(self):
+        os.mkdir(self.PROJECT_DIRECTORY)
+        descriptor_contents = """version: 123
+build:
+  cflags: [123, '-O2', 456]
+  packages:
+    api: 123
+targets:
+  rpi:
+    image: 789
+"""
+        filesystem.create_file(f'{self.PROJECT_DIRECTORY}/project.yaml', descriptor_contents)
+        with self.assertRaises(project_descriptor_parser.InvalidDescriptor) as context:
+            project_descriptor_parser.parse_from(self.PROJECT_DIRECTORY)
+
+        assert str(context.exception.message) == '\n'.join([
+            'name is required',
+            'project.yaml:1:1: version must be a string',
+            'project.yaml:3:12: cflags must be a sequence of string',
+            'project.yaml:3:24: cflags must be a sequence of string',
+            'project.yaml:5:5: api must be a mapping',
+            'project.yaml:8:5: image must be a string',
+        ])
@@ -0,0 +1,134 @@
+import unittest
+import io
+import os
+import shutil
+import tempfile
+import threading
+import mock
+
+from cpm.infrastructure import daemon
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = f'{self.directory}/cpm/daemon.sock'
+        self.server = threading.Thread(target=daemon.CpmDaemon(self.path).serve)
+        self.server.start()
+        self.control = daemon.DaemonControl(self.path)
+        while not self.control.is_running():
+            pass
+
+    def tearDown(self):
+        if self.control.is_running():
+            self.control.stop()
+        self.server.join()
+        shutil.rmtree(self.directory)
+
+    def test_daemon_reports_its_pid(self):
+        assert self.control.pid() == os.getpid()
+
+    def test_forwarded_command_output_and_exit_code_are_returned_to_the_client(self):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with mock.patch('sys.stdout', stdout):
+            exit_code = daemon.forward(['help'], self.path)
+
+        assert exit_code == 0
+        assert b'Available commands' in stdout.buffer.getvalue()
+
+    def test_forwarded_command_runs_in_the_client_working_directory(self):
+        stdout = io.TextIOWrapper(io.BytesIO())
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            with mock.patch('sys.stdout', stdout):
+                exit_code = daemon.forward(['prep'], self.path)
+        finally:
+            os.chdir(cwd)
+
+        assert exit_code == 1
+        assert b'not a cpm project' in stdout.buffer.getvalue()
+
+    def test_interactive_commands_are_not_forwarded(self):
+        assert daemon.forward(['publish', '-s', 'http://localhost'], self.path) is None
+        assert daemon.forward(['daemon', 'stop'], self.path) is None
+
+    def test_watches_are_not_forwarded(self):
+        assert daemon.forward(['build', '--watch'], self.path) is None
+        assert daemon.forward(['test', '-w', 'tests/unit'], self.path) is None
+
+    def test_commands_sent_while_the_daemon_is_busy_run_in_the_client(self):
+        started = threading.Event()
+        finished = threading.Event()
+
+        def slow_command(argv):
+            started.set()
+            finished.wait(5)
+            return 0
+
+        with mock.patch('cpm.infrastructure.daemon.run_command', side_effect=slow_command), \
+                mock.patch('sys.stdout', io.TextIOWrapper(io.BytesIO())):
+            first_client = threading.Thread(target=daemon.forward, args=(['build'], self.path))
+            first_client.start()
+            started.wait(5)
+
+            assert daemon.forward(['help'], self.path) is None
+            assert self.control.pid() == os.getpid()
+            finished.set()
+            first_client.join()
+
+    @mock.patch('cpm.infrastructure.daemon.signal')
+    def test_interrupted_clients_cancel_the_forwarded_command(self, signal):
+        cancelled = threading.Event()
+        signal.pthread_kill.side_effect = lambda thread, signum: cancelled.set()
+
+        def slow_command(argv):
+            os.write(1, b'compiling\n')
+            return daemon.INTERRUPTED_EXIT_CODE if cancelled.wait(5) else 0
+
+        stdout = mock.MagicMock()
+        stdout.buffer.write.side_effect = [KeyboardInterrupt, None]
+        with mock.patch('cpm.infrastructure.daemon.run_command', side_effect=slow_command), mock.patch('sys.stdout', stdout):
+            exit_code = daemon.forward(['build'], self.path)
+
+        assert exit_code == daemon.INTERRUPTED_EXIT_CODE
+        signal.pthread_kill.assert_called_once_with(self.server.ident, signal.SIGINT)
+
+    @mock.patch('cpm.infrastructure.daemon._read_input')
+    def test_client_input_is_forwarded_to_the_command(self, read_input):
+        read_input.side_effect = [b'yes\n', b'']
+
+        def interactive_command(argv):
+            return 0 if os.read(0, 100) == b'yes\n' else 1
+
+        with mock.patch('cpm.infrastructure.daemon.run_command', side_effect=interactive_command), \
+                mock.patch('sys.stdout', io.TextIOWrapper(io.BytesIO())):
+            assert daemon.forward(['build'], self.path) == 0
+
+    def test_commands_are_not_forwarded_when_daemon_is_not_running(self):
+        assert daemon.forward(['help'], f'{self.directory}/missing.sock') is None
+
+    def test_commands_are_not_forwarded_to_sockets_in_directories_other_users_can_reach(self):
+        os.chmod(f'{self.directory}/cpm', 0o755)
+
+        assert daemon.forward(['help'], self.path) is None
+
+    def test_commands_are_not_forwarded_to_sockets_in_directories_owned_by_other_users(self):
+        with mock.patch('os.getuid', return_value=os.getuid() + 1):
+            assert daemon.forward(['help'], self.path) is None
+
+    def test_daemons_running_other_cpm_code_are_stopped_and_bypassed(self):
+        with mock.patch('cpm.infrastructure.daemon.code_version', return_value='older'), \
+                mock.patch('sys.stderr', io.StringIO()) as stderr:
+            assert daemon.forward(['help'], self.path) is None
+
+        self.server.join()
+        assert not self.control.is_running()
+        assert 'older cpm' in stderr.getvalue()
+
+    def test_daemon_refuses_to_start_in_a_directory_other_users_can_reach(self):
+        directory = f'{self.directory}/shared'
+        os.mkdir(directory)
+        os.chmod(directory, 0o777)
+
+        self.assertRaises(daemon.UnsafeDaemonDirectory, daemon.CpmDaemon(f'{directory}/daemon.sock').serve)
@@ -0,0 +1,81 @@
+import json
+import os
+import tempfile
+import unittest
+import mock
+
+import cpm
+from cpm.infrastructure import events, profiler
+
+
+class TestEvents(unittest.TestCase):
+    def setUp(self):
+        self.events_file = tempfile.NamedTemporaryFile(suffix='.jsonl', delete=False).name
+
+    def tearDown(self):
+        events.stop()
+        os.remove(self.events_file)
+
+    def recorded_events(self):
+        with open(self.events_file) as events_file:
+            return [json.loads(line) for line in events_file]
+
+    def test_events_are_ignored_when_no_events_file_is_given(self):
+        events.emit('command_start', command='build')
+
+        assert not events.is_enabled()
+
+    def test_events_are_appended_as_json_lines(self):
+        events.start(self.events_file)
+        events.emit('command_start', command='build')
+        events.stop()
+        events.start(self.events_file)
+        events.emit('command_end', command='build', status_code=0)
+        events.stop()
+
+        recorded = self.recorded_events()
+        assert [event['event'] for event in recorded] == ['command_start', 'command_end']
+        assert recorded[1]['status_code'] == 0
+        assert 'time' in recorded[1]
+
+    def test_profiled_stages_are_emitted_with_their_duration(self):
+        events.start(self.events_file)
+
+        with profiler.span('ninja', 'build', goals=['project']):
+            pass
+        with profiler.span('test_suite', 'test'):
+            pass
+        events.stop()
+
+        recorded = self.recorded_events()
+        assert len(recorded) == 1
+        assert recorded[0]['event'] == 'stage'
+        assert recorded[0]['name'] == 'ninja'
+        assert recorded[0]['goals'] == ['project']
+        assert recorded[0]['duration_ms'] >= 0
+
+    @mock.patch('cpm.available_commands')
+    def test_command_end_is_emitted_when_the_command_is_interrupted(self, available_commands):
+        available_commands.return_value = {'build': mock.MagicMock()}
+        available_commands.return_value['build'].execute.side_effect = KeyboardInterrupt
+
+        with mock.patch('sys.argv', ['cpm', '--events', self.events_file, 'build']):
+            self.assertRaises(SystemExit, cpm.main)
+
+        recorded = self.recorded_events()
+        assert [event['event'] for event in recorded] == ['command_start', 'command_end']
+        assert recorded[1]['status_code'] == 1
+        assert recorded[1]['message'] == 'cancelled'
+
+    @mock.patch('cpm.available_commands')
+    def test_command_end_is_emitted_when_the_command_raises(self, available_commands):
+        available_commands.return_value = {'build': mock.MagicMock()}
+        available_commands.return_value['build'].execute.side_effect = OSError('disk full')
+
+        with mock.patch('sys.argv', ['cpm', '--events', self.events_file, 'build']):
+            self.assertRaises(OSError, cpm.main)
+
+        recorded = self.recorded_events()
+        assert recorded[-1]['event'] == 'command_end'
+        assert recorded[-1]['status_code'] == 1
+        assert recorded[-1]['message'] == 'error: disk full'
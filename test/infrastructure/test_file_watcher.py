@@ -0,0 +1,58 @@
+import unittest
+import os
+
+from cpm.infrastructure import file_watcher
+from cpm.infrastructure.file_watcher import Changes, PollingWatcher, InotifyWatcher
+from test.temporary_directory import InTemporaryDirectory
+
+
+class FileWatcherContract(InTemporaryDirectory):
+    def setUp(self):
+        super().setUp()
+        os.makedirs('package/build')
+        self.write('project.yaml', 'name: project')
+        self.write('package/source.cpp', '')
+
+    def test_reports_modified_files(self):
+        watcher = self.watcher(['project.yaml'], ['package'])
+        self.write('project.yaml', 'name: renamed_project')
+
+        changes = watcher.wait_for_changes()
+        watcher.close()
+
+        assert changes == Changes(modified={'project.yaml'})
+
+    def test_reports_added_and_removed_files_inside_watched_directories(self):
+        watcher = self.watcher(['project.yaml'], ['package'])
+        self.write('package/new_source.c', '')
+        os.remove('package/source.cpp')
+
+        changes = watcher.wait_for_changes()
+        watcher.close()
+
+        assert changes == Changes(added={'package/new_source.c'}, removed={'package/source.cpp'})
+
+    def test_ignores_build_directories(self):
+        watcher = self.watcher(['project.yaml'], ['package'])
+        self.write('package/build/object.o', '')
+        self.write('project.yaml', 'name: renamed_project')
+
+        changes = watcher.wait_for_changes()
+        watcher.close()
+
+        assert changes == Changes(modified={'project.yaml'})
+
+
+class TestPollingWatcher(FileWatcherContract, unittest.TestCase):
+    def watcher(self, files, directories):
+        return PollingWatcher(files, directories, interval=0.01)
+
+    def write(self, file_name, contents):
+        super().write(file_name, contents)
+        os.utime(file_name, ns=(0, os.stat(file_name).st_mtime_ns + 1000))
+
+
+@unittest.skipIf(file_watcher._libc() is None, 'inotify is not available')
+class TestInotifyWatcher(FileWatcherContract, unittest.TestCase):
+    def watcher(self, files, directories):
+        return InotifyWatcher(files, directories)
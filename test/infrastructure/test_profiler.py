@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import unittest
+
+from cpm.infrastructure import profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.trace_file = tempfile.NamedTemporaryFile(suffix='.json', delete=False).name
+
+    def tearDown(self):
+        profiler.stop()
+        os.remove(self.trace_file)
+
+    def trace_events(self):
+        with open(self.trace_file) as trace_file:
+            return json.load(trace_file)['traceEvents']
+
+    def test_spans_are_not_recorded_when_profiling_is_disabled(self):
+        with profiler.span('phase') as args:
+            args['key'] = 'value'
+
+        assert not profiler.is_enabled()
+
+    def test_spans_are_saved_as_complete_trace_events(self):
+        profiler.start(self.trace_file)
+
+        with profiler.span('outer', 'command', argv=['build']):
+            with profiler.span('inner', 'build') as args:
+                args['exit_code'] = 0
+        profiler.stop()
+
+        events = self.trace_events()
+        assert [event['name'] for event in events] == ['inner', 'outer']
+        assert events[0]['cat'] == 'build'
+        assert events[0]['ph'] == 'X'
+        assert events[0]['args'] == {'exit_code': 0}
+        assert events[1]['args'] == {'argv': ['build']}
+        assert events[1]['ts'] <= events[0]['ts']
+        assert events[1]['dur'] >= events[0]['dur']
+
+    def test_span_is_recorded_when_the_phase_raises(self):
+        profiler.start(self.trace_file)
+
+        with self.assertRaises(ValueError):
+            with profiler.span('failing phase'):
+                raise ValueError
+        profiler.stop()
+
+        assert [event['name'] for event in self.trace_events()] == ['failing phase']
+
+    def test_profiled_functions_are_recorded_with_the_given_name(self):
+        @profiler.profiled('compose project', 'descriptor')
+        def compose():
+            return 'project'
+        profiler.start(self.trace_file)
+
+        result = compose()
+        profiler.stop()
+
+        assert result == 'project'
+        assert [(event['name'], event['cat']) for event in self.trace_events()] == [('compose project', 'descriptor')]
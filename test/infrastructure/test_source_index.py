@@ -0,0 +1,94 @@
+import os
+import time
+import unittest
+import mock
+
+from cpm.infrastructure import source_index
+from cpm.infrastructure.source_index import SourceIndex
+from test.temporary_directory import InTemporaryDirectory
+
+
+class TestSourceIndex(InTemporaryDirectory, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        source_index._indexes.clear()
+
+    def tearDown(self):
+        super().tearDown()
+        source_index._indexes.clear()
+
+    def create(self, *file_names):
+        for file_name in file_names:
+            self.write(file_name)
+
+    def age_directories(self):
+        past = time.time() - 60
+        for directory, _, _ in os.walk('.'):
+            os.utime(directory, (past, past))
+
+    def test_finds_files_matching_any_pattern_in_a_single_walk(self):
+        self.create('api/api.cpp', 'api/http/client.c', 'api/api.h', 'api/http/client.cpp')
+
+        with mock.patch('cpm.infrastructure.source_index.os.scandir', wraps=os.scandir) as scandir:
+            sources = source_index.find('api', ['*.cpp', '*.c'])
+
+        assert sources == ['api/api.cpp', 'api/http/client.cpp', 'api/http/client.c']
+        assert scandir.call_count == 2
+
+    def test_ignored_directories_are_pruned(self):
+        self.create('api/api.cpp', 'api/build/generated.cpp', 'api/.git/hook.cpp', 'build/main.cpp', 'main.cpp')
+
+        assert source_index.find('.', ['*.cpp']) == ['main.cpp', 'api/api.cpp']
+
+    def test_missing_directories_have_no_files(self):
+        assert source_index.find('tests', ['test_*.cpp']) == []
+
+    def test_unchanged_directories_are_not_scanned_again(self):
+        self.create('api/api.cpp', 'api/http/client.cpp')
+        self.age_directories()
+        index = SourceIndex()
+        index.files('api')
+
+        with mock.patch('cpm.infrastructure.source_index.os.scandir', wraps=os.scandir) as scandir:
+            files = index.files('api')
+
+        assert files == ['api/api.cpp', 'api/http/client.cpp']
+        scandir.assert_not_called()
+
+    def test_changed_directories_are_scanned_again(self):
+        self.create('api/api.cpp', 'api/http/client.cpp')
+        self.age_directories()
+        index = SourceIndex()
+        index.files('api')
+
+        self.create('api/http/server.cpp')
+
+        assert index.files('api') == ['api/api.cpp', 'api/http/client.cpp', 'api/http/server.cpp']
+
+    def test_recently_modified_directories_are_not_remembered(self):
+        self.create('api/api.cpp')
+        index = SourceIndex()
+
+        index.files('api')
+
+        assert index.directories == {}
+
+    def test_index_is_persisted_in_the_build_directory(self):
+        self.create('api/api.cpp')
+        os.mkdir('build')
+        self.age_directories()
+        source_index.find('api', ['*.cpp'])
+
+        source_index.save()
+        source_index._indexes.clear()
+
+        assert os.path.abspath('api') in source_index.index().directories
+
+    def test_index_is_not_persisted_without_a_build_directory(self):
+        self.create('api/api.cpp')
+        self.age_directories()
+        source_index.find('api', ['*.cpp'])
+
+        source_index.save()
+
+        assert not os.path.exists('build')
@@ -0,0 +1,54 @@
+import unittest
+import mock
+from pathlib import Path
+
+from cpm.infrastructure.yaml_parser import YamlParser, FastYamlParser, IncludeCycle
+from test.temporary_directory import InTemporaryDirectory
+
+
+class YamlParserContract(InTemporaryDirectory):
+    def test_file_included_several_times_is_read_once(self):
+        self.write('project.yaml', 'build: !include flags.yaml\ntest: !include flags.yaml\nother: !include ./flags.yaml\n')
+        self.write('flags.yaml', 'cflags: [-DONE]\n')
+        parser = self.parser()
+
+        with mock.patch.object(type(parser), 'load_document', wraps=type(parser).load_document, autospec=True) as load_document:
+            document = parser.load_from(Path('project.yaml'))
+
+        assert load_document.call_count == 2
+        assert document['build']['cflags'] == ['-DONE']
+        assert document['test']['cflags'] == ['-DONE']
+        assert document['other']['cflags'] == ['-DONE']
+        assert parser.included_files() == [Path('flags.yaml')]
+
+    def test_nested_included_files_are_reported_once(self):
+        self.write('project.yaml', 'build: !include build.yaml\ntest: !include flags.yaml\n')
+        self.write('build.yaml', 'flags: !include flags.yaml\n')
+        self.write('flags.yaml', '[-DONE]\n')
+        parser = self.parser()
+
+        parser.load_from(Path('project.yaml'))
+
+        assert parser.included_files() == [Path('build.yaml'), Path('flags.yaml')]
+
+    def test_include_cycles_are_detected(self):
+        self.write('project.yaml', 'build: !include build.yaml\n')
+        self.write('build.yaml', 'name: build\nagain: !include project.yaml\n')
+        parser = self.parser()
+
+        with self.assertRaises(IncludeCycle) as context:
+            parser.load_from(Path('project.yaml'))
+
+        assert context.exception.cycle == ['project.yaml', 'build.yaml', 'project.yaml']
+        assert context.exception.parsing_file == 'build.yaml'
+        assert (context.exception.line, context.exception.col) == (1, 7)
+
+
+class TestRoundTripYamlParser(YamlParserContract, unittest.TestCase):
+    def parser(self):
+        return YamlParser(pure=True)
+
+
+class TestFastYamlParser(YamlParserContract, unittest.TestCase):
+    def parser(self):
+        return FastYamlParser()
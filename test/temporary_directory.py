@@ -0,0 +1,19 @@
+import os
+import shutil
+import tempfile
+
+
+class InTemporaryDirectory(object):
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.directory = tempfile.mkdtemp()
+        os.chdir(self.directory)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.directory)
+
+    def write(self, file_name, contents=''):
+        os.makedirs(os.path.dirname(file_name) or '.', exist_ok=True)
+        with open(file_name, 'w') as stream:
+            stream.write(contents)
@@ -0,0 +1,37 @@
+import unittest
+import importlib
+import pkgutil
+import subprocess
+import sys
+
+import cpm.api
+from cpm import commands
+
+
+class TestCommands(unittest.TestCase):
+    def test_manifest_lists_every_api_command(self):
+        api_modules = [importlib.import_module(module.name) for module in pkgutil.iter_modules(cpm.api.__path__, 'cpm.api.')]
+        api_commands = [module.__name__.split('.')[-1] for module in api_modules if hasattr(module, 'execute')]
+
+        assert sorted(commands.COMMANDS.keys()) == sorted(api_commands)
+
+    def test_manifest_descriptions_match_api_commands(self):
+        for name, description in commands.COMMANDS.items():
+            module = importlib.import_module(f'cpm.api.{name}')
+            assert module.description() == description
+
+    def test_available_commands_does_not_import_command_modules(self):
+        output = subprocess.run(
+            [sys.executable, '-c', 'import sys, cpm; cpm.available_commands(); '
+                                   'print(sorted(m for m in sys.modules if m.startswith("cpm.api.") or m in ("docker", "requests")))'],
+            stdout=subprocess.PIPE,
+            check=True
+        ).stdout.decode()
+
+        assert output.strip() == "['cpm.api.result']"
+
+    def test_command_module_is_imported_when_executed(self):
+        command = commands.LazyCommand('clean', 'clean all build files')
+
+        assert command.description() == 'clean all build files'
+        assert command.module() is importlib.import_module('cpm.api.clean')
@@ -0,0 +1,26 @@
+import unittest
+import subprocess
+import sys
+
+HEAVY_MODULES = ('docker', 'requests', 'distutils', 'pkg_resources')
+
+
+def modules_imported_by(statement):
+    output = subprocess.run(
+        [sys.executable, '-c', f'import sys; {statement}; print(" ".join(sorted(sys.modules)))'],
+        stdout=subprocess.PIPE,
+        check=True
+    ).stdout.decode()
+    return output.split()
+
+
+class TestStartup(unittest.TestCase):
+    def test_top_level_entry_point_does_not_import_heavy_modules(self):
+        imported = modules_imported_by('import cpm')
+
+        assert not [module for module in HEAVY_MODULES if module in imported]
+
+    def test_build_commands_do_not_import_heavy_modules(self):
+        imported = modules_imported_by('import cpm.api.build, cpm.api.prep, cpm.api.test, cpm.api.clean')
+
+        assert not [module for module in HEAVY_MODULES if module in imported]